@@ -1,57 +1,109 @@
 #!/usr/bin/env python3
 """
 批量为技能添加金币检查的脚本
+- 用函数区间索引找到 nonBattleSkills.js 中每个 executeXxx 的函数体
+- 技能名和费用从 JS 源码提取（skillCosts.js 的 SKILL_COSTS），不再手工维护技能列表
+- 已调用 checkAndDeductGold、或自行扣除 caster.gold 的函数跳过
+- 所有插入先算成偏移表，再一次拼接、一次写入
+
+用法: python3 add_gold_checks.py [--dry-run [diff|json]]
 """
 
 import re
 
-# 需要添加金币检查的技能及其成本（已经处理过的除外）
-skills_to_fix = {
-    'executeShiLaiYunZhuan': '时来运转',
-    'executeXianShengDuoRen': '先声夺人',
-    'executeJinBiDaiKuan': '金币贷款',
-    'executeDingHaiShenZhen': '定海神针',
-    'executeHuanRanYiXin': '焕然一新',
-    'executeGouYanCanChuan': '苟延残喘',
-    'executeGaoJiZhiLiao': '高级治疗',
-    'executeZhongZhiChengCheng': '众志成城',
-    'executeWuZhongShengYou': '无中生有',
-    'executeHaoGaoWuYuan': '好高骛远',
-    'executeHuJiaHuWei': '狐假虎威',
-    'executePaoZhuanYinYu': '抛砖引玉',
-    'executeJinZhiNiuQu': '进制扭曲',
-    'executeTiDengDingSun': '提灯定损',
-    'executeLianXuDaJi': '连续打击',
-    'executeBoTaoXiongYong': '波涛汹涌',
-    'executeKuangHongLanZha': '狂轰滥炸',
-    'executeHengSaoYiKong': '横扫一空',
-    'executeWanJianQiFa': '万箭齐发',
-    'executeJiangWeiDaJi': '降维打击',
-    'executeShenCangBuLu': '深藏不露',
-    'executeDingShiBaoPo': '定时爆破',
-    'executeYongJiuCuiHui': '永久摧毁',
-    'executeZhanLueZhuanYi': '战略转移',
-    'executeLianSuoFanYing': '连锁反应',
-    'executeZhaoXianNaShi': '招贤纳士',
-    'executeWuXieKeJi': '无懈可击',
-    'executeJianBuKeCui': '坚不可摧',
-    'executeYiHuaJieMu': '移花接木',
-    'executeBuLuZongJi': '不露踪迹',
-    'executeZhengQiHuaYi': '整齐划一',
-    'executeRenZhiJiaoHuan': '人质交换',
-    'executeFuDiChouXin': '釜底抽薪',
-}
+import dry_run
+import function_index
+import js_lexer
+import skill_registry
+
+filepath = 'src/composables/skills/nonBattleSkills.js'
 
 # 生成插入代码
-gold_check_template = """    // 金币检查和扣除
-    const goldCheck = checkAndDeductGold('{skill_name}', caster, gameStore)
-    if (!goldCheck.success) {{
-      return goldCheck
-    }}
+gold_check_template = """{indent}// 金币检查和扣除
+{indent}const goldCheck = checkAndDeductGold('{skill_name}', caster, gameStore)
+{indent}if (!goldCheck.success) {{
+{indent}  return goldCheck
+{indent}}}
+
 """
 
-print("需要为以下技能添加金币检查：")
-for func_name, skill_name in skills_to_fix.items():
-    print(f"- {func_name} ({skill_name})")
+# 自行计算费用并直接扣除金币的写法（如事半功倍、转账）
+MANUAL_DEDUCTION = re.compile(r'\bcaster\.gold\s*-=')
+
+
+def plan_insertions(content, registry, index):
+    """
+    返回 (insertions, skipped)
+    insertions: [(插入位置, 函数名, 技能名, 费用)]；skipped: [(函数名, 技能名, 原因)]
+    """
+    insertions = []
+    skipped = []
+    for span in index:
+        skill_name = registry.skill_for_function(span.name)
+        body = content[span.body:span.end]
+        cost = registry.cost(skill_name)
+        if skill_name is None:
+            skipped.append((span.name, None, '找不到对应技能'))
+        elif cost is None:
+            skipped.append((span.name, skill_name, 'skillCosts.js 中没有该技能的费用'))
+        elif 'checkAndDeductGold(' in body:
+            continue
+        elif MANUAL_DEDUCTION.search(body):
+            skipped.append((span.name, skill_name, '函数自行扣除金币'))
+        elif cost == 0:
+            skipped.append((span.name, skill_name, '费用为 0'))
+        else:
+            # 插在函数体 { 所在行之后
+            newline = content.find('\n', span.body)
+            offset = len(content) if newline < 0 else newline + 1
+            insertions.append((offset, span.name, skill_name, cost))
+    return insertions, skipped
+
+
+def insertion_text(content, span_start, skill_name):
+    indent = js_lexer.indent_at(content, span_start) + '  '
+    return gold_check_template.format(indent=indent, skill_name=skill_name)
+
+
+def main():
+    with dry_run.DryRun(dry_run.mode_from_argv()) as output:
+        content = output.read(filepath)
+
+        registry = skill_registry.load_registry()
+        index = function_index.FunctionIndex.build(content)
+        insertions, skipped = plan_insertions(content, registry, index)
+
+        # 技能表交叉检查：有费用但找不到实现函数的非战斗技能
+        missing = sorted(name for name in registry.costs
+                         if not registry.is_battle_skill(name) and registry.function_for_skill(name) is None)
+
+        if insertions:
+            print("添加金币检查：")
+            for offset, func_name, skill_name, cost in insertions:
+                print(f"- 第{js_lexer.line_number(content, offset)}行 {func_name} ({skill_name}, {cost}金币)")
+        if skipped:
+            print("\n跳过：")
+            for func_name, skill_name, reason in skipped:
+                print(f"- {func_name} ({skill_name or '?'}): {reason}")
+        if missing:
+            print("\n⚠️  skillCosts.js 中有费用、但找不到实现函数的技能：")
+            for name in missing:
+                print(f"- {name} ({registry.cost(name)}金币)")
+
+        if not insertions:
+            print("\n✅ 所有技能都已有金币检查")
+            return
+
+        # 一次拼接、一次写入
+        edits = [(offset, offset, insertion_text(content, index.get(func_name).start, skill_name))
+                 for offset, func_name, skill_name, _ in insertions]
+        new_content = js_lexer.apply_edits(content, edits)
+        run_id = output.write(filepath, content, new_content, __file__)
+        if run_id:
+            print(f"\n备份原文件: {run_id}（恢复: python3 backup_store.py restore {run_id}）")
+
+        print(f"\n总计：{len(insertions)}个技能")
+
 
-print(f"\n总计：{len(skills_to_fix)}个技能")
+if __name__ == '__main__':
+    main()
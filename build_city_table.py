@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+城市卡牌数据表构建
+解析 src/data/cities.js（各省城市数组和 PROVINCES 顺序）和 src/data/citySkills.js（CITY_SKILLS），
+生成一张预先连接好的列式城市表：城市名、省份、HP、省会/直辖市/特别行政区/计划单列市标记、专属技能编号
+- src/data/cityTable.json：紧凑 JSON
+- src/data/cityTable.js：生成的 JS 模块，游戏启动时直接导入，不必在运行时拼 Map
+写入后同步到 citycard-vue/ 镜像（镜像缺失或内容不同的生成文件）
+同时与 performanceOptimization.js 中手工维护的 PROVINCE_MAP 对比，报告漂移；
+--sync-province-map 按 cities.js 重新生成该 Map
+
+用法:
+  python3 build_city_table.py [--dry-run [diff|json]]   # 生成数据表
+  python3 build_city_table.py --check                   # 数据表过期或 PROVINCE_MAP 漂移时返回 1
+  python3 build_city_table.py --sync-province-map       # 同时重写 PROVINCE_MAP
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+import dry_run
+import js_lexer
+import mirror_sync
+import skill_registry
+
+CITIES_SOURCE = 'src/data/cities.js'
+SKILLS_SOURCE = 'src/data/citySkills.js'
+PROVINCE_MAP_SOURCE = 'src/composables/skills/performanceOptimization.js'
+JSON_OUTPUT = 'src/data/cityTable.json'
+JS_OUTPUT = 'src/data/cityTable.js'
+
+SPECIAL_GROUP = '直辖市和特区'
+PLAN_CITIES = ['大连市', '青岛市', '宁波市', '厦门市', '深圳市']
+
+# 标记位，与生成的 JS 模块中的 CITY_FLAGS 一致
+FLAGS = {
+    'capital': 1,         # 省会/首府（各省数组第一个城市）
+    'municipality': 2,    # 直辖市
+    'sar': 4,             # 特别行政区
+    'plan': 8,            # 计划单列市
+}
+
+FORMAT_VERSION = 1
+
+# 词法器把 1.5 拆成 1 . 5 三个 token，字段值需要整体识别小数
+_DECIMAL = re.compile(r'\d+\.\d+')
+
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _value(block, tok):
+    text = block[tok.start:tok.end]
+    if tok.kind == 'string':
+        return text[1:-1]
+    if tok.kind == 'number':
+        return float(text) if '.' in text else int(text)
+    return text
+
+
+def _field_value(block, tokens, i):
+    """tokens[i] 起的字段值：单个字面量转为 Python 值，其他表达式（如 SKILL_TYPE.PASSIVE）取源码文本"""
+    depth = 0
+    j = i
+    while j < len(tokens):
+        text = block[tokens[j].start:tokens[j].end]
+        if tokens[j].kind == 'punct':
+            if text in '([{':
+                depth += 1
+            elif text in ')]}':
+                if depth == 0:
+                    break
+                depth -= 1
+            elif text == ',' and depth == 0:
+                break
+        j += 1
+    if j == i + 1:
+        return _value(block, tokens[i])
+    text = block[tokens[i].start:tokens[j - 1].end]
+    return float(text) if _DECIMAL.fullmatch(text) else text
+
+
+def object_list(content, name):
+    """解析 name = [{key: value, ...}, ...]，只取简单的键值对"""
+    block, tokens = skill_registry._block_tokens(content, name)
+    items = []
+    depth = 0
+    for i, tok in enumerate(tokens):
+        text = block[tok.start:tok.end]
+        if tok.kind == 'punct':
+            if text in '([{':
+                depth += 1
+                if depth == 2 and text == '{':
+                    items.append({})
+            elif text in ')]}':
+                depth -= 1
+            continue
+        if (depth == 2 and tok.kind in ('ident', 'string') and i + 2 < len(tokens)
+                and block[tokens[i + 1].start:tokens[i + 1].end] == ':'):
+            key = _value(block, tok) if tok.kind == 'string' else text
+            items[-1][key] = _field_value(block, tokens, i + 2)
+    return items
+
+
+def nested_objects(content, name):
+    """解析 name = {'键': {字段: 值, ...}, ...}，返回 {键: {字段: 值}}（只取第二层的简单字段）"""
+    block, tokens = skill_registry._block_tokens(content, name)
+    entries = {}
+    current = None
+    depth = 0
+    for i, tok in enumerate(tokens):
+        text = block[tok.start:tok.end]
+        if tok.kind == 'punct':
+            if text in '([{':
+                depth += 1
+            elif text in ')]}':
+                depth -= 1
+            continue
+        is_key = i + 2 < len(tokens) and block[tokens[i + 1].start:tokens[i + 1].end] == ':'
+        if depth == 1 and tok.kind == 'string' and is_key:
+            current = entries[_value(block, tok)] = {}
+        elif depth == 2 and current is not None and tok.kind == 'ident' and is_key:
+            current[text] = _field_value(block, tokens, i + 2)
+    return entries
+
+
+def parse_cities(content):
+    """返回 [(省份名, [(城市名, HP), ...])]，按 PROVINCES 的顺序"""
+    provinces = []
+    for entry in object_list(content, 'PROVINCES'):
+        name, var = entry['name'], entry['cities']
+        cities = [(city['name'], city['hp']) for city in object_list(content, var)]
+        provinces.append((name, cities))
+    return provinces
+
+
+def parse_city_skills(content):
+    """{城市名: (技能名, 类型, 分类)}；类型 SKILL_TYPE.PASSIVE -> passive"""
+    skills = {}
+    for city, fields in nested_objects(content, 'CITY_SKILLS').items():
+        kind = fields.get('type')
+        if isinstance(kind, str) and kind.startswith('SKILL_TYPE.'):
+            kind = kind[len('SKILL_TYPE.'):].lower()
+        skills[city] = (fields.get('name'), kind, fields.get('category'))
+    return skills
+
+
+def parse_province_map(content):
+    """performanceOptimization.js 中 PROVINCE_MAP = new Map([['城市', '省份'], ...])，返回 {城市: 省份}"""
+    match = re.search(r'\bPROVINCE_MAP\s*=\s*new Map\(', content)
+    if not match:
+        return {}
+    start = match.end() - 1
+    block = content[start:js_lexer.match_bracket(content, start)]
+    strings = [block[t.start + 1:t.end - 1] for t in js_lexer.tokenize(block) if t.kind == 'string']
+    return dict(zip(strings[::2], strings[1::2]))
+
+
+def _sources_digest(paths):
+    digest = hashlib.sha256(str(FORMAT_VERSION).encode('ascii'))
+    for path in paths:
+        digest.update(_read(path).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def build_table(provinces, city_skills):
+    """列式表：每列一个数组，省份和技能以编号引用 provinces / skills 列表"""
+    columns = {'name': [], 'province': [], 'hp': [], 'flags': [], 'skill': []}
+    skills = []
+    skill_ids = {}
+    for province_id, (province, cities) in enumerate(provinces):
+        for position, (name, hp) in enumerate(cities):
+            flags = 0
+            if province == SPECIAL_GROUP:
+                flags |= FLAGS['sar'] if name.endswith('特别行政区') else FLAGS['municipality']
+            elif position == 0:
+                flags |= FLAGS['capital']
+            if name in PLAN_CITIES:
+                flags |= FLAGS['plan']
+
+            skill = city_skills.get(name)
+            if skill is None:
+                skill_id = -1
+            else:
+                skill_id = skill_ids.get(skill)
+                if skill_id is None:
+                    skill_id = skill_ids[skill] = len(skills)
+                    skills.append(list(skill))
+
+            columns['name'].append(name)
+            columns['province'].append(province_id)
+            columns['hp'].append(hp)
+            columns['flags'].append(flags)
+            columns['skill'].append(skill_id)
+
+    return {
+        'version': FORMAT_VERSION,
+        'source': _sources_digest([CITIES_SOURCE, SKILLS_SOURCE]),
+        'flags': FLAGS,
+        'provinces': [name for name, _ in provinces],
+        'skills': skills,
+        'skillFields': ['name', 'type', 'category'],
+        'columns': columns,
+    }
+
+
+def render_json(table):
+    return json.dumps(table, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+JS_TEMPLATE = """/**
+ * 城市卡牌数据表（自动生成，请勿手动修改）
+ * 由 build_city_table.py 从 cities.js 和 citySkills.js 生成，源数据摘要 {source}
+ * 列式存储：CITY_TABLE.columns 的每一列按城市顺序排列，province / skill 为 provinces / skills 中的编号（-1 表示无技能）
+ */
+
+export const CITY_FLAGS = {flags}
+
+export const CITY_TABLE = {table}
+
+const INDEX = {index}
+
+/**
+ * 城市名 -> 行号，不存在返回 -1
+ */
+export function cityIndex(name) {{
+  const i = INDEX[name]
+  return i === undefined ? -1 : i
+}}
+
+/**
+ * 取一行城市数据：{{ name, province, hp, flags, skill }}，不存在返回 null
+ */
+export function cityRow(name) {{
+  const i = cityIndex(name)
+  if (i < 0) return null
+  const c = CITY_TABLE.columns
+  return {{
+    name: c.name[i],
+    province: CITY_TABLE.provinces[c.province[i]],
+    hp: c.hp[i],
+    flags: c.flags[i],
+    skill: c.skill[i] < 0 ? null : CITY_TABLE.skills[c.skill[i]][0]
+  }}
+}}
+
+/**
+ * 城市所属省份名称，不存在返回 null
+ */
+export function provinceOf(name) {{
+  const i = cityIndex(name)
+  return i < 0 ? null : CITY_TABLE.provinces[CITY_TABLE.columns.province[i]]
+}}
+
+/**
+ * 城市是否带有某个标记，如 hasCityFlag('大连市', CITY_FLAGS.plan)
+ */
+export function hasCityFlag(name, flag) {{
+  const i = cityIndex(name)
+  return i >= 0 && (CITY_TABLE.columns.flags[i] & flag) !== 0
+}}
+"""
+
+
+def render_js(table):
+    compact = lambda value: json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    index = {name: i for i, name in enumerate(table['columns']['name'])}
+    return JS_TEMPLATE.format(source=table['source'], flags=compact(table['flags']),
+                              table=compact(table), index=compact(index))
+
+
+def render_province_map(provinces):
+    """按 cities.js 生成 PROVINCE_MAP 字面量（每省一段，每行 4 个城市）"""
+    lines = ['new Map([']
+    for i, (province, cities) in enumerate(provinces):
+        if i:
+            lines.append('')
+        lines.append(f'  // {province}')
+        for j in range(0, len(cities), 4):
+            pairs = ', '.join(f"['{name}', '{province}']" for name, _ in cities[j:j + 4])
+            last = i == len(provinces) - 1 and j + 4 >= len(cities)
+            lines.append(f'  {pairs}' + ('' if last else ','))
+    lines.append('])')
+    return '\n'.join(lines)
+
+
+def province_map_drift(provinces, province_map):
+    """返回 (cities.js 有但 PROVINCE_MAP 缺少, PROVINCE_MAP 多出, 省份不一致) 三个列表"""
+    expected = {name: province for province, cities in provinces for name, _ in cities}
+    missing = [name for name in expected if name not in province_map]
+    extra = [name for name in province_map if name not in expected]
+    wrong = [(name, province_map[name], expected[name])
+             for name in expected if name in province_map and province_map[name] != expected[name]]
+    return missing, extra, wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description='把 cities.js / citySkills.js 编译成列式城市数据表')
+    parser.add_argument('--check', action='store_true', help='只检查，数据表过期或 PROVINCE_MAP 漂移时返回 1')
+    parser.add_argument('--sync-province-map', action='store_true',
+                        help=f'按 cities.js 重写 {os.path.basename(PROVINCE_MAP_SOURCE)} 中的 PROVINCE_MAP')
+    parser.add_argument('--dry-run', nargs='?', const='diff', choices=dry_run.MODES,
+                        help='不写文件，把改动以 diff（默认）或 json 输出到 stdout')
+    args = parser.parse_args()
+
+    with dry_run.DryRun(args.dry_run) as output:
+        provinces = parse_cities(_read(CITIES_SOURCE))
+        city_skills = parse_city_skills(_read(SKILLS_SOURCE))
+        table = build_table(provinces, city_skills)
+        total = len(table['columns']['name'])
+
+        names = set(table['columns']['name'])
+        print(f"城市 {total} 个，省份 {len(provinces)} 个，专属技能 {len(table['skills'])} 个")
+        orphans = sorted(name for name in city_skills if name not in names)
+        if orphans:
+            print(f"⚠️  citySkills.js 中有 {len(orphans)} 个城市不在 cities.js: {', '.join(orphans)}")
+        missing_plan = [name for name in PLAN_CITIES if name not in names]
+        if missing_plan:
+            print(f"⚠️  计划单列市不在 cities.js: {', '.join(missing_plan)}")
+
+        map_content = _read(PROVINCE_MAP_SOURCE)
+        missing, extra, wrong = province_map_drift(provinces, parse_province_map(map_content))
+        drift = bool(missing or extra or wrong)
+        if drift:
+            print(f"\nPROVINCE_MAP 与 cities.js 不一致（{PROVINCE_MAP_SOURCE}）:")
+            if missing:
+                print(f"  缺少 {len(missing)} 个: {', '.join(missing)}")
+            if extra:
+                print(f"  多出 {len(extra)} 个: {', '.join(extra)}")
+            for name, old, new in wrong:
+                print(f"  {name}: {old} -> {new}")
+
+        outputs = {JSON_OUTPUT: render_json(table), JS_OUTPUT: render_js(table)}
+        if args.sync_province_map and drift:
+            match = re.search(r'\bPROVINCE_MAP\s*=\s*(new Map\()', map_content)
+            start = match.start(1)
+            end = js_lexer.match_bracket(map_content, match.end(1) - 1)
+            outputs[PROVINCE_MAP_SOURCE] = (map_content[:start] + render_province_map(provinces)
+                                            + map_content[end:])
+
+        files = {}
+        for path, content in outputs.items():
+            old = _read(path) if os.path.exists(path) else ''
+            files[path] = (old, content)
+        stale = [path for path, (old, new) in files.items() if old != new]
+
+        if args.check:
+            for path in stale:
+                print(f"过期: {path}（运行 python3 build_city_table.py 重新生成）")
+            if not stale and not drift:
+                print("✅ 数据表是最新的，PROVINCE_MAP 与 cities.js 一致")
+            sys.exit(1 if stale or drift else 0)
+
+        run_id = output.write_many(files, __file__)
+        for path in stale:
+            print(f"{'预演' if output.enabled else '写入'}: {path}（{len(files[path][1].encode('utf-8')) / 1024:.1f} KB）")
+        if run_id:
+            print(f"备份: {run_id}（恢复: python3 backup_store.py restore {run_id}）")
+        if not output.enabled:
+            for path in mirror_sync.sync_outputs([JSON_OUTPUT, JS_OUTPUT]):
+                print(f"同步: {mirror_sync.MIRROR_DIR}/{path}")
+        if not stale:
+            print("✅ 数据表已是最新")
+        elif drift and not args.sync_province_map:
+            print("\n提示: --sync-province-map 可按 cities.js 重写 PROVINCE_MAP")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+博学多才题库分包
+把 src/data/cityQuestions.js 的 CITY_QUESTIONS[城市][难度] 拆成按城市（或按省份）的题库包，
+由生成的加载器在需要时 import()，不再把整个题库打进首屏包：
+- 选项去掉 'A. ' 这类标签、答案存为下标，加载时还原成原来的 {question, options, answer}
+- 包文件名带内容哈希，manifest.json 记录每个包的哈希、字节数、城市和题目数
+- index.js 为生成的加载器：loadCityQuestions / getCityQuestionAsync / loadAllCityQuestions / hasCityQuestions
+结束时报告首屏体积的变化（原始字节和 gzip 后字节）；写入后同步到 citycard-vue/ 镜像并删除镜像中的旧包
+
+用法:
+  python3 build_question_packs.py [--by city|province] [--dry-run [diff|json]]
+  python3 build_question_packs.py --check        # 生成结果过期时返回 1
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+import build_city_table
+import dry_run
+import js_lexer
+import mirror_sync
+
+SOURCE = 'src/data/cityQuestions.js'
+OUTPUT_DIR = 'src/data/questionPacks'
+LOADER = 'index.js'
+MANIFEST = 'manifest.json'
+PACK_FILE = re.compile(r'^q-[0-9a-f]+\.json$')
+
+DIFFICULTIES = ['普通', '进阶', '挑战']
+LABELS = 'ABCDEFGH'
+FORMAT_VERSION = 1
+
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _compact(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _gzip_size(data):
+    return len(gzip.compress(data, 9, mtime=0))
+
+
+def parse_questions(content):
+    """CITY_QUESTIONS 字面量 -> {城市: {难度: [{question, options, answer}]}}"""
+    match = re.search(r'\bCITY_QUESTIONS\s*=\s*\{', content)
+    if not match:
+        raise ValueError(f'{SOURCE} 中找不到 CITY_QUESTIONS')
+    questions, _ = js_lexer.parse_literal(content, match.end() - 1)
+    return questions
+
+
+def encode_question(item):
+    """
+    [题干, 选项, 答案]：选项恰好是 'A. xxx'、'B. xxx' ... 时去掉标签、答案存为下标；
+    否则原样保留选项和答案字母，保证还原后与原文完全一致
+    """
+    options = item['options']
+    answer = item['answer']
+    labelled = all(opt.startswith(f'{LABELS[i]}. ') for i, opt in enumerate(options))
+    if labelled and len(answer) == 1 and answer in LABELS[:len(options)]:
+        return [item['question'], [opt[3:] for opt in options], LABELS.index(answer)]
+    return [item['question'], options, answer]
+
+
+def decode_question(row):
+    """encode_question 的逆操作（与 index.js 中的 decode 一致）"""
+    question, options, answer = row
+    if isinstance(answer, int):
+        return {'question': question,
+                'options': [f'{LABELS[i]}. {opt}' for i, opt in enumerate(options)],
+                'answer': LABELS[answer]}
+    return {'question': question, 'options': options, 'answer': answer}
+
+
+def encode_city(levels):
+    return {level: [encode_question(item) for item in items] for level, items in levels.items()}
+
+
+def group_cities(questions, by):
+    """返回 [(包名, [城市, ...])]；按省份分组时不在 cities.js 中的城市单独成包"""
+    if by == 'city':
+        return [(city, [city]) for city in questions]
+    province_of = {}
+    for province, cities in build_city_table.parse_cities(_read(build_city_table.CITIES_SOURCE)):
+        for name, _ in cities:
+            province_of[name] = province
+    groups = {}
+    for city in questions:
+        groups.setdefault(province_of.get(city, city), []).append(city)
+    return list(groups.items())
+
+
+def build_packs(questions, by='city'):
+    """返回 (manifest, {文件名: 内容})"""
+    files = {}
+    packs = {}
+    cities = {}
+    for group, members in group_cities(questions, by):
+        body = _compact({'v': FORMAT_VERSION, 'c': {city: encode_city(questions[city]) for city in members}})
+        data = body.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        name = f'q-{digest[:10]}.json'
+        files[name] = body + '\n'
+        count = sum(len(items) for city in members for items in questions[city].values())
+        packs[name] = {
+            'group': group,
+            'cities': members,
+            'questions': count,
+            'hash': digest,
+            'bytes': len(data) + 1,
+            'gzipBytes': _gzip_size(data + b'\n'),
+        }
+        for city in members:
+            cities[city] = name
+    manifest = {'version': FORMAT_VERSION, 'by': by, 'packs': packs, 'cities': cities}
+    return manifest, files
+
+
+LOADER_TEMPLATE = """/**
+ * 博学多才题库加载器（自动生成，请勿手动修改）
+ * 由 build_question_packs.py 从 cityQuestions.js 生成；题库按{by_label}分包，需要时才加载
+ */
+
+const LABELS = 'ABCDEFGH'
+
+// 城市 -> 题库包文件
+const CITY_PACKS = {cities}
+
+// 包文件 -> 动态导入（字面量路径，打包时每个包单独成块）
+const PACK_LOADERS = {{
+{loaders}
+}}
+
+const packCache = new Map()
+const cityCache = new Map()
+
+function decode(row) {{
+  const [question, options, answer] = row
+  if (typeof answer === 'number') {{
+    return {{
+      question,
+      options: options.map((opt, i) => `${{LABELS[i]}}. ${{opt}}`),
+      answer: LABELS[answer]
+    }}
+  }}
+  return {{ question, options, answer }}
+}}
+
+function loadPack(file) {{
+  if (!packCache.has(file)) {{
+    packCache.set(file, PACK_LOADERS[file]().then(module => module.default || module))
+  }}
+  return packCache.get(file)
+}}
+
+/**
+ * 检查城市是否有专属题库（不加载题库包）
+ */
+export function hasCityQuestions(cityName) {{
+  return Object.prototype.hasOwnProperty.call(CITY_PACKS, cityName) && cityName !== 'DEFAULT'
+}}
+
+/**
+ * 有专属题库的城市列表
+ */
+export function questionCities() {{
+  return Object.keys(CITY_PACKS).filter(city => city !== 'DEFAULT')
+}}
+
+/**
+ * 加载城市题库，返回与 CITY_QUESTIONS[城市] 相同结构的 {{ 难度: [{{question, options, answer}}] }}
+ * 城市没有题库时返回 null
+ */
+export async function loadCityQuestions(cityName) {{
+  const file = CITY_PACKS[cityName]
+  if (!file) return null
+  if (!cityCache.has(cityName)) {{
+    const pack = await loadPack(file)
+    const levels = {{}}
+    for (const [level, rows] of Object.entries(pack.c[cityName])) {{
+      levels[level] = rows.map(decode)
+    }}
+    cityCache.set(cityName, levels)
+  }}
+  return cityCache.get(cityName)
+}}
+
+/**
+ * 加载全部题库（刷题模式），返回与 CITY_QUESTIONS 相同结构的对象
+ */
+export async function loadAllCityQuestions() {{
+  const cities = Object.keys(CITY_PACKS)
+  const all = await Promise.all(cities.map(loadCityQuestions))
+  return Object.fromEntries(cities.map((city, i) => [city, all[i]]))
+}}
+
+/**
+ * 获取指定城市和难度的随机题目（城市没有题库时使用 DEFAULT 题库）
+ */
+export async function getCityQuestionAsync(cityName, difficulty) {{
+  const cityQuestions = (await loadCityQuestions(cityName)) || (await loadCityQuestions('DEFAULT'))
+  if (!cityQuestions) return null
+  let questions = cityQuestions[difficulty]
+  if (!questions) {{
+    const fallback = await loadCityQuestions('DEFAULT')
+    questions = fallback && fallback[difficulty]
+  }}
+  if (!questions || questions.length === 0) return null
+  return questions[Math.floor(Math.random() * questions.length)]
+}}
+"""
+
+
+def render_loader(manifest):
+    loaders = ',\n'.join(f"  '{name}': () => import('./{name}')" for name in manifest['packs'])
+    by_label = '城市' if manifest['by'] == 'city' else '省份'
+    return LOADER_TEMPLATE.format(by_label=by_label, cities=_compact(manifest['cities']), loaders=loaders)
+
+
+def size_report(source_bytes, loader, manifest):
+    """首屏体积：原来整个 cityQuestions.js，分包后只有加载器"""
+    loader_bytes = loader.encode('utf-8')
+    sizes = sorted(pack['bytes'] for pack in manifest['packs'].values())
+    rows = [
+        ('cityQuestions.js（原首屏）', len(source_bytes), _gzip_size(source_bytes)),
+        ('加载器 index.js（新首屏）', len(loader_bytes), _gzip_size(loader_bytes)),
+        (f"题库包合计（{len(sizes)} 个，按需加载）", sum(sizes),
+         sum(pack['gzipBytes'] for pack in manifest['packs'].values())),
+    ]
+    print(f"\n{'原始':>10}  {'gzip':>10}")
+    for label, raw, gz in rows:
+        print(f"{raw / 1024:>8.1f}KB  {gz / 1024:>8.1f}KB  {label}")
+    saved = len(source_bytes) - len(loader_bytes)
+    saved_gz = _gzip_size(source_bytes) - _gzip_size(loader_bytes)
+    print(f"首屏减少 {saved / 1024:.1f} KB（gzip 后 {saved_gz / 1024:.1f} KB，{saved / len(source_bytes):.1%}）；"
+          f"单个包最大 {sizes[-1] / 1024:.1f} KB，中位数 {sizes[len(sizes) // 2] / 1024:.1f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='把 cityQuestions.js 拆成按需加载的题库包')
+    parser.add_argument('--by', choices=['city', 'province'], default='city', help='分包方式（默认按城市）')
+    parser.add_argument('--check', action='store_true', help='只检查，生成结果过期时返回 1')
+    parser.add_argument('--dry-run', nargs='?', const='diff', choices=dry_run.MODES,
+                        help='不写文件，把改动以 diff（默认）或 json 输出到 stdout')
+    args = parser.parse_args()
+
+    with dry_run.DryRun(args.dry_run) as output:
+        with open(SOURCE, 'rb') as f:
+            source_bytes = f.read()
+        questions = parse_questions(source_bytes.decode('utf-8'))
+        manifest, packs = build_packs(questions, args.by)
+
+        # 还原校验：解码后必须与原题库完全一致
+        for name, body in packs.items():
+            for city, levels in json.loads(body)['c'].items():
+                decoded = {level: [decode_question(row) for row in rows] for level, rows in levels.items()}
+                if decoded != questions[city]:
+                    raise SystemExit(f"❌ {city} 的题库编码后无法还原，请检查 encode_question")
+
+        loader = render_loader(manifest)
+        outputs = dict(packs)
+        outputs[MANIFEST] = json.dumps(manifest, ensure_ascii=False, indent=1) + '\n'
+        outputs[LOADER] = loader
+
+        files = {}
+        for name, content in outputs.items():
+            path = f'{OUTPUT_DIR}/{name}'
+            old = _read(path) if os.path.exists(path) else ''
+            files[path] = (old, content)
+        stale = [path for path, (old, new) in files.items() if old != new]
+        existing = os.listdir(OUTPUT_DIR) if os.path.isdir(OUTPUT_DIR) else []
+        obsolete = sorted(f'{OUTPUT_DIR}/{name}' for name in existing if PACK_FILE.match(name) and name not in packs)
+
+        total = sum(pack['questions'] for pack in manifest['packs'].values())
+        print(f"{len(questions)} 个城市，{total} 道题，按{'城市' if args.by == 'city' else '省份'}分成 {len(packs)} 个包")
+
+        if args.check:
+            for path in stale + obsolete:
+                print(f"过期: {path}（运行 python3 build_question_packs.py 重新生成）")
+            if not stale and not obsolete:
+                print("✅ 题库包是最新的")
+            sys.exit(1 if stale or obsolete else 0)
+
+        if not output.enabled:
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
+        run_id = output.write_many(files, __file__)
+        for path in stale:
+            print(f"{'预演' if output.enabled else '写入'}: {path}")
+        for path in obsolete:
+            if output.enabled:
+                print(f"预演删除: {path}")
+            else:
+                os.remove(path)
+                print(f"删除旧包: {path}")
+        if run_id:
+            print(f"备份: {run_id}（恢复: python3 backup_store.py restore {run_id}）")
+        if not output.enabled:
+            mirror_dir = os.path.join(mirror_sync.MIRROR_DIR, OUTPUT_DIR)
+            mirrored = os.listdir(mirror_dir) if os.path.isdir(mirror_dir) else []
+            removed = [f'{OUTPUT_DIR}/{name}' for name in mirrored if PACK_FILE.match(name) and name not in packs]
+            for path in mirror_sync.sync_outputs(list(files), removed):
+                print(f"同步: {mirror_sync.MIRROR_DIR}/{path}")
+
+        size_report(source_bytes, loader, manifest)
+
+
+if __name__ == '__main__':
+    main()
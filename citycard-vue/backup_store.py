@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+内容寻址备份库
+取代各脚本写在源文件旁边的 .backup / .before_* 整份拷贝：
+- 文件内容按 sha256 存为 zlib 压缩的对象 .codemod/backups/objects/ab/cdef...，相同内容只存一份
+- 每次运行记录一个清单 .codemod/backups/runs/<run-id>.json（脚本名、时间、路径 -> 哈希）
+- restore 只需解压对应对象写回，源码目录保持干净
+
+用法:
+  python3 backup_store.py list                     # 列出所有备份
+  python3 backup_store.py show <run-id>            # 查看某次备份包含的文件
+  python3 backup_store.py restore <run-id> [路径 ...]
+  python3 backup_store.py gc                       # 删除不再被任何清单引用的对象
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+BACKUP_DIR = os.path.join('.codemod', 'backups')
+
+
+def _write_atomic(path, data):
+    """写同目录临时文件后替换，避免留下半个文件"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class BackupStore:
+    """以 root 为项目根目录的备份库"""
+
+    def __init__(self, root='.'):
+        self.root = root
+        self.base = os.path.join(root, BACKUP_DIR)
+        self.objects = os.path.join(self.base, 'objects')
+        self.runs = os.path.join(self.base, 'runs')
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects, digest[:2], digest[2:])
+
+    def put(self, data):
+        """存入一段内容（bytes），返回其 sha256；已存在时不重复写"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            _write_atomic(path, zlib.compress(data, 6))
+        return digest
+
+    def get(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    def backup(self, files, script):
+        """
+        备份一组文件，files 为 {相对路径: 内容}（str 按 utf-8 编码）
+        返回本次运行的 run-id
+        """
+        entries = {}
+        for path, content in files.items():
+            data = content.encode('utf-8') if isinstance(content, str) else content
+            entries[path] = {'sha256': self.put(data), 'size': len(data)}
+
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        seed = json.dumps(entries, sort_keys=True) + script + str(time.time_ns())
+        run_id = f"{stamp}-{hashlib.sha256(seed.encode('utf-8')).hexdigest()[:6]}"
+        manifest = {
+            'id': run_id,
+            'script': script,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'timestamp': time.time(),
+            'files': entries,
+        }
+        _write_atomic(os.path.join(self.runs, run_id + '.json'),
+                      json.dumps(manifest, ensure_ascii=False, indent=1).encode('utf-8'))
+        return run_id
+
+    def manifest(self, run_id):
+        """按完整 run-id 或唯一前缀读取清单"""
+        matches = [name[:-5] for name in self._run_files() if name.startswith(run_id)]
+        if not matches:
+            raise KeyError(f"找不到备份: {run_id}")
+        if len(matches) > 1 and run_id not in matches:
+            raise KeyError(f"备份 id 前缀不唯一: {run_id}")
+        run_id = run_id if run_id in matches else matches[0]
+        with open(os.path.join(self.runs, run_id + '.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _run_files(self):
+        if not os.path.isdir(self.runs):
+            return []
+        return sorted(name for name in os.listdir(self.runs) if name.endswith('.json'))
+
+    def list_runs(self):
+        """按时间顺序返回所有清单"""
+        manifests = []
+        for name in self._run_files():
+            with open(os.path.join(self.runs, name), 'r', encoding='utf-8') as f:
+                manifests.append(json.load(f))
+        manifests.sort(key=lambda m: m.get('timestamp', 0))
+        return manifests
+
+    def restore(self, run_id, paths=None):
+        """把某次备份中的文件（默认全部）写回原位置，返回写回的路径列表"""
+        manifest = self.manifest(run_id)
+        restored = []
+        for path, entry in manifest['files'].items():
+            if paths and path not in paths:
+                continue
+            _write_atomic(os.path.join(self.root, path), self.get(entry['sha256']))
+            restored.append(path)
+        return restored
+
+    def gc(self):
+        """删除未被任何清单引用的对象，返回删除数量"""
+        referenced = {entry['sha256'] for m in self.list_runs() for entry in m['files'].values()}
+        removed = 0
+        if not os.path.isdir(self.objects):
+            return removed
+        for prefix in os.listdir(self.objects):
+            directory = os.path.join(self.objects, prefix)
+            for rest in os.listdir(directory):
+                if prefix + rest not in referenced:
+                    os.unlink(os.path.join(directory, rest))
+                    removed += 1
+        return removed
+
+
+def backup_files(files, script, root='.'):
+    """备份 {相对路径: 内容}，返回 run-id"""
+    return BackupStore(root).backup(files, os.path.basename(script))
+
+
+def backup_file(filepath, content, script):
+    """各转换脚本写文件前调用：备份单个文件的原内容，返回 run-id"""
+    return backup_files({filepath: content}, script)
+
+
+def run_command(store, command, args):
+    """执行一个子命令；找不到备份时抛出 KeyError"""
+    if command == 'list':
+        runs = store.list_runs()
+        if not runs:
+            print("暂无备份")
+        for m in runs:
+            size = sum(e['size'] for e in m['files'].values())
+            print(f"{m['id']}  {m['created']}  {m['script']:<34} {len(m['files'])} 个文件  {size / 1024:.0f} KB")
+    elif command == 'show' and len(args) == 2:
+        m = store.manifest(args[1])
+        print(f"{m['id']}  {m['created']}  {m['script']}")
+        for path, entry in m['files'].items():
+            print(f"  {entry['sha256'][:12]}  {entry['size']:>8}  {path}")
+    elif command == 'restore' and len(args) >= 2:
+        restored = store.restore(args[1], args[2:] or None)
+        for path in restored:
+            print(f"已恢复: {path}")
+        print(f"\n✅ 从 {args[1]} 恢复了 {len(restored)} 个文件")
+    elif command == 'gc':
+        print(f"删除了 {store.gc()} 个未引用的对象")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+def main():
+    args = sys.argv[1:]
+    store = BackupStore()
+    command = args[0] if args else 'list'
+
+    try:
+        run_command(store, command, args)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
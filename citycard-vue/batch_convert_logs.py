@@ -2,51 +2,23 @@
 """
 批量转换 nonBattleSkills.js 中的日志调用为双日志系统
 使用智能模式识别技能使用日志和效果日志
+基于 js_lexer 单次扫描，多行模板字符串也能一并处理
 """
 
-import re
 import sys
 
-# 技能名称映射（函数名 -> 中文名）
-SKILL_MAP = {
-    'TransferGold': '转账给他人', 'WuZhiWuWei': '无知无畏', 'KuaiSuZhiLiao': '快速治疗',
-    'CityProtection': '城市保护', 'GangTieChengShi': '钢铁城市', 'ShiLiZengQiang': '实力增强',
-    'JieShiHuanHun': '借尸还魂', 'ShiQiDaZhen': '士气大振', 'QingChuJiaCheng': '清除加成',
-    'ShiLaiYunZhuan': '时来运转', 'XianShengDuoRen': '先声夺人', 'JinBiDaiKuan': '金币贷款',
-    'DingHaiShenZhen': '定海神针', 'HuanRanYiXin': '焕然一新', 'GouYanCanChuan': '苟延残喘',
-    'GaoJiZhiLiao': '高级治疗', 'ZhongZhiChengCheng': '众志成城', 'WuZhongShengYou': '无中生有',
-    'HaoGaoWuYuan': '好高骛远', 'HuJiaHuWei': '狐假虎威', 'JinZhiNiuQu': '进制扭曲',
-    'TiDengDingSun': '提灯定损', 'LianXuDaJi': '连续打击', 'BoTaoXiongYong': '波涛汹涌',
-    'KuangHongLanZha': '狂轰滥炸', 'HengSaoYiKong': '横扫一空', 'WanJianQiFa': '万箭齐发',
-    'JiangWeiDaJi': '降维打击', 'ShenCangBuLu': '深藏不露', 'DingShiBaoPo': '定时爆破',
-    'YongJiuCuiHui': '永久摧毁', 'LianSuoFanYing': '连锁反应', 'SiMianChuGe': '四面楚歌',
-    'BanYunJiuBing': '搬运救兵', 'DaYiMieQin': '大义灭亲', 'QiangZhiBanYun': '强制搬运',
-    'DaiXingShengQuan': '代行省权', 'ShouWangXiangZhu': '守望相助', 'XingZhengZhongXin': '行政中心',
-    'YiLiLaiJiang': '以礼来降', 'ChenQiBuBei': '趁其不备', 'RenZhiJiaoHuan': '人质交换',
-    'GaiXianGengZhang': '改弦更张', 'BaQiYiZhi': '拔旗易帜', 'BiErBuJian': '避而不见',
-    'LiDaiTaoJiang': '李代桃僵', 'ShuWeiFanZhuan': '数位反转', 'ZhanLueZhuanYi': '战略转移',
-    'DaoFanTianGang': '倒反天罡', 'CityDetective': '城市侦探', 'CityProphecy': '城市预言',
-    'MingChaQiuHao': '明察秋毫', 'YiJuLiangDe': '一举两得', 'BuLuZongJi': '不露踪迹',
-    'BoXueDuoCai': '博学多才', 'JianBuKeCui': '坚不可摧', 'BuBuGaoSheng': '步步高升',
-    'HaiShiShenLou': '海市蜃楼', 'FuZhongXinZhi': '副中心制', 'ShengYuZiShi': '生于紫室',
-    'JiNengBaoHu': '技能保护', 'ZhengQiHuaYi': '整齐划一', 'TianZaiRenHuo': '天灾人祸',
-    'ZiXiangCanSha': '自相残杀', 'ZhongYongZhiDao': '中庸之道', 'YiWeiPingDi': '夷为平地',
-    'ZhaoXianNaShi': '招贤纳士', 'WuXieKeJi': '无懈可击', 'ShiBanGongBei': '事半功倍',
-    'GuoHeChaiQiao': '过河拆桥', 'JieChuFengSuo': '解除封锁', 'YiChuJiFa': '一触即发',
-    'TuPoiPingJing': '突破瓶颈', 'DangJiLiDuan': '当机立断', 'QiangZhiQianDu': '强制迁都',
-    'YanTingJiCong': '言听计从', 'DianCiGanYing': '电磁感应', 'HouJiBaoFa': '厚积薄发',
-    'HpBank': '血量存储', 'FuDiChouXin': '釜底抽薪', 'FinancialCrisis': '金融危机',
-    'JiHuaDanLie': '计划单列'
-}
-
-def find_skill_name(lines, line_idx):
-    """向上查找最近的函数定义，确定技能名称"""
-    for i in range(line_idx, max(0, line_idx - 100), -1):
-        match = re.match(r'\s*function execute(\w+)\(', lines[i])
-        if match:
-            func_name = match.group(1)
-            return SKILL_MAP.get(func_name, None)
-    return None
+import dry_run
+import function_index
+import js_lexer
+import rule_profile
+import skill_registry
+
+def find_skill_name(registry, index, offset):
+    """查找 offset 所在的 execute 函数，确定技能名称"""
+    span = index.find(offset)
+    if span is None:
+        return None
+    return registry.skill_for_function(span.name)
 
 def is_effect_log(message):
     """判断是否为纯效果日志（不包含玩家名或技能使用信息）"""
@@ -60,27 +32,28 @@ def is_effect_log(message):
             return True
     return False
 
-def convert_log_line(line, skill_name):
-    """转换单行日志调用"""
-    # 提取日志消息
-    match = re.search(r'gameStore\.addLog\(`([^`]+)`\)', line)
-    if not match:
-        return line  # 不匹配，保持原样
+def convert_log_call(content, call, skill_name):
+    """转换单个 gameStore.addLog 调用，返回替换文本；不可转换时返回 None"""
+    # 只处理单个模板字符串参数（允许多行）
+    if len(call.args) != 1:
+        return None
+    message = js_lexer.template_body(content, call.args[0])
+    if message is None:
+        return None
 
-    message = match.group(1)
-    indent = len(line) - len(line.lstrip())
-    spaces = ' ' * indent
+    spaces = js_lexer.indent_at(content, call.start)
+    # 调用独占一行时才加注释，避免破坏 if (...) gameStore.addLog(...) 这类写法
+    comment = f"// 双日志\n{spaces}" if js_lexer.starts_line(content, call.start) else ''
 
     # 判断是否为效果日志
     if is_effect_log(message):
-        return f"{spaces}addSkillEffectLog(gameStore, `{message}`)"
+        return f"addSkillEffectLog(gameStore, `{message}`)"
 
     # 技能使用日志
     if not skill_name:
         # 无法确定技能名，使用通用格式
-        public_msg = re.sub(r'\$\{caster\.name\}\s*', '', message)
-        return f"""{spaces}// 双日志
-{spaces}addSkillUsageLog(
+        public_msg = rule_profile.sub('batch_convert_logs:strip_caster_name', r'\$\{caster\.name\}\s*', '', message)
+        return f"""{comment}addSkillUsageLog(
 {spaces}  gameStore,
 {spaces}  caster.name,
 {spaces}  '未知技能',
@@ -89,15 +62,14 @@ def convert_log_line(line, skill_name):
 {spaces})"""
 
     # 生成公开消息（移除玩家名）
-    public_msg = re.sub(r'\$\{caster\.name\}\s*', '', message)
-    public_msg = re.sub(r'\$\{caster\.name\}', '', public_msg)
+    public_msg = rule_profile.sub('batch_convert_logs:strip_caster_name', r'\$\{caster\.name\}\s*', '', message)
+    public_msg = rule_profile.sub('batch_convert_logs:strip_caster_name_inline', r'\$\{caster\.name\}', '', public_msg)
 
     # 检查是否被阻挡
     is_blocked = '阻挡' in message or '护盾' in message
     private_suffix = '，但被阻挡' if is_blocked else ''
 
-    return f"""{spaces}// 双日志
-{spaces}addSkillUsageLog(
+    return f"""{comment}addSkillUsageLog(
 {spaces}  gameStore,
 {spaces}  caster.name,
 {spaces}  '{skill_name}',
@@ -105,51 +77,52 @@ def convert_log_line(line, skill_name):
 {spaces}  `你使用了{skill_name}{private_suffix}`
 {spaces})"""
 
+@rule_profile.profiled('batch_convert_logs.convert_source')
+def convert_source(source, registry):
+    """转换 source（js_lexer.ParsedSource）中所有 gameStore.addLog 调用，返回 (新内容, 修改列表)"""
+    content = source.text
+    index = function_index.index_for(source)
+    edits = []
+    for call in source.calls(['gameStore.addLog']):
+        skill_name = find_skill_name(registry, index, call.start)
+        new_call = convert_log_call(content, call, skill_name)
+        if new_call is not None:
+            edits.append((call.start, call.end, new_call))
+    return js_lexer.apply_edits(content, edits), edits
+
 def main():
     filepath = 'src/composables/skills/nonBattleSkills.js'
 
-    print(f"读取文件: {filepath}")
-    with open(filepath, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-
-    print(f"文件总行数: {len(lines)}")
-
-    # 统计待转换的日志调用
-    log_count = sum(1 for line in lines if 'gameStore.addLog' in line)
-    print(f"找到 {log_count} 个待转换的日志调用")
-
-    # 转换
-    converted_lines = []
-    converted_count = 0
-
-    for i, line in enumerate(lines):
-        if 'gameStore.addLog' in line:
-            skill_name = find_skill_name(lines, i)
-            new_line = convert_log_line(line, skill_name)
-            converted_lines.append(new_line + '\n')
-            if new_line != line.rstrip():
-                converted_count += 1
-                if converted_count <= 5:  # 只显示前5个示例
-                    print(f"\n--- 第{converted_count}个转换示例 (line {i+1}) ---")
-                    print(f"技能: {skill_name}")
-                    print(f"原: {line.rstrip()}")
-                    print(f"新: {new_line}")
-        else:
-            converted_lines.append(line)
-
-    # 保存
-    backup_path = filepath + '.backup'
-    print(f"\n备份原文件到: {backup_path}")
-    with open(backup_path, 'w', encoding='utf-8') as f:
-        f.writelines(lines)
-
-    print(f"写入转换后的文件: {filepath}")
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.writelines(converted_lines)
-
-    print(f"\n✅ 转换完成！")
-    print(f"   - 总共转换: {converted_count} 个日志调用")
-    print(f"   - 请检查文件并测试功能")
+    with dry_run.DryRun(dry_run.mode_from_argv()) as output:
+        print(f"读取文件: {filepath}")
+        content = output.read(filepath)
+
+        print(f"文件总行数: {len(content.splitlines())}")
+
+        # 单次扫描找出所有调用（含多行模板字符串）；技能名从 JS 源码提取（有缓存）
+        source = js_lexer.ParsedSource(content)
+        registry = skill_registry.load_registry()
+        print(f"找到 {len(source.calls(['gameStore.addLog']))} 个待转换的日志调用")
+
+        # 转换
+        converted, edits = convert_source(source, registry)
+        index = function_index.index_for(source)
+        for i, (start, end, new_call) in enumerate(edits[:5]):  # 只显示前5个示例
+            print(f"\n--- 第{i+1}个转换示例 (line {js_lexer.line_number(content, start)}) ---")
+            print(f"技能: {find_skill_name(registry, index, start)}")
+            print(f"原: {content[start:end]}")
+            print(f"新: {new_call}")
+
+        # 保存（预演时把完整差异输出到 stdout，不写文件）
+        run_id = output.write(filepath, content, converted, __file__)
+        if run_id:
+            print(f"\n备份原文件: {run_id}（恢复: python3 backup_store.py restore {run_id}）")
+            print(f"写入转换后的文件: {filepath}")
+
+        print(f"\n✅ 转换完成！")
+        print(f"   - 总共转换: {len(edits)} 个日志调用")
+        print(f"   - 请检查文件并测试功能")
 
 if __name__ == '__main__':
-    main()
+    with rule_profile.session_from_argv(__file__):
+        main()
@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+无界面战斗模拟器（NumPy 向量化）
+移植 src/composables/game/useBattleSimulator.js 的 calculateCityPower 和 simulateBattle，
+对 cities.js 的全部城市两两配对，一次算出整张对战矩阵（攻击方 × 防守方）：
+- 场景由攻击方修饰符（中心、副中心、生于紫室、背水一战、玉碎瓦全、天灾人祸、厚积薄发）
+  和防守方状态（屏障、既来则安、狐假虎威伪装 HP）组成，多个场景一起按 (场景, 攻, 守) 三维数组计算
+- --skills 额外套用 citySkills.js 中确定性的被动数值：hpBonus（天津市、惠州市 HP×1.5）、
+  capitalBonus（天津市为中心时 HP×2、攻击力上限 1.5 倍）、powerBoostMultiplier（北京市攻击力×1.2）
+- parity 子命令：用 node 直接运行 useBattleSimulator.js 记录一批随机对局的结果，
+  与向量化实现逐项对比（记录保存在 .codemod/battle/，JS 源码变化后自动重新记录）
+
+电磁感应连锁只作用于防守方的其他城市，单城对战矩阵中不涉及
+
+用法:
+  python3 battle_sim.py                                  # 基础场景的对战矩阵摘要
+  python3 battle_sim.py --scenario center --scenario center+desperate+barrier=5000 --skills
+  python3 battle_sim.py --save .codemod/battle/matrix.npz
+  python3 battle_sim.py parity [--cases 5000] [--record]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import build_city_table
+import js_lexer
+
+SIMULATOR_SOURCE = 'src/composables/game/useBattleSimulator.js'
+BATTLE_DIR = os.path.join('.codemod', 'battle')
+PARITY_FILE = os.path.join(BATTLE_DIR, 'parity.json')
+SEED = 20240601
+
+# 攻击方修饰符（位掩码），顺序与 calculateCityPower 中的判断顺序一致
+MODIFIERS = {
+    'center': 1,         # 中心城市 ×2
+    'subCenter': 2,      # 副中心制 ×1.5（向下取整）
+    'purpleChamber': 4,  # 生于紫室 ×2
+    'desperate': 8,      # 背水一战 ×2
+    'jadeShatter': 16,   # 玉碎瓦全 ×2
+    'disaster': 32,      # 天灾人祸：攻击力变为 1
+    'hjbf': 64,          # 厚积薄发：攻击力变为 1
+}
+# 模拟结果的各项（均为整数数组）
+RESULT_FIELDS = ['attackPower', 'damage', 'disguiseDamage', 'attackerHp', 'defenderHp',
+                 'barrierHp', 'fakeHp', 'blocked']
+
+
+def _require_numpy():
+    if np is None:
+        raise SystemExit("❌ battle_sim.py 需要 numpy（pip install numpy）")
+
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+# ---------------------------------------------------------------- 城市数据
+
+def _object_field(value):
+    """nested_objects 对嵌套对象只返回源码文本，这里再求值一次"""
+    if isinstance(value, str) and value.startswith('{'):
+        try:
+            return js_lexer.parse_literal(value)[0]
+        except ValueError:
+            return {}
+    return value if isinstance(value, dict) else {}
+
+
+class Roster:
+    """城市列表的数组形式：names[i] 对应 hp[i] 和各技能系数"""
+
+    def __init__(self, names, hp, skills=None):
+        _require_numpy()
+        skills = skills or {}
+        self.names = list(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.skill_names = [skills.get(name, {}).get('name') for name in self.names]
+        self.hp = np.asarray(hp, dtype=np.int64)
+        n = len(self.names)
+        self.hp_mult = np.ones(n)
+        self.capital_hp_mult = np.ones(n)
+        self.capital_power_limit = np.full(n, np.inf)
+        self.power_mult = np.ones(n)
+        for name, fields in skills.items():
+            i = self.index.get(name)
+            if i is None or not str(fields.get('type', '')).endswith('PASSIVE'):
+                continue
+            # 被动技能的 hpBonus 是倍数（1.5）；主动技能的 hpBonus 是增加比例，需要玩家操作，不计入
+            if isinstance(fields.get('hpBonus'), (int, float)) and fields['hpBonus'] >= 1:
+                self.hp_mult[i] = fields['hpBonus']
+            capital = _object_field(fields.get('capitalBonus'))
+            if isinstance(capital.get('hp'), (int, float)):
+                self.capital_hp_mult[i] = capital['hp']
+            if isinstance(capital.get('powerLimit'), (int, float)):
+                self.capital_power_limit[i] = capital['powerLimit']
+            if isinstance(fields.get('powerBoostMultiplier'), (int, float)):
+                self.power_mult[i] = fields['powerBoostMultiplier']
+
+    def __len__(self):
+        return len(self.names)
+
+    def skilled(self):
+        """有数值型被动技能的城市名"""
+        mask = ((self.hp_mult != 1) | (self.capital_hp_mult != 1)
+                | np.isfinite(self.capital_power_limit) | (self.power_mult != 1))
+        return [self.names[i] for i in np.flatnonzero(mask)]
+
+
+def load_roster():
+    """从 cities.js 和 citySkills.js 读取全部城市"""
+    names = []
+    hp = []
+    for _, cities in build_city_table.parse_cities(_read(build_city_table.CITIES_SOURCE)):
+        for name, city_hp in cities:
+            names.append(name)
+            hp.append(city_hp)
+    skills = build_city_table.nested_objects(_read(build_city_table.SKILLS_SOURCE), 'CITY_SKILLS')
+    return Roster(names, hp, skills)
+
+
+# ---------------------------------------------------------------- 移植的战斗逻辑
+
+def city_power(hp, mods):
+    """
+    calculateCityPower：hp 为当前 HP，mods 为 MODIFIERS 位掩码，两者可广播
+    全部为整数运算，Math.floor(x * 1.5) 对非负整数等于 x * 3 // 2
+    """
+    hp = np.asarray(hp, dtype=np.int64)
+    mods = np.asarray(mods, dtype=np.int64)
+    power = np.where(mods & MODIFIERS['center'], hp * 2, hp)
+    power = np.where(mods & MODIFIERS['subCenter'], power * 3 // 2, power)
+    for name in ('purpleChamber', 'desperate', 'jadeShatter'):
+        power = np.where(mods & MODIFIERS[name], power * 2, power)
+    power = np.where(mods & (MODIFIERS['disaster'] | MODIFIERS['hjbf']), 1, power)
+    return np.where(hp > 0, power, 0)
+
+
+def simulate_battle(power, attacker_hp, defender_hp, barrier=0, anchored=False, fake_hp=0):
+    """
+    simulateBattle（双方都存活时）：参数可广播，返回 {RESULT_FIELDS: 数组}
+    - 屏障 HP > 0：吸收 floor(50%)，其余反弹给攻击方，防守方不受伤
+    - 既来则安：免疫伤害
+    - 伪装 HP：先扣伪装，剩余伤害打到城市
+    """
+    power = np.asarray(power, dtype=np.int64)
+    attacker_hp = np.asarray(attacker_hp, dtype=np.int64)
+    defender_hp = np.asarray(defender_hp, dtype=np.int64)
+    barrier = np.asarray(barrier, dtype=np.int64)
+    anchored = np.asarray(anchored, dtype=bool)
+    fake_hp = np.asarray(fake_hp, dtype=np.int64)
+
+    shielded = barrier > 0
+    absorbed = power // 2
+    reflected = power - absorbed
+    blocked = ~shielded & anchored
+    open_hit = ~shielded & ~anchored
+    disguise = np.where(open_hit & (fake_hp > 0), np.minimum(fake_hp, power), 0)
+    damage = np.where(open_hit, power - disguise, 0)
+    fields = [
+        power,
+        damage,
+        disguise,
+        np.where(shielded, np.maximum(attacker_hp - reflected, 0), attacker_hp),
+        np.maximum(defender_hp - damage, 0),
+        np.where(shielded, np.maximum(barrier - absorbed, 0), 0),
+        np.where(fake_hp > 0, fake_hp - disguise, 0),
+        blocked.astype(np.int64),
+    ]
+    # 各项广播到同一形状（只读视图，不复制）
+    return dict(zip(RESULT_FIELDS, np.broadcast_arrays(*fields, defender_hp)))
+
+
+# ---------------------------------------------------------------- 技能数值
+
+def skill_hp(roster, hp, center, cities=None):
+    """
+    被动 HP 加成（boostCityHp：Math.floor(hp × 倍数)），为中心时再乘 capitalBonus.hp
+    cities 为 hp 各元素对应的城市下标；省略时 hp 的最后一维按 roster 顺序排列
+    """
+    hp_mult = roster.hp_mult if cities is None else roster.hp_mult[cities]
+    capital_mult = roster.capital_hp_mult if cities is None else roster.capital_hp_mult[cities]
+    hp = np.floor(hp * hp_mult).astype(np.int64)
+    return np.where(center, np.floor(hp * capital_mult), hp).astype(np.int64)
+
+
+def skill_power(roster, power, hp, center, cities=None):
+    """攻击力倍数（首都权威 ×1.2）；中心城市的攻击力不超过 HP × capitalBonus.powerLimit"""
+    power_mult = roster.power_mult if cities is None else roster.power_mult[cities]
+    limit_mult = roster.capital_power_limit if cities is None else roster.capital_power_limit[cities]
+    power = np.floor(power * power_mult)
+    limited = center & np.isfinite(limit_mult)
+    limit = np.floor(hp * np.where(limited, limit_mult, 1))
+    return np.where(limited, np.minimum(power, limit), power).astype(np.int64)
+
+
+# ---------------------------------------------------------------- 场景与矩阵
+
+def parse_scenario(value):
+    """'center+desperate+barrier=5000' -> {'name', 'mods', 'barrier', 'disguise', 'anchored'}"""
+    scenario = {'name': value, 'mods': 0, 'barrier': 0, 'disguise': 0, 'anchored': False}
+    for part in value.split('+'):
+        key, _, number = part.strip().partition('=')
+        if key in ('', 'base'):
+            continue
+        if key in MODIFIERS and not number:
+            scenario['mods'] |= MODIFIERS[key]
+        elif key == 'anchored' and not number:
+            scenario['anchored'] = True
+        elif key in ('barrier', 'disguise') and number.isdigit():
+            scenario[key] = int(number)
+        else:
+            known = list(MODIFIERS) + ['anchored', 'barrier=HP', 'disguise=HP']
+            raise argparse.ArgumentTypeError(f"无法识别的场景项 {part!r}（可用: {', '.join(known)}）")
+    return scenario
+
+
+def evaluate(roster, scenarios, skills=False):
+    """
+    一次算出全部场景的对战矩阵：返回 {RESULT_FIELDS: (场景, 攻击方, 防守方) 数组}
+    攻击力只与攻击方有关，先按 (场景, 攻击方) 算好再广播到防守方维度
+    """
+    mods = np.array([s['mods'] for s in scenarios], dtype=np.int64)[:, None]
+    center = (mods & MODIFIERS['center']) != 0
+    attacker_hp = np.broadcast_to(roster.hp, (len(scenarios), len(roster)))
+    defender_hp = roster.hp
+    if skills:
+        attacker_hp = skill_hp(roster, attacker_hp, center)
+        defender_hp = skill_hp(roster, defender_hp, False)
+    power = city_power(attacker_hp, mods)
+    if skills:
+        power = skill_power(roster, power, attacker_hp, center)
+
+    def column(key):
+        return np.array([s[key] for s in scenarios])[:, None, None]
+
+    return simulate_battle(power[:, :, None], attacker_hp[:, :, None], defender_hp[None, None, :],
+                           column('barrier'), column('anchored'), column('disguise'))
+
+
+def summarize(roster, scenarios, result, top):
+    n = len(roster)
+    off_diagonal = ~np.eye(n, dtype=bool)
+    for s, scenario in enumerate(scenarios):
+        killed = (result['defenderHp'][s] == 0) & off_diagonal
+        kills = killed.sum(axis=1)
+        deaths = killed.sum(axis=0)
+        reflected_out = (result['attackerHp'][s] == 0).sum(axis=1)
+        print(f"\n场景 {scenario['name']}：一击摧毁 {killed.sum()}/{n * (n - 1)} 组"
+              f"（{killed.sum() / (n * (n - 1)):.1%}）"
+              + (f"，被屏障反弹阵亡的攻击方 {int((reflected_out > 0).sum())} 座" if scenario['barrier'] else ''))
+        order = np.lexsort((-result['attackPower'][s][:, 0], -kills))[:top]
+        print("  最强攻击方: " + '，'.join(
+            f"{roster.names[i]}({int(kills[i])}，攻{int(result['attackPower'][s][i, 0])})" for i in order))
+        order = np.lexsort((-roster.hp, deaths))[:top]
+        print("  最难摧毁:   " + '，'.join(f"{roster.names[i]}({int(deaths[i])})" for i in order))
+
+
+def save_matrices(path, roster, scenarios, result):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    arrays = {key: np.ascontiguousarray(value) for key, value in result.items()}
+    np.savez_compressed(path, names=np.array(roster.names), hp=roster.hp,
+                        scenarios=np.array([s['name'] for s in scenarios]), **arrays)
+
+
+# ---------------------------------------------------------------- 与 JS 对比
+
+# 在 node 中直接运行 useBattleSimulator.js（去掉对 gameStore 的 import），按用例构造玩家和 gameStore，
+# 调用 simulateBattle 后从被修改的对象上读出结果
+RECORDER = r"""
+import { readFileSync } from 'fs'
+
+const [source, casesPath] = process.argv.slice(1)
+const code = readFileSync(source, 'utf8').replace(/^import .*$/gm, '')
+const sim = await import('data:text/javascript;base64,' + Buffer.from(code).toString('base64'))
+console.log = () => {}
+
+const MODIFIERS = %(modifiers)s
+const results = JSON.parse(readFileSync(casesPath, 'utf8')).map(c => {
+  const has = name => (c.mods & MODIFIERS[name]) !== 0
+  const attacker = { name: c.attacker, hp: c.attackerHp, currentHp: c.attackerHp, isAlive: true }
+  const defender = { name: c.defender, hp: c.defenderHp, currentHp: c.defenderHp, isAlive: true }
+  const attackerPlayer = {
+    name: 'A',
+    centerCityName: has('center') ? c.attacker : null,
+    battleModifiers: [
+      ...(has('desperate') ? [{ type: 'desperate_battle' }] : []),
+      ...(has('jadeShatter') ? [{ type: 'jade_shatter' }] : [])
+    ],
+    cities: { [c.attacker]: attacker }
+  }
+  const defenderPlayer = { name: 'B', centerCityName: null, cities: { [c.defender]: defender } }
+  const store = {
+    subCenters: has('subCenter') ? { A: c.attacker } : {},
+    purpleChamber: has('purpleChamber') ? { A: c.attacker } : {},
+    disaster: has('disaster') ? { A: { [c.attacker]: true } } : {},
+    hjbf: has('hjbf') ? { A: { [c.attacker]: true } } : {},
+    barrier: c.barrier ? { B: { hp: c.barrier } } : {},
+    anchored: c.anchored ? { B: { [c.defender]: true } } : {},
+    disguisedCities: c.disguise ? { ['B_' + c.defender]: { fakeHp: c.disguise } } : {}
+  }
+  const r = sim.simulateBattle(attacker, c.attacker, defender, c.defender, attackerPlayer, defenderPlayer, store)
+  const shielded = Boolean(c.barrier)
+  return {
+    attackPower: r.attackPower,
+    damage: shielded || r.blocked ? 0 : r.actualDamage,
+    disguiseDamage: r.disguiseDamage || 0,
+    attackerHp: attacker.currentHp,
+    defenderHp: defender.currentHp,
+    barrierHp: shielded ? store.barrier.B.hp : 0,
+    fakeHp: store.disguisedCities['B_' + c.defender]?.fakeHp || 0,
+    blocked: r.blocked ? 1 : 0
+  }
+})
+process.stdout.write(JSON.stringify(results))
+"""
+
+
+def parity_cases(roster, count, seed=SEED):
+    """随机对局：城市、修饰符组合、防守方状态都随机，约 5% 的攻击方 HP 为 0"""
+    rng = np.random.default_rng(seed)
+    attacker = rng.integers(0, len(roster), count)
+    defender = rng.integers(0, len(roster), count)
+    attacker_hp = np.where(rng.random(count) < 0.05, 0, roster.hp[attacker])
+    mods = rng.integers(0, max(MODIFIERS.values()) * 2, count)
+    barrier = np.where(rng.random(count) < 0.2, rng.integers(1, 20000, count), 0)
+    disguise = np.where(rng.random(count) < 0.2, rng.integers(1, 20000, count), 0)
+    anchored = rng.random(count) < 0.1
+    return [{'attacker': roster.names[a], 'defender': roster.names[d], 'attackerHp': int(hp),
+             'defenderHp': int(roster.hp[d]), 'mods': int(m), 'barrier': int(b),
+             'disguise': int(f), 'anchored': bool(x)}
+            for a, d, hp, m, b, f, x in zip(attacker, defender, attacker_hp, mods, barrier, disguise, anchored)]
+
+
+def _source_digest():
+    with open(SIMULATOR_SOURCE, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def record_js(cases):
+    """用 node 运行 useBattleSimulator.js，返回每个用例的结果"""
+    script = RECORDER % {'modifiers': json.dumps(MODIFIERS)}
+    with tempfile.NamedTemporaryFile('w', suffix='.json', encoding='utf-8', delete=False) as f:
+        json.dump(cases, f, ensure_ascii=False)
+    try:
+        proc = subprocess.run(['node', '--input-type=module', '-e', script, SIMULATOR_SOURCE, f.name],
+                              capture_output=True, text=True, encoding='utf-8')
+    except FileNotFoundError:
+        raise SystemExit("❌ 记录 JS 结果需要 node")
+    finally:
+        os.remove(f.name)
+    if proc.returncode != 0:
+        raise SystemExit(f"❌ node 运行失败:\n{proc.stderr}")
+    return json.loads(proc.stdout)
+
+
+def load_recording(count, seed):
+    try:
+        with open(PARITY_FILE, 'r', encoding='utf-8') as f:
+            recording = json.load(f)
+    except (OSError, ValueError):
+        return None, '没有记录'
+    if recording.get('source') != _source_digest():
+        return None, f'{SIMULATOR_SOURCE} 已修改'
+    if recording.get('count') != count or recording.get('seed') != seed:
+        return None, '用例参数不同'
+    return recording, None
+
+
+def run_parity(roster, count, seed, force_record):
+    recording, reason = (None, '--record') if force_record else load_recording(count, seed)
+    if recording is None:
+        print(f"重新记录 JS 结果（{reason}）...")
+        cases = parity_cases(roster, count, seed)
+        start = time.perf_counter()
+        expected = record_js(cases)
+        recording = {'source': _source_digest(), 'count': count, 'seed': seed,
+                     'cases': cases, 'expected': expected}
+        os.makedirs(BATTLE_DIR, exist_ok=True)
+        with open(PARITY_FILE, 'w', encoding='utf-8') as f:
+            json.dump(recording, f, ensure_ascii=False)
+        print(f"node 记录 {count} 个用例，用时 {time.perf_counter() - start:.2f} s → {PARITY_FILE}")
+    cases = recording['cases']
+    expected = recording['expected']
+
+    def column(key, dtype=np.int64):
+        return np.array([c[key] for c in cases], dtype=dtype)
+
+    start = time.perf_counter()
+    power = city_power(column('attackerHp'), column('mods'))
+    actual = simulate_battle(power, column('attackerHp'), column('defenderHp'),
+                             column('barrier'), column('anchored', bool), column('disguise'))
+    elapsed = time.perf_counter() - start
+
+    mismatches = []
+    for field in RESULT_FIELDS:
+        want = np.array([e[field] for e in expected], dtype=np.int64)
+        for i in np.flatnonzero(actual[field] != want):
+            mismatches.append((int(i), field, int(actual[field][i]), int(want[i])))
+    print(f"{len(cases)} 个用例 × {len(RESULT_FIELDS)} 项，向量化计算 {elapsed * 1000:.1f} ms")
+    for i, field, got, want in mismatches[:20]:
+        print(f"  ❌ 用例 {i} {field}: Python {got} ≠ JS {want}  {json.dumps(cases[i], ensure_ascii=False)}")
+    if mismatches:
+        print(f"共 {len(mismatches)} 处不一致")
+        return 1
+    print("✅ 与 JS 结果完全一致")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='向量化对战矩阵（移植 useBattleSimulator.js）')
+    parser.add_argument('command', nargs='?', default='matrix', choices=['matrix', 'parity'],
+                        help='matrix：计算对战矩阵（默认）；parity：与 JS 实现对比')
+    parser.add_argument('--scenario', type=parse_scenario, action='append',
+                        help="场景，如 center+desperate+barrier=5000，可重复（默认 base）")
+    parser.add_argument('--skills', action='store_true', help='套用 citySkills.js 中的被动数值')
+    parser.add_argument('--top', type=int, default=5, help='摘要中每项列出的城市数（默认 5）')
+    parser.add_argument('--save', metavar='PATH', help='把矩阵保存为 .npz')
+    parser.add_argument('--cases', type=int, default=5000, help='parity 的用例数（默认 5000）')
+    parser.add_argument('--seed', type=int, default=SEED, help='parity 用例的随机种子')
+    parser.add_argument('--record', action='store_true', help='parity 时强制重新记录 JS 结果')
+    args = parser.parse_args()
+
+    _require_numpy()
+    roster = load_roster()
+    if args.command == 'parity':
+        sys.exit(run_parity(roster, args.cases, args.seed, args.record))
+
+    scenarios = args.scenario or [parse_scenario('base')]
+    start = time.perf_counter()
+    result = evaluate(roster, scenarios, args.skills)
+    elapsed = time.perf_counter() - start
+    pairs = len(scenarios) * len(roster) ** 2
+    print(f"{len(roster)} 座城市 × {len(scenarios)} 个场景 = {pairs} 组对战，用时 {elapsed * 1000:.1f} ms"
+          f"（{pairs / max(elapsed, 1e-9) / 1e6:.1f} M 组/秒）")
+    if args.skills:
+        print(f"套用被动技能数值: {'、'.join(roster.skilled())}")
+    summarize(roster, scenarios, result, args.top)
+    if args.save:
+        save_matrices(args.save, roster, scenarios, result)
+        print(f"\n矩阵已保存: {args.save}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+日志迁移脚本基准测试
+按当前 nonBattleSkills.js 的规模生成 1×/10×/100× 的合成技能模块（日志调用密度、多行模板字符串、
+嵌套模板、注释、正则字面量与真实文件相近），对 log_pipeline 中的每个阶段分别计时：
+- 吞吐量（MB/s、行/s）、修改数、峰值内存（在子进程中单独跑一遍，不影响计时）
+- 各替换规则在全部字面量上的正则耗时
+- 全部默认阶段串联运行的总耗时
+结果保存为 JSON，可用 --compare 与旧结果对比，发现性能回退
+
+用法:
+  python3 benchmark_codemod.py                       # 默认 1,10,100 三个规模
+  python3 benchmark_codemod.py --scales 1,10 --repeat 3
+  python3 benchmark_codemod.py --compare .codemod/bench/bench-xxx.json
+  python3 benchmark_codemod.py --emit /tmp/synthetic  # 只生成合成文件，不计时
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import batch_convert_logs
+import correct_batch_convert_logs
+import fix_battle_skills_private_log
+import fix_dual_log_format
+import fix_non_battle_dual_log
+import fix_remaining_logs
+import js_lexer
+import log_pipeline
+import skill_registry
+
+BENCH_DIR = os.path.join('.codemod', 'bench')
+DEFAULT_SCALES = [1, 10, 100]
+# 找不到真实文件时按这个行数作为 1×
+BASE_LINES = 9081
+
+# 需要技能注册表的阶段，基准测试时换成合成注册表
+REGISTRY_STAGES = {
+    'batch_convert_logs': batch_convert_logs.convert_source,
+    'correct_batch_convert_logs': correct_batch_convert_logs.convert_source,
+}
+
+# 各脚本中作用于字面量的替换规则
+RULE_SETS = {
+    'fix_dual_log_format.NON_BATTLE_RULES': fix_dual_log_format.NON_BATTLE_RULES,
+    'fix_non_battle_dual_log.PRIVATE_LOG_RULES': fix_non_battle_dual_log.PRIVATE_LOG_RULES,
+    'fix_battle_skills_private_log.PRIVATE_LOG_RULES': fix_battle_skills_private_log.PRIVATE_LOG_RULES,
+}
+
+
+# ---------------------------------------------------------------- 合成数据
+
+CITY_WORDS = ['北京', '上海', '广州', '深圳', '成都', '杭州', '武汉', '西安', '南京', '重庆']
+EFFECTS = ['获得屏障', '恢复了500血量', '战斗力翻倍', '被冻结一回合', '金币+3', '受到300伤害']
+
+
+def _function_body(rng, key, skill):
+    """一个技能函数，各种日志写法都覆盖到"""
+    city = rng.choice(CITY_WORDS)
+    effect = rng.choice(EFFECTS)
+    lines = [
+        '/**',
+        f' * {skill} - 合成技能 {key}',
+        ' * @param {Object} caster - 施放者',
+        ' */',
+        f'export function execute{key}(caster, target, selfCity, params = {{}}) {{',
+        '  const gameStore = useGameStore()',
+        f"  if (!gameStore.checkAndDeductGold('{skill}', caster)) {{",
+        "    return { success: false, message: '金币不足' }",
+        '  }',
+        f"  const pattern = /^{city}[^/]*$/i",
+        f"  const label = `${{selfCity.name}}（{city}）`",
+        '',
+    ]
+    for i in range(rng.randint(2, 5)):
+        lines += [
+            f'  if (selfCity.currentHp > {rng.randint(100, 9000)} && pattern.test(label)) {{',
+            f'    selfCity.currentHp = Math.floor(selfCity.currentHp * {rng.randint(2, 9)} / 10)',
+            f'    // {effect}：注释里的 gameStore.addLog(`不应被修改`)',
+            f'    gameStore.addLog(`${{caster.name}}使用了{skill}，${{selfCity.name}}{effect}`)',
+            f'    if (target) gameStore.addLog(`${{target.name}}的屏障被摧毁`)',
+            '  }',
+        ]
+    message = f'msg{key}'
+    lines += [
+        f"  const {message} = `${{selfCity.name}}{effect}`",
+        f'  gameStore.addLog({message})',
+        f'  gameStore.addLog(`${{caster.name}}使用{skill}',
+        f'    第二行：${{selfCity.name}}{effect}`)',
+        '  gameStore.addLog(',
+        f"    `${{caster.name}}使用了{skill}，${{params.flag ? `强化` : '普通'}}`",
+        '  )',
+        '',
+        '  // 双日志',
+        '  addSkillUsageLog(',
+        '    gameStore,',
+        '    caster.name,',
+        f"    '{skill}',",
+        f'    `{skill}生效，${{selfCity.name}}{effect}`,',
+        f"    '你使用了{skill}'",
+        '  )',
+        '  addSkillUsageLog(',
+        '    gameStore,',
+        '    caster.name,',
+        "    '转账给他人',",
+        '    `转账${params.amount}金币给${target.name}`,',
+        '    `你转账了${params.amount}金币`',
+        '  )',
+        f"  addSkillEffectLog(gameStore, '你对 {city} 使用了{skill}')",
+        '',
+        f"  return {{ success: true, message: `{skill}成功` }}",
+        '}',
+        '',
+    ]
+    return lines
+
+
+def generate_module(scale, base_lines=BASE_LINES, seed=0):
+    """生成约 base_lines × scale 行的合成技能模块，返回 (源码, 注册表数据)"""
+    rng = random.Random(seed)
+    lines = [
+        "import { useGameStore } from '../../stores/gameStore'",
+        "import { addSkillUsageLog, addSkillEffectLog } from '../game/logUtils'",
+        '',
+    ]
+    functions = {}
+    target = base_lines * scale
+    while len(lines) < target:
+        key = f'Synth{len(functions)}'
+        skill = f'合成技能{len(functions)}'
+        functions[key] = skill
+        lines += _function_body(rng, key, skill)
+
+    data = {
+        'names': sorted(functions.values()),
+        'costs': {skill: 1 + i % 20 for i, skill in enumerate(functions.values())},
+        'battle': [],
+        'functions': functions,
+        'modules': {key: 'nonBattle' for key in functions},
+    }
+    return '\n'.join(lines) + '\n', data
+
+
+def base_line_count():
+    """1× 对应当前 nonBattleSkills.js 的行数"""
+    try:
+        with open(log_pipeline.NON_BATTLE, 'r', encoding='utf-8') as f:
+            return len(f.read().splitlines())
+    except OSError:
+        return BASE_LINES
+
+
+# ---------------------------------------------------------------- 计时
+
+def stage_runners(registry):
+    """[(阶段名, run)]，run 接收 ParsedSource 返回 (新内容, 修改数)"""
+    runners = []
+    for stage in log_pipeline.STAGES:
+        if stage.name in REGISTRY_STAGES:
+            convert = REGISTRY_STAGES[stage.name]
+
+            def run(source, convert=convert):
+                new_text, edits = convert(source, registry)
+                return new_text, len(edits)
+        else:
+            # 多目标的阶段取 nonBattleSkills.js 那一套规则
+            targets = dict(stage.targets)
+            run = targets.get(log_pipeline.NON_BATTLE) or stage.targets[0][1]
+        runners.append((stage.name, run))
+    return runners
+
+
+def _timed(func, repeat):
+    """运行 repeat 次，返回 (最短耗时, 最后一次结果)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _peak_memory_child(func, conn):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    func()
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上 ru_maxrss 单位为 KB，macOS 上为字节
+    conn.send((after - before) * (1 if sys.platform == 'darwin' else 1024))
+    conn.close()
+
+
+def _peak_memory(func):
+    """
+    单独运行一次，返回运行期间的峰值内存增量（字节）
+    支持 fork 时在子进程里看 ru_maxrss，不影响速度；否则（Windows）退回 tracemalloc，会慢很多
+    """
+    if resource is not None and 'fork' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('fork')
+        receiver, sender = ctx.Pipe(duplex=False)
+        child = ctx.Process(target=_peak_memory_child, args=(func, sender))
+        child.start()
+        sender.close()
+        peak = receiver.recv()
+        child.join()
+        return peak
+
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _throughput(size, line_count, seconds):
+    seconds = max(seconds, 1e-9)
+    return {'mb_per_s': round(size / 1e6 / seconds, 3), 'lines_per_s': round(line_count / seconds)}
+
+
+def bench_rules(content, repeat):
+    """每条替换规则在全部字符串/模板字面量上的正则耗时"""
+    literals = [content[t.start:t.end] for t in js_lexer.tokenize(content) if t.kind in ('string', 'template')]
+    results = []
+    for set_name, rules in RULE_SETS.items():
+        for pattern, replacement in rules:
+            compiled = re.compile(pattern)
+
+            def run():
+                return sum(compiled.subn(replacement, literal)[1] for literal in literals)
+
+            elapsed, matches = _timed(run, repeat)
+            results.append({'rule_set': set_name, 'pattern': pattern, 'literals': len(literals),
+                            'matches': matches, 'seconds': round(elapsed, 6)})
+
+    # fix_remaining_logs 按参数整体匹配的变量名规则
+    args = [content[s:e] for call in js_lexer.iter_calls(content, ['gameStore.addLog']) for s, e in call.args]
+    elapsed, matches = _timed(lambda: sum(1 for a in args if fix_remaining_logs.IDENTIFIER.fullmatch(a)), repeat)
+    results.append({'rule_set': 'fix_remaining_logs.IDENTIFIER', 'pattern': fix_remaining_logs.IDENTIFIER.pattern,
+                    'literals': len(args), 'matches': matches, 'seconds': round(elapsed, 6)})
+    return results
+
+
+def bench_scale(scale, repeat, base_lines, memory=True):
+    content, data = generate_module(scale, base_lines)
+    registry = skill_registry.SkillRegistry(data)
+    size = len(content.encode('utf-8'))
+    line_count = content.count('\n')
+    print(f"\n== {scale}× : {line_count} 行, {size / 1e6:.1f} MB, {len(data['functions'])} 个技能函数")
+
+    result = {'scale': scale, 'lines': line_count, 'bytes': size, 'functions': len(data['functions']),
+              'stages': {}, 'rules': [], 'pipeline': None}
+
+    # 每个阶段单独运行：新建 ParsedSource，包含词法扫描，相当于单独运行该脚本
+    for name, run in stage_runners(registry):
+        task = lambda run=run: run(js_lexer.ParsedSource(content))
+        elapsed, (new_text, changed) = _timed(task, repeat)
+        entry = {'seconds': round(elapsed, 6), 'edits': changed, **_throughput(size, line_count, elapsed)}
+        if memory:
+            entry['peak_bytes'] = _peak_memory(task)
+        result['stages'][name] = entry
+        peak = f"{entry['peak_bytes'] / 1e6:8.1f} MB" if memory else ''
+        print(f"  {name:<32} {elapsed * 1000:10.1f} ms  {entry['mb_per_s']:8.2f} MB/s  {changed:>7} 处  {peak}")
+
+    # 默认阶段串联：同一个 ParsedSource，与 log_pipeline 的实际运行方式一致
+    runners = dict(stage_runners(registry))
+
+    def pipeline():
+        source = js_lexer.ParsedSource(content)
+        total = 0
+        for name in log_pipeline.DEFAULT_STAGES:
+            source.text, changed = runners[name](source)
+            total += changed
+        return total
+
+    elapsed, total = _timed(pipeline, repeat)
+    result['pipeline'] = {'stages': list(log_pipeline.DEFAULT_STAGES), 'seconds': round(elapsed, 6),
+                          'edits': total, **_throughput(size, line_count, elapsed)}
+    if memory:
+        result['pipeline']['peak_bytes'] = _peak_memory(pipeline)
+    print(f"  {'(pipeline)':<32} {elapsed * 1000:10.1f} ms  {result['pipeline']['mb_per_s']:8.2f} MB/s  {total:>7} 处")
+
+    result['rules'] = bench_rules(content, repeat)
+    for rule in result['rules']:
+        print(f"  rule {rule['rule_set'].split('.')[0]:<30} {rule['seconds'] * 1000:10.2f} ms  "
+              f"{rule['matches']:>7} 次  {rule['pattern']}")
+    return result
+
+
+# ---------------------------------------------------------------- 结果
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current, threshold):
+    """与旧结果对比，返回回退项列表 [(描述, 旧耗时, 新耗时)]"""
+    old_scales = {r['scale']: r for r in baseline['results']}
+    regressions = []
+    print(f"\n对比基线 {baseline.get('created')}（commit {baseline.get('commit')}），阈值 {threshold:.2f}×")
+    for result in current['results']:
+        old = old_scales.get(result['scale'])
+        if old is None:
+            continue
+        pairs = [(name, old['stages'].get(name), entry) for name, entry in result['stages'].items()]
+        pairs.append(('(pipeline)', old.get('pipeline'), result['pipeline']))
+        for name, old_entry, entry in pairs:
+            if not old_entry:
+                continue
+            ratio = entry['seconds'] / max(old_entry['seconds'], 1e-9)
+            mark = '⚠️ ' if ratio > threshold else '  '
+            print(f"{mark}{result['scale']:>4}× {name:<32} {old_entry['seconds'] * 1000:10.1f} -> "
+                  f"{entry['seconds'] * 1000:10.1f} ms  ({ratio:.2f}×)")
+            if ratio > threshold:
+                regressions.append((f"{result['scale']}× {name}", old_entry['seconds'], entry['seconds']))
+    return regressions
+
+
+def parse_scales(value):
+    try:
+        scales = [int(v) for v in value.split(',') if v.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"规模必须是整数列表: {value}")
+    if not scales or min(scales) < 1:
+        raise argparse.ArgumentTypeError(f"规模必须是正整数: {value}")
+    return scales
+
+
+def main():
+    parser = argparse.ArgumentParser(description='日志迁移脚本基准测试（合成技能模块）')
+    parser.add_argument('--scales', type=parse_scales, default=DEFAULT_SCALES, help='逗号分隔的规模倍数（默认 1,10,100）')
+    parser.add_argument('--repeat', type=int, default=1, help='每项重复次数，取最短耗时')
+    parser.add_argument('--no-memory', action='store_true', help='跳过峰值内存测量（每项会额外跑一遍）')
+    parser.add_argument('--output', help=f'结果 JSON 路径（默认 {BENCH_DIR}/bench-<时间>.json）')
+    parser.add_argument('--compare', help='与之前保存的结果 JSON 对比')
+    parser.add_argument('--threshold', type=float, default=1.25, help='耗时超过基线多少倍视为回退（默认 1.25）')
+    parser.add_argument('--emit', metavar='DIR', help='只把合成模块写到 DIR，不计时')
+    args = parser.parse_args()
+
+    base_lines = base_line_count()
+
+    if args.emit:
+        os.makedirs(args.emit, exist_ok=True)
+        for scale in args.scales:
+            content, _ = generate_module(scale, base_lines)
+            path = os.path.join(args.emit, f'synthetic_{scale}x.js')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            line_count = content.count('\n')
+            print(f"写入: {path}（{line_count} 行）")
+        return
+
+    report = {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'base_lines': base_lines,
+        'repeat': args.repeat,
+        'results': [bench_scale(scale, args.repeat, base_lines, not args.no_memory) for scale in args.scales],
+    }
+
+    output = args.output or os.path.join(BENCH_DIR, time.strftime('bench-%Y%m%d-%H%M%S.json'))
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"\n结果已保存: {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} 项性能回退")
+            sys.exit(1)
+        print("\n✅ 没有性能回退")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+监视模式：源文件变化后自动重新运行转换
+轮询（不依赖 inotify 等系统功能）流水线目标文件、技能注册表源文件和技能目录：
+- 解析结果、函数分块和每块的转换结果常驻内存，文件变化后只对变化的函数块重新运行相关阶段
+- 连续保存时等待一段静默期（--debounce）再处理，合并成一次写入
+- 技能代码（skills/、skillCore/、citySkills/）中新出现的 gameStore.addLog 立即报告
+- 注册表源文件变化时重新读取注册表，依赖注册表的结果全部重算
+
+用法:
+  python3 codemod_watch.py                       # 监视并自动写回（每次写入都有备份）
+  python3 codemod_watch.py --dry-run [json]      # 只输出将要做的改动，不写文件
+  python3 codemod_watch.py --mirror              # 写入后同步到 citycard-vue/
+  python3 codemod_watch.py --once                # 处理一次当前状态后退出
+  python3 codemod_watch.py --stages a,b --interval 0.1 --debounce 0.2
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+
+import dry_run
+import incremental
+import js_lexer
+import log_index
+import log_pipeline
+import mirror_sync
+import skill_registry
+
+# 技能代码目录：其中直接调用 gameStore.addLog 视为违规
+SKILL_DIRS = [
+    'src/composables/skills',
+    'src/composables/skillCore',
+    'src/composables/citySkills',
+]
+RAW_LOG = 'gameStore.addLog'
+
+
+def _stamp():
+    return time.strftime('%H:%M:%S')
+
+
+def _stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def raw_log_calls(text, registry):
+    """直接调用 gameStore.addLog 的位置：[(所在函数, 调用原文, 行号)]"""
+    return [(row[6], ' '.join(row[14].split()), row[4])
+            for row in log_index.extract_calls(text, registry) if row[1] == RAW_LOG]
+
+
+class Watcher:
+    """常驻内存的监视状态"""
+
+    def __init__(self, stage_names, output, mirror=False):
+        self.stage_names = stage_names
+        self.output = output
+        self.mirror = mirror
+        # 路径 -> 依次运行的阶段函数
+        self.runs = {}
+        for name in stage_names:
+            for path, run in log_pipeline.STAGE_MAP[name].targets:
+                self.runs.setdefault(path, []).append(run)
+        self.registry_sources = skill_registry.source_paths()
+        self.rule_sources = sorted({path for name in stage_names for path in incremental.rule_sources(name)})
+
+        self.stats = {}        # 路径 -> (大小, mtime_ns)
+        self.texts = {}        # 路径 -> 最近一次看到（或写入）的内容
+        self.chunks = {}       # 路径 -> [(长度, 哈希)]
+        self.memo = {}         # 路径 -> {块哈希: (转换结果, 修改数)}
+        self.violations = {}   # 路径 -> Counter
+        self.check_chunks = {}  # 路径 -> 违规扫描用的分块
+        self.check_memo = {}    # 路径 -> {块哈希: raw_log_calls 结果}
+        self.registry = None
+        self.rules_warned = False
+
+    # ------------------------------------------------------------ 文件列表
+
+    def watched_paths(self):
+        paths = set(self.runs) | set(self.registry_sources) | set(self.rule_sources)
+        for directory in SKILL_DIRS:
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            paths.update(f'{directory}/{name}' for name in names if name.endswith('.js'))
+        return paths
+
+    def poll(self):
+        """返回大小或 mtime 变化的路径（含新增和删除）"""
+        current = {path: _stat(path) for path in self.watched_paths()}
+        changed = {path for path, stat in current.items() if self.stats.get(path) != stat}
+        changed |= {path for path in self.stats if path not in current}
+        self.stats = {path: stat for path, stat in current.items() if stat is not None}
+        return changed
+
+    def wait_for_changes(self, interval, debounce):
+        """阻塞到有变化，并在最后一次变化后静默 debounce 秒再返回全部变化路径"""
+        changed = set()
+        quiet_since = None
+        while True:
+            time.sleep(interval)
+            new = self.poll()
+            if new:
+                changed |= new
+                quiet_since = time.monotonic()
+            elif changed and time.monotonic() - quiet_since >= debounce:
+                return changed
+
+    # ------------------------------------------------------------ 处理
+
+    def load_registry(self):
+        log_pipeline.reset_registry()
+        registry = skill_registry.load_registry()
+        reload = self.registry is not None and registry.functions != self.registry.functions
+        self.registry = registry
+        return reload
+
+    def transform(self, path, text):
+        """按函数块运行该文件的全部阶段，返回 (新内容, 修改数, 重新转换块数, 总块数)"""
+        chunks = self.chunks[path] = incremental.rechunk(text, self.chunks.get(path, []))
+        memo = self.memo.setdefault(path, {})
+        pieces = []
+        changed = 0
+        transformed = 0
+        offset = 0
+        for length, digest in chunks:
+            if digest not in memo:
+                piece = text[offset:offset + length]
+                count = 0
+                for run in self.runs[path]:
+                    piece, n = run(js_lexer.ParsedSource(piece))
+                    count += n
+                memo[digest] = (piece, count)
+                transformed += 1
+            piece, count = memo[digest]
+            pieces.append(piece)
+            changed += count
+            offset += length
+        # 只保留当前分块用到的结果
+        live = {digest for _, digest in chunks}
+        for digest in [d for d in memo if d not in live]:
+            del memo[digest]
+        return ''.join(pieces), changed, transformed, len(chunks)
+
+    def scan_violations(self, path, text):
+        """按函数块扫描（未变的块沿用上次结果），返回 (Counter({(函数, 调用原文): 次数}), {键: 行号})"""
+        chunks = self.check_chunks[path] = incremental.rechunk(text, self.check_chunks.get(path, []))
+        memo = self.check_memo.setdefault(path, {})
+        counts = Counter()
+        lines = {}
+        line = 1
+        offset = 0
+        for length, digest in chunks:
+            piece = text[offset:offset + length]
+            if digest not in memo:
+                memo[digest] = raw_log_calls(piece, self.registry)
+            for function, call, relative in memo[digest]:
+                counts[(function, call)] += 1
+                lines.setdefault((function, call), line + relative - 1)
+            line += piece.count('\n')
+            offset += length
+        live = {digest for _, digest in chunks}
+        for digest in [d for d in memo if d not in live]:
+            del memo[digest]
+        return counts, lines
+
+    def check(self, path, text, report=True):
+        """对比违规基线，报告新增和消失的 gameStore.addLog"""
+        if not any(path.startswith(d + '/') for d in SKILL_DIRS):
+            return
+        counts, lines = self.scan_violations(path, text)
+        old = self.violations.get(path, Counter())
+        self.violations[path] = counts
+        if not report:
+            return
+        for key in sorted(counts - old, key=lambda k: lines[k]):
+            function, call = key
+            where = f" ({function})" if function else ''
+            print(f"[{_stamp()}] ⚠️  {path}:{lines[key]}{where} 直接调用 {RAW_LOG}: {call[:100]}")
+        for function, call in sorted(old - counts, key=lambda k: (k[0] or '', k[1])):
+            print(f"[{_stamp()}] ✓ {path} 已移除 {RAW_LOG}: {call[:100]}")
+
+    def process(self, changed, report=True):
+        start = time.perf_counter()
+        if any(path in self.registry_sources for path in changed) and self.load_registry():
+            print(f"[{_stamp()}] 技能注册表已变化，清空转换结果重新计算")
+            self.memo.clear()
+            self.check_memo.clear()
+            changed = changed | set(self.runs)
+        if report and any(path in self.rule_sources for path in changed) and not self.rules_warned:
+            print(f"[{_stamp()}] ⚠️  转换脚本已修改，重新启动监视后才会使用新规则")
+            self.rules_warned = True
+
+        files = {}
+        for path in sorted(changed):
+            if not os.path.exists(path):
+                self.texts.pop(path, None)
+                self.violations.pop(path, None)
+                if report:
+                    print(f"[{_stamp()}] {path} 已删除")
+                continue
+            if path.endswith('.py'):
+                continue
+            text = _read(path)
+            if path not in self.texts and report:
+                print(f"[{_stamp()}] 新文件 {path}")
+            if text == self.texts.get(path) and path not in self.runs:
+                continue
+
+            if path in self.runs:
+                new_text, count, transformed, total = self.transform(path, text)
+                if new_text != text:
+                    files[path] = (text, new_text)
+                    print(f"[{_stamp()}] {path}: 重新转换 {transformed}/{total} 块，{count} 处修改")
+                text = new_text
+            self.texts[path] = text
+            self.check(path, text, report)
+
+        if files:
+            self.write(files)
+        if report:
+            print(f"[{_stamp()}] 处理 {len(changed)} 个变化文件，用时 {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def write(self, files):
+        run_id = self.output.write_many(files, __file__)
+        if run_id:
+            print(f"[{_stamp()}] 写入 {', '.join(files)}（备份 {run_id}）")
+            if self.mirror:
+                for rel, method in mirror_sync.sync_paths(list(files)):
+                    print(f"[{_stamp()}] 同步 {mirror_sync.MIRROR_DIR}/{rel}（{method}）")
+        # 写入后的内容作为新的基准，避免把自己的写入当成变化；
+        # 再转换一次确认结果已稳定（阶段不幂等时会反复改写）
+        for path, (_, new_text) in files.items():
+            again, count, _, _ = self.transform(path, new_text)
+            if again != new_text:
+                print(f"[{_stamp()}] ⚠️  {path} 再次转换仍有 {count} 处修改，阶段可能不是幂等的")
+            if not self.output.enabled:
+                self.stats[path] = _stat(path)
+
+    def start(self):
+        """读取全部文件建立基线（不报告已有违规），并处理一次当前状态"""
+        self.load_registry()
+        self.poll()
+        self.process(set(self.stats), report=False)
+        existing = sum(sum(counts.values()) for counts in self.violations.values())
+        print(f"[{_stamp()}] 监视 {len(self.stats)} 个文件（{len(self.runs)} 个转换目标，"
+              f"阶段: {', '.join(self.stage_names)}）；已有 {existing} 处 {RAW_LOG} 作为基线")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='监视源文件，变化后只对变化的函数重新运行转换')
+    parser.add_argument('--stages', type=log_pipeline.parse_stage_list, help='逗号分隔的阶段列表（默认同 log_pipeline）')
+    parser.add_argument('--interval', type=float, default=0.1, help='轮询间隔秒数（默认 0.1）')
+    parser.add_argument('--debounce', type=float, default=0.2, help='最后一次变化后等待的静默秒数（默认 0.2）')
+    parser.add_argument('--dry-run', nargs='?', const='diff', choices=dry_run.MODES,
+                        help='不写文件，把改动以 diff（默认）或 json 输出到 stdout')
+    parser.add_argument('--mirror', action='store_true', help=f'写入后同步到 {mirror_sync.MIRROR_DIR}/')
+    parser.add_argument('--once', action='store_true', help='处理一次当前状态后退出')
+    args = parser.parse_args()
+
+    with dry_run.DryRun(args.dry_run) as output:
+        watcher = Watcher(args.stages or log_pipeline.DEFAULT_STAGES, output, args.mirror)
+        watcher.start()
+        if args.once:
+            return
+        print(f"[{_stamp()}] 开始监视（Ctrl+C 退出）")
+        try:
+            while True:
+                watcher.process(watcher.wait_for_changes(args.interval, args.debounce))
+                sys.stdout.flush()
+        except KeyboardInterrupt:
+            print(f"\n[{_stamp()}] 停止监视")
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,8 @@
 
 import re
 
+import js_lexer
+
 def extract_skill_name_from_log(log_message):
     """从日志消息中提取技能名称"""
     # 尝试匹配 "使用了XXX" 或 "使用XXX" 模式
@@ -24,11 +26,13 @@ def convert_log_to_dual(log_call, caster_var='caster'):
     将单个gameStore.addLog()调用转换为双日志调用
     """
     # 提取日志消息内容
-    match = re.search(r'gameStore\.addLog\(`([^`]+)`\)', log_call)
-    if not match:
+    call = next(js_lexer.iter_calls(log_call, ['gameStore.addLog']), None)
+    if call is None or len(call.args) != 1:
         return None
 
-    message = match.group(1)
+    message = js_lexer.template_body(log_call, call.args[0])
+    if message is None:
+        return None
 
     # 检测是否包含${caster.name}
     has_caster = '${' + caster_var + '.name}' in message
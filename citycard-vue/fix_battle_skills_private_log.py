@@ -7,33 +7,47 @@
 4. 私密日志：`你对` -> `${caster.name}对`
 """
 
-import re
+import dry_run
+import js_lexer
+import rule_profile
 
 filepath = 'src/composables/skills/battleSkills.js'
 
-with open(filepath, 'r', encoding='utf-8') as f:
-    content = f.read()
-
-# 备份
-with open(filepath + '.before_fix2', 'w', encoding='utf-8') as f:
-    f.write(content)
-
-# 替换 '你使用了' -> '${caster.name}使用了'
-content = re.sub(r"'你使用了", r"'${caster.name}使用了", content)
-
-# 替换 `你使用了` -> `${caster.name}使用了`
-content = re.sub(r"`你使用了", r"`${caster.name}使用了", content)
-
-# 替换 '你对' -> '${caster.name}对'
-content = re.sub(r"'你对 ", r"'${caster.name}对 ", content)
-
-# 替换 `你对` -> `${caster.name}对`
-content = re.sub(r"`你对 ", r"`${caster.name}对 ", content)
-
-with open(filepath, 'w', encoding='utf-8') as f:
-    f.write(content)
-
-print("✅ 已修正 battleSkills.js 中的私密日志格式")
-print("   - '你使用了' -> '${caster.name}使用了'")
-print("   - '你对' -> '${caster.name}对'")
-print("\n⚠️  注意：公开日志中缺少 ${caster.name} 仍需手动修正")
+# 私密日志替换规则（只作用于字符串 / 模板字面量，注释保持不变）
+PRIVATE_LOG_RULES = [
+    # 替换 '你使用了' -> '${caster.name}使用了'
+    (r"'你使用了", r"'${caster.name}使用了"),
+    # 替换 `你使用了` -> `${caster.name}使用了`
+    (r"`你使用了", r"`${caster.name}使用了"),
+    # 替换 '你对' -> '${caster.name}对'
+    (r"'你对 ", r"'${caster.name}对 "),
+    # 替换 `你对` -> `${caster.name}对`
+    (r"`你对 ", r"`${caster.name}对 "),
+]
+
+def fix_literal(literal):
+    for pattern, replacement in PRIVATE_LOG_RULES:
+        literal = rule_profile.sub(f'fix_battle_skills_private_log:{pattern}', pattern, replacement, literal)
+    return literal
+
+@rule_profile.profiled('fix_battle_skills_private_log.fix_source')
+def fix_source(source):
+    """修正 source（js_lexer.ParsedSource）中的私密日志，返回 (新内容, 修改数)"""
+    return js_lexer.rewrite_literals(source.text, fix_literal, source.tokens)
+
+def main():
+    with dry_run.DryRun(dry_run.mode_from_argv()) as output:
+        content = output.read(filepath)
+
+        new_content, changed = fix_source(js_lexer.ParsedSource(content))
+        output.write(filepath, content, new_content, __file__)
+
+        print("✅ 已修正 battleSkills.js 中的私密日志格式")
+        print("   - '你使用了' -> '${caster.name}使用了'")
+        print("   - '你对' -> '${caster.name}对'")
+        print(f"   - 共修改 {changed} 处字面量")
+        print("\n⚠️  注意：公开日志中缺少 ${caster.name} 仍需手动修正")
+
+if __name__ == '__main__':
+    with rule_profile.session_from_argv(__file__):
+        main()
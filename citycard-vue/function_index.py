@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+函数区间索引
+一次扫描记录文件中所有 function executeXxx 的完整区间，
+之后用二分查找在 O(log n) 内回答"偏移量 N 属于哪个技能函数"，没有行数窗口限制
+"""
+
+from bisect import bisect_right
+from collections import namedtuple
+
+import js_lexer
+
+# name: 函数名（如 executeSiMianChuGe）；start: function 关键字位置；
+# body: 函数体 { 之后的位置；end: 函数体 } 之后的位置
+FunctionSpan = namedtuple('FunctionSpan', 'name start body end')
+
+
+def scan_functions(content, prefix='execute', tokens=None):
+    """产出所有名称以 prefix 开头的 function 声明区间（嵌套在其中的同名前缀函数并入外层）"""
+    depth = 0
+    expect_name = None     # 刚看到 function 关键字的位置
+    pending = None         # (name, start) 已看到函数名，等待参数列表和函数体
+    paren = 0
+    params_done = False
+    current = None         # (name, start, body, depth) 正在扫描的函数体
+
+    for tok in js_lexer.tokenize(content) if tokens is None else tokens:
+        if tok.kind == 'comment':
+            continue
+        value = content[tok.start:tok.end]
+
+        if tok.kind == 'ident':
+            if expect_name is not None:
+                if current is None and value.startswith(prefix):
+                    pending = (value, expect_name)
+                    paren = 0
+                    params_done = False
+                expect_name = None
+            elif value == 'function':
+                expect_name = tok.start
+            continue
+        expect_name = None
+
+        if tok.kind != 'punct':
+            continue
+
+        if pending is not None and not params_done:
+            if value == '(':
+                paren += 1
+            elif value == ')':
+                paren -= 1
+                params_done = paren == 0
+
+        if value == '{':
+            if pending is not None and params_done and paren == 0:
+                current = (pending[0], pending[1], tok.end, depth)
+                pending = None
+            depth += 1
+        elif value == '}':
+            depth -= 1
+            if current is not None and depth == current[3]:
+                yield FunctionSpan(current[0], current[1], current[2], tok.end)
+                current = None
+
+
+class FunctionIndex:
+    """按起点排序的函数区间表"""
+
+    def __init__(self, spans):
+        self.spans = sorted(spans, key=lambda s: s.start)
+        self._starts = [s.start for s in self.spans]
+        self._by_name = {s.name: s for s in self.spans}
+
+    @classmethod
+    def build(cls, content, prefix='execute', tokens=None):
+        """扫描一次源码建立索引"""
+        return cls(scan_functions(content, prefix, tokens))
+
+    @classmethod
+    def from_file(cls, filepath, prefix='execute'):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return cls.build(f.read(), prefix)
+
+    def find(self, offset):
+        """返回包含 offset 的函数区间，不在任何函数内时返回 None"""
+        i = bisect_right(self._starts, offset) - 1
+        if i >= 0 and offset < self.spans[i].end:
+            return self.spans[i]
+        return None
+
+    def get(self, name):
+        """按函数名取区间"""
+        return self._by_name.get(name)
+
+    def __iter__(self):
+        return iter(self.spans)
+
+    def __len__(self):
+        return len(self.spans)
+
+
+def index_for(source, prefix='execute'):
+    """取 js_lexer.ParsedSource 上缓存的函数索引，复用其 token 列表"""
+    return source.cached(('function_index', prefix),
+                         lambda src: FunctionIndex.build(src.text, prefix, src.tokens))
@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+"""
+JS 流式词法分析器
+单次 O(n) 扫描识别字符串、模板字符串（含 ${} 嵌套）、注释、正则和括号，
+为各日志转换脚本提供 gameStore.addLog 等调用的精确区间
+
+所有区间均为源文本（已解码的 str）中的字符偏移 [start, end)
+"""
+
+import re
+from collections import namedtuple
+
+# kind: ident / number / string / template / regex / comment / punct
+Token = namedtuple('Token', 'kind start end')
+
+# name: 'gameStore.addLog'；start: 调用表达式起点；paren: 左括号位置；
+# end: 右括号之后；args: 每个参数去掉空白和注释后的 (start, end)；kinds: 与 args 对应的参数类型
+CallSite = namedtuple('CallSite', 'name start paren end args kinds')
+
+# 调用参数：kind 为 string / template / number / identifier（含 caster.name 这类成员路径）/ expression
+Argument = namedtuple('Argument', 'kind start end')
+
+_WHITESPACE = re.compile(r'\s+')
+_INDENT = re.compile(r'[ \t]*')
+_WORD = re.compile(r'[$\w]+')
+_LINE_COMMENT = re.compile(r'//[^\n]*')
+_BLOCK_COMMENT = re.compile(r'/\*.*?(?:\*/|\Z)', re.S)
+_STRINGS = {
+    "'": re.compile(r"'(?:[^'\\\n]|\\.)*'?", re.S),
+    '"': re.compile(r'"(?:[^"\\\n]|\\.)*"?', re.S),
+}
+
+# 这些符号或关键字之后出现的 / 是正则字面量，而不是除号
+_PUNCT_BEFORE_REGEX = set('(,=:[!&|?{};+-*%<>~^')
+_KEYWORDS_BEFORE_REGEX = {
+    'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete',
+    'void', 'throw', 'case', 'do', 'else', 'yield', 'await'
+}
+
+
+def _scan_regex(text, i):
+    """扫描正则字面量 /.../flags，返回结束位置"""
+    n = len(text)
+    j = i + 1
+    in_class = False
+    while j < n:
+        c = text[j]
+        if c == '\\':
+            j += 2
+            continue
+        if c == '\n':
+            return j
+        if in_class:
+            if c == ']':
+                in_class = False
+        elif c == '[':
+            in_class = True
+        elif c == '/':
+            m = _WORD.match(text, j + 1)
+            return m.end() if m else j + 1
+        j += 1
+    return n
+
+
+def _scan_template(text, i):
+    """扫描模板字符串 `...`，递归跳过 ${} 中的表达式，返回结束位置"""
+    n = len(text)
+    j = i + 1
+    while j < n:
+        c = text[j]
+        if c == '\\':
+            j += 2
+        elif c == '`':
+            return j + 1
+        elif c == '$' and text.startswith('{', j + 1):
+            j = _skip_expression(text, j + 2)
+        else:
+            j += 1
+    return n
+
+
+def _skip_expression(text, i):
+    """跳过 ${ 之后的表达式，返回匹配的 } 之后的位置"""
+    scanner = _scan(text, i, nested=True)
+    while True:
+        try:
+            next(scanner)
+        except StopIteration as stop:
+            return stop.value
+
+
+def _scan(text, i, nested=False):
+    """词法扫描主循环；nested=True 时遇到未匹配的 } 即返回其后位置"""
+    n = len(text)
+    depth = 0
+    prev = None  # 上一个有效 token 的 (kind, value)，用于区分正则和除号
+
+    while i < n:
+        c = text[i]
+
+        if c.isspace():
+            i = _WHITESPACE.match(text, i).end()
+            continue
+
+        if c == '/':
+            nxt = text[i + 1:i + 2]
+            if nxt == '/':
+                end = _LINE_COMMENT.match(text, i).end()
+                yield Token('comment', i, end)
+                i = end
+                continue
+            if nxt == '*':
+                end = _BLOCK_COMMENT.match(text, i).end()
+                yield Token('comment', i, end)
+                i = end
+                continue
+            if (prev is None
+                    or (prev[0] == 'punct' and prev[1] in _PUNCT_BEFORE_REGEX)
+                    or (prev[0] == 'ident' and prev[1] in _KEYWORDS_BEFORE_REGEX)):
+                end = _scan_regex(text, i)
+                yield Token('regex', i, end)
+                prev = ('regex', None)
+                i = end
+                continue
+
+        if c in _STRINGS:
+            end = _STRINGS[c].match(text, i).end()
+            yield Token('string', i, end)
+            prev = ('string', None)
+            i = end
+            continue
+
+        if c == '`':
+            end = _scan_template(text, i)
+            yield Token('template', i, end)
+            prev = ('template', None)
+            i = end
+            continue
+
+        m = _WORD.match(text, i)
+        if m:
+            kind = 'number' if c.isdigit() else 'ident'
+            yield Token(kind, i, m.end())
+            prev = (kind, m.group(0))
+            i = m.end()
+            continue
+
+        if nested:
+            if c == '{':
+                depth += 1
+            elif c == '}':
+                if depth == 0:
+                    return i + 1
+                depth -= 1
+
+        yield Token('punct', i, i + 1)
+        prev = ('punct', c)
+        i += 1
+
+    return n
+
+
+def tokenize(text):
+    """逐个产出 Token；模板字符串（含嵌套表达式）作为单个 token"""
+    return _scan(text, 0)
+
+
+class ParsedSource:
+    """
+    源码文本及其解析结果缓存
+    同一份文本只扫描一次，tokens / calls 及 cached() 登记的派生索引都复用这次扫描；
+    text 被替换后缓存自动失效
+    """
+
+    def __init__(self, text):
+        self._text = text
+        self._tokens = None
+        self._cache = {}
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        if value != self._text:
+            self._text = value
+            self._tokens = None
+            self._cache = {}
+
+    @property
+    def tokens(self):
+        if self._tokens is None:
+            self._tokens = list(tokenize(self._text))
+        return self._tokens
+
+    def calls(self, names):
+        """同 iter_calls，结果按调用名集合缓存"""
+        key = ('calls', frozenset(names))
+        if key not in self._cache:
+            self._cache[key] = list(iter_calls(self._text, names, self.tokens))
+        return self._cache[key]
+
+    def cached(self, key, build):
+        """缓存任意派生结果，build(self) 只在文本变化后首次访问时调用"""
+        if key not in self._cache:
+            self._cache[key] = build(self)
+        return self._cache[key]
+
+
+# 参数只含单个 token 时的类型
+_SINGLE_KINDS = {'string': 'string', 'template': 'template', 'number': 'number', 'ident': 'identifier'}
+
+
+class _Frame:
+    """正在收集参数的调用"""
+
+    __slots__ = ('name', 'start', 'paren', 'depth', 'args', 'kinds', 'first', 'last', 'kind')
+
+    def __init__(self, name, start, paren, depth):
+        self.name = name
+        self.start = start
+        self.paren = paren
+        self.depth = depth
+        self.args = []
+        self.kinds = []
+        self.first = None
+        self.last = None
+        self.kind = None
+
+    def mark(self, tok, text):
+        if self.first is None:
+            self.first = tok.start
+            self.kind = _SINGLE_KINDS.get(tok.kind, 'expression')
+        elif self.kind == 'identifier' and tok.kind == 'punct' and text[tok.start:tok.end] == '.':
+            self.kind = 'member'
+        elif self.kind == 'member' and tok.kind == 'ident':
+            self.kind = 'identifier'
+        else:
+            self.kind = 'expression'
+        self.last = tok.end
+
+    def close_arg(self):
+        if self.first is not None:
+            self.args.append((self.first, self.last))
+            # 以 . 结尾的不完整成员路径按表达式处理
+            self.kinds.append('expression' if self.kind == 'member' else self.kind)
+        self.first = self.last = self.kind = None
+
+
+def iter_calls(text, names, tokens=None):
+    """
+    单次扫描产出对 names 中函数的调用（按右括号位置先后）
+    names 为完整的调用名，如 'gameStore.addLog'、'addSkillUsageLog'
+    tokens 为已有的 token 列表时直接复用，不再重新扫描
+    """
+    names = set(names)
+    stack = []
+    depth = 0
+    chain = []
+    chain_start = None
+    after_dot = False
+
+    for tok in tokenize(text) if tokens is None else tokens:
+        kind = tok.kind
+        if kind == 'comment':
+            continue
+
+        ch = text[tok.start] if kind == 'punct' else ''
+        top = stack[-1] if stack else None
+
+        if top is not None and depth == top.depth and ch in (',', ')'):
+            top.close_arg()
+            if ch == ')':
+                stack.pop()
+                depth -= 1
+                yield CallSite(top.name, top.start, top.paren, tok.end, top.args, top.kinds)
+                if stack:
+                    stack[-1].mark(tok, text)
+            chain = []
+            after_dot = False
+            continue
+
+        if top is not None:
+            top.mark(tok, text)
+
+        if kind == 'ident':
+            if after_dot and chain:
+                chain.append(text[tok.start:tok.end])
+            else:
+                chain = [text[tok.start:tok.end]]
+                chain_start = tok.start
+            after_dot = False
+            continue
+
+        if ch == '.':
+            after_dot = True
+            continue
+
+        if ch == '(':
+            if chain and not after_dot:
+                name = '.'.join(chain)
+                if name in names:
+                    stack.append(_Frame(name, chain_start, tok.start, depth + 1))
+            depth += 1
+        elif ch in ('[', '{'):
+            depth += 1
+        elif ch in (')', ']', '}'):
+            depth -= 1
+
+        chain = []
+        after_dot = False
+
+
+def arguments(call):
+    """调用的位置参数，按顺序返回 Argument(kind, start, end)"""
+    return [Argument(kind, start, end) for (start, end), kind in zip(call.args, call.kinds)]
+
+
+def literal_value(text, arg):
+    """字符串 / 模板字面量参数去掉引号后的内容，其他类型返回 None"""
+    if arg.kind not in ('string', 'template') or arg.end - arg.start < 2:
+        return None
+    return text[arg.start + 1:arg.end - 1]
+
+
+def match_bracket(text, i):
+    """i 处为 ( [ { 时返回与之匹配的右括号之后的位置"""
+    depth = 0
+    for tok in _scan(text, i):
+        if tok.kind != 'punct':
+            continue
+        c = text[tok.start]
+        if c in '([{':
+            depth += 1
+        elif c in ')]}':
+            depth -= 1
+            if depth == 0:
+                return tok.end
+    return len(text)
+
+
+# 预演模式（dry_run.DryRun）挂在这里：apply_edits 每采用一处修改调用 edit_hook.edit，拼接完调用 edit_hook.applied
+edit_hook = None
+
+
+def apply_edits(text, edits):
+    """
+    一次性拼接所有 (start, end, replacement) 修改
+    区间重叠时保留起点靠前的一个（嵌套调用只改外层）
+    """
+    hook = edit_hook
+    parts = []
+    pos = 0
+    for start, end, replacement in sorted(edits, key=lambda e: (e[0], -e[1])):
+        if start < pos:
+            continue
+        if hook is not None:
+            hook.edit(text, start, end, replacement)
+        parts.append(text[pos:start])
+        parts.append(replacement)
+        pos = end
+    parts.append(text[pos:])
+    result = ''.join(parts)
+    if hook is not None:
+        hook.applied(text, result)
+    return result
+
+
+def template_body(text, span):
+    """span 为非空模板字符串字面量时返回其内容（不含反引号），否则返回 None"""
+    start, end = span
+    if end - start < 3 or text[start] != '`' or text[end - 1] != '`':
+        return None
+    return text[start + 1:end - 1]
+
+
+def literal_edits(text, rewrite, tokens=None):
+    """对每个字符串 / 模板字面量调用 rewrite(literal)，返回有变化的 (start, end, 新字面量)"""
+    edits = []
+    for tok in tokenize(text) if tokens is None else tokens:
+        if tok.kind in ('string', 'template'):
+            literal = text[tok.start:tok.end]
+            new_literal = rewrite(literal)
+            if new_literal != literal:
+                edits.append((tok.start, tok.end, new_literal))
+    return edits
+
+
+def rewrite_literals(text, rewrite, tokens=None):
+    """对每个字符串 / 模板字面量调用 rewrite(literal)，注释和代码保持不变"""
+    edits = literal_edits(text, rewrite, tokens)
+    return apply_edits(text, edits), len(edits)
+
+
+def line_start(text, offset):
+    """offset 所在行的行首位置"""
+    return text.rfind('\n', 0, offset) + 1
+
+
+def indent_at(text, offset):
+    """offset 所在行的缩进"""
+    return _INDENT.match(text, line_start(text, offset)).group(0)
+
+
+def starts_line(text, offset):
+    """offset 之前同一行是否只有空白"""
+    return not text[line_start(text, offset):offset].strip()
+
+
+def line_number(text, offset):
+    """offset 所在行号（从 1 开始）"""
+    return text.count('\n', 0, offset) + 1
+
+
+# ---------------------------------------------------------------- 字面量求值
+
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+_NUMBER = re.compile(r'(?:0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)')
+_CONSTANTS = {'true': True, 'false': False, 'null': None, 'undefined': None}
+
+
+def string_value(literal):
+    """字符串字面量源码（含引号）-> 字符串值，处理常见转义"""
+    body = literal[1:-1]
+    if '\\' not in body:
+        return body
+    out = []
+    i = 0
+    while i < len(body):
+        c = body[i]
+        if c != '\\' or i + 1 >= len(body):
+            out.append(c)
+            i += 1
+            continue
+        nxt = body[i + 1]
+        if nxt == 'u' and body[i + 2:i + 3] == '{':
+            end = body.index('}', i)
+            out.append(chr(int(body[i + 3:end], 16)))
+            i = end + 1
+        elif nxt == 'u':
+            out.append(chr(int(body[i + 2:i + 6], 16)))
+            i += 6
+        elif nxt == 'x':
+            out.append(chr(int(body[i + 2:i + 4], 16)))
+            i += 4
+        elif nxt == '\n':
+            i += 2  # 续行
+        else:
+            out.append(_ESCAPES.get(nxt, nxt))
+            i += 2
+    return ''.join(out)
+
+
+def parse_literal(text, start=0):
+    """
+    求值 start 处的 JS 字面量：对象、数组、字符串、不含 ${} 的模板、数字、true/false/null
+    返回 (值, 结束位置)；遇到其他表达式时抛出 ValueError
+    """
+    tokens = [t for t in _scan(text, start) if t.kind != 'comment']
+    pos = 0
+
+    def punct(i):
+        return text[tokens[i].start] if i < len(tokens) and tokens[i].kind == 'punct' else None
+
+    def value(i):
+        if i >= len(tokens):
+            raise ValueError('字面量不完整')
+        tok = tokens[i]
+        c = punct(i)
+        if c == '{':
+            result = {}
+            i += 1
+            while punct(i) != '}':
+                key_tok = tokens[i]
+                if key_tok.kind == 'string':
+                    key = string_value(text[key_tok.start:key_tok.end])
+                elif key_tok.kind in ('ident', 'number'):
+                    key = text[key_tok.start:key_tok.end]
+                else:
+                    raise ValueError(f'无法解析的键: 第 {line_number(text, key_tok.start)} 行')
+                if punct(i + 1) != ':':
+                    raise ValueError(f'缺少冒号: 第 {line_number(text, key_tok.start)} 行')
+                result[key], i = value(i + 2)
+                if punct(i) == ',':
+                    i += 1
+            return result, i + 1
+        if c == '[':
+            result = []
+            i += 1
+            while punct(i) != ']':
+                item, i = value(i)
+                result.append(item)
+                if punct(i) == ',':
+                    i += 1
+            return result, i + 1
+        if c == '-' and i + 1 < len(tokens) and tokens[i + 1].kind == 'number':
+            number, i = value(i + 1)
+            return -number, i
+        if tok.kind == 'string':
+            return string_value(text[tok.start:tok.end]), i + 1
+        if tok.kind == 'template' and '${' not in text[tok.start:tok.end]:
+            return text[tok.start + 1:tok.end - 1], i + 1
+        if tok.kind == 'number' or (c == '.' and i + 1 < len(tokens) and tokens[i + 1].kind == 'number'):
+            match = _NUMBER.match(text, tok.start)
+            literal = match.group(0)
+            while i < len(tokens) and tokens[i].start < match.end():
+                i += 1
+            if literal[:2] in ('0x', '0X'):
+                return int(literal, 16), i
+            number = float(literal)
+            return int(number) if number.is_integer() and not any(ch in literal for ch in '.eE') else number, i
+        if tok.kind == 'ident' and text[tok.start:tok.end] in _CONSTANTS:
+            return _CONSTANTS[text[tok.start:tok.end]], i + 1
+        raise ValueError(f'不是字面量: 第 {line_number(text, tok.start)} 行 {text[tok.start:tok.end]!r}')
+
+    result, pos = value(pos)
+    end = tokens[pos - 1].end if pos else start
+    return result, end
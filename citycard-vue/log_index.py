@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+日志调用点索引
+用转换脚本同一套词法扫描，把 src/ 下所有 .js / .vue 中的
+addLog / addPrivateLog / addSkillUsageLog / addSkillEffectLog / addBattleLog 调用
+记录到 SQLite：文件、区间、行号、所在技能函数、公开/私密消息文本
+
+增量更新：按文件大小和 mtime（再按内容哈希）判断，只重新扫描改动过的文件；
+扫描代码或技能注册表变化时整体重建。查询前默认先做一次增量更新
+
+用法:
+  python3 log_index.py [update] [--rebuild]      # 更新索引
+  python3 log_index.py raw                       # 仍直接调用 gameStore.addLog 的技能
+  python3 log_index.py placeholders              # addSkillUsageLog 中的 '未知技能' / TODO 占位
+  python3 log_index.py second-person             # 私密消息中仍写"你"的调用
+  python3 log_index.py skill 技能名              # 某个技能的全部日志调用
+  python3 log_index.py sql "SELECT ..."          # 任意 SQL（表 calls / files）
+  python3 log_index.py stats
+"""
+
+import argparse
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import time
+
+import function_index
+import incremental
+import js_lexer
+import skill_registry
+
+DB_FILE = os.path.join('.codemod', 'cache', 'log_index.sqlite')
+SOURCE_DIR = 'src'
+SUFFIXES = ('.js', '.vue')
+EXCLUDED_DIRS = {'node_modules', 'dist', '__pycache__'}
+
+# 函数名 -> (玩家参数, 技能参数, 公开消息参数, 私密消息参数) 的位置，None 表示没有
+LOG_FUNCTIONS = {
+    'addLog': (None, None, 0, None),
+    'addPrivateLog': (0, None, None, 1),
+    'addSkillUsageLog': (1, 2, 3, 4),
+    'addSkillEffectLog': (None, None, 1, None),
+    'addBattleLog': (None, None, 1, None),
+}
+
+# 候选调用名（含 gameStore. / this. 等前缀），交给 iter_calls 精确匹配
+_CANDIDATE = re.compile(r'((?:[$\w]+\s*\.\s*)*(?:' + '|'.join(LOG_FUNCTIONS) + r'))\s*\(')
+_DEFINITION_BEFORE = re.compile(r'\bfunction\s*$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT, calls INTEGER
+);
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    func TEXT NOT NULL,           -- addLog / addPrivateLog / ...
+    callee TEXT NOT NULL,         -- 完整调用名，如 gameStore.addLog
+    start INTEGER, end INTEGER,   -- 字符偏移
+    line INTEGER, end_line INTEGER,
+    function TEXT,                -- 所在的 executeXxx 函数
+    skill TEXT,                   -- 所在技能（按函数名查注册表，否则取 addSkillUsageLog 的技能参数）
+    player TEXT,
+    skill_arg TEXT,
+    public_kind TEXT, public_message TEXT,
+    private_kind TEXT, private_message TEXT,
+    source TEXT                   -- 调用原文
+);
+CREATE INDEX IF NOT EXISTS calls_path ON calls(path);
+CREATE INDEX IF NOT EXISTS calls_func ON calls(func);
+CREATE INDEX IF NOT EXISTS calls_skill ON calls(skill);
+"""
+
+# 预置查询：(说明, SQL)
+QUERIES = {
+    'raw': ("仍直接调用 gameStore.addLog 的技能",
+            "SELECT skill, path, line, public_message FROM calls "
+            "WHERE callee = 'gameStore.addLog' AND skill IS NOT NULL ORDER BY skill, path, line"),
+    'placeholders': ("addSkillUsageLog 中的 '未知技能' / TODO 占位",
+                     "SELECT skill, path, line, skill_arg FROM calls WHERE func = 'addSkillUsageLog' "
+                     "AND (skill_arg = '未知技能' OR source LIKE '%TODO: 手动填写技能名%') ORDER BY path, line"),
+    'second-person': ("私密消息中仍写\"你\"的调用",
+                      "SELECT skill, path, line, private_message FROM calls "
+                      "WHERE private_message LIKE '%你%' ORDER BY path, line"),
+    'skill': ("技能的全部日志调用",
+              "SELECT func, path, line, coalesce(public_message, ''), coalesce(private_message, '') "
+              "FROM calls WHERE skill = ? ORDER BY path, line"),
+}
+
+
+def index_version(registry):
+    """扫描代码和注册表函数映射的哈希，变化时整体重建"""
+    return incremental.rules_version('log_index', registry.functions)
+
+
+def walk_sources(root='.'):
+    """{相对路径: (大小, mtime_ns)}"""
+    files = {}
+    base = os.path.join(root, SOURCE_DIR)
+    for directory, dirnames, filenames in os.walk(base):
+        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRS)
+        for name in filenames:
+            if not name.endswith(SUFFIXES):
+                continue
+            path = os.path.join(directory, name)
+            stat = os.stat(path)
+            files[os.path.relpath(path, root).replace(os.sep, '/')] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def _argument(text, args, position):
+    """(类型, 文本)；字面量取去掉引号后的内容，其他参数取原文"""
+    if position is None or position >= len(args):
+        return None, None
+    arg = args[position]
+    value = js_lexer.literal_value(text, arg)
+    return arg.kind, text[arg.start:arg.end] if value is None else value
+
+
+def _skill_of(registry, func_name):
+    """executeXxx 或 skillCore 中的 executeXxxCore -> 技能名"""
+    skill = registry.skill_for_function(func_name)
+    if skill is None and func_name.endswith('Core'):
+        skill = registry.skill_for_function(func_name[:-len('Core')])
+    return skill
+
+
+def extract_calls(text, registry):
+    """产出一个文件中所有日志调用的行（不含 path 列）"""
+    names = set(m.group(1) for m in _CANDIDATE.finditer(text))
+    if not names:
+        return
+    names = {re.sub(r'\s+', '', name) for name in names}
+    source = js_lexer.ParsedSource(text)
+    index = function_index.index_for(source)
+    for call in source.calls(names):
+        # 跳过函数定义 function addLog(...) {} 和方法定义 addLog(...) {}
+        if _DEFINITION_BEFORE.search(text, max(0, call.start - 32), call.start):
+            continue
+        if text[call.end:call.end + 64].lstrip().startswith('{'):
+            continue
+
+        func = call.name.rsplit('.', 1)[-1]
+        player_pos, skill_pos, public_pos, private_pos = LOG_FUNCTIONS[func]
+        args = js_lexer.arguments(call)
+        _, player = _argument(text, args, player_pos)
+        _, skill_arg = _argument(text, args, skill_pos)
+        public_kind, public_message = _argument(text, args, public_pos)
+        private_kind, private_message = _argument(text, args, private_pos)
+
+        span = index.find(call.start)
+        skill = _skill_of(registry, span.name) if span else None
+        if skill is None and skill_pos is not None and skill_arg in registry.names:
+            skill = skill_arg
+
+        yield (func, call.name, call.start, call.end,
+               js_lexer.line_number(text, call.start), js_lexer.line_number(text, call.end),
+               span.name if span else None, skill, player, skill_arg,
+               public_kind, public_message, private_kind, private_message,
+               text[call.start:call.end])
+
+
+class LogIndex:
+    """SQLite 日志调用点索引"""
+
+    def __init__(self, root='.', db_path=None):
+        self.root = root
+        self.db_path = db_path or os.path.join(root, DB_FILE)
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.db = sqlite3.connect(self.db_path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def _meta(self, key):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def update(self, rebuild=False):
+        """增量更新，返回 {'files': 文件数, 'scanned': 重新扫描数, 'removed': 删除数, 'calls': 调用总数}"""
+        registry = skill_registry.load_registry(self.root)
+        version = index_version(registry)
+        db = self.db
+        with db:
+            if rebuild or self._meta('version') != version:
+                db.execute("DELETE FROM calls")
+                db.execute("DELETE FROM files")
+                db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+
+            known = {row[0]: row[1:] for row in db.execute("SELECT path, size, mtime_ns, hash FROM files")}
+            current = walk_sources(self.root)
+            removed = [path for path in known if path not in current]
+            for path in removed:
+                db.execute("DELETE FROM calls WHERE path = ?", (path,))
+                db.execute("DELETE FROM files WHERE path = ?", (path,))
+
+            scanned = 0
+            for path, (size, mtime) in sorted(current.items()):
+                old = known.get(path)
+                if old and old[0] == size and old[1] == mtime:
+                    continue
+                with open(os.path.join(self.root, path), 'rb') as f:
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()
+                if old and old[2] == digest:
+                    # 只有 mtime 变了（如 git checkout）
+                    db.execute("UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?", (size, mtime, path))
+                    continue
+                rows = list(extract_calls(data.decode('utf-8'), registry))
+                db.execute("DELETE FROM calls WHERE path = ?", (path,))
+                db.executemany("INSERT INTO calls (path, func, callee, start, end, line, end_line, function, skill, "
+                               "player, skill_arg, public_kind, public_message, private_kind, private_message, "
+                               "source) VALUES (?, " + ', '.join('?' * 15) + ")",
+                               [(path,) + row for row in rows])
+                db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                           (path, size, mtime, digest, len(rows)))
+                scanned += 1
+
+        total = db.execute("SELECT count(*) FROM calls").fetchone()[0]
+        return {'files': len(current), 'scanned': scanned, 'removed': len(removed), 'calls': total}
+
+    def query(self, sql, params=()):
+        """返回 (列名, 行)"""
+        cursor = self.db.execute(sql, params)
+        columns = [d[0] for d in cursor.description] if cursor.description else []
+        return columns, cursor.fetchall()
+
+
+def print_rows(columns, rows, limit=None):
+    if not rows:
+        print("（无结果）")
+        return
+    print(' | '.join(columns))
+    for row in rows[:limit]:
+        print(' | '.join('' if v is None else str(v).replace('\n', '\\n') for v in row))
+    if limit and len(rows) > limit:
+        print(f"... 另外 {len(rows) - limit} 行")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='日志调用点 SQLite 索引')
+    parser.add_argument('command', nargs='?', default='update',
+                        choices=['update', 'stats', 'sql'] + [q for q in QUERIES if q != 'skill'] + ['skill'])
+    parser.add_argument('argument', nargs='?', help='skill 的技能名 / sql 的语句')
+    parser.add_argument('--rebuild', action='store_true', help='忽略已有索引重新扫描')
+    parser.add_argument('--no-update', action='store_true', help='查询前不做增量更新')
+    parser.add_argument('--db', help=f'数据库路径（默认 {DB_FILE}）')
+    parser.add_argument('--limit', type=int, help='最多显示的行数')
+    args = parser.parse_args()
+
+    if args.command in ('skill', 'sql') and not args.argument:
+        parser.error(f"{args.command} 需要参数")
+
+    index = LogIndex(db_path=args.db)
+    try:
+        if not args.no_update or args.command == 'update':
+            start = time.perf_counter()
+            result = index.update(rebuild=args.rebuild)
+            elapsed = time.perf_counter() - start
+            print(f"索引: {result['files']} 个文件，重新扫描 {result['scanned']} 个，删除 {result['removed']} 个，"
+                  f"共 {result['calls']} 处日志调用（{elapsed * 1000:.1f} ms）", file=sys.stderr)
+        if args.command == 'update':
+            return
+
+        start = time.perf_counter()
+        if args.command == 'stats':
+            columns, rows = index.query("SELECT func, count(*), count(DISTINCT path), count(skill) "
+                                        "FROM calls GROUP BY func ORDER BY count(*) DESC")
+            columns = ['func', 'calls', 'files', 'in_skill']
+        elif args.command == 'sql':
+            columns, rows = index.query(args.argument)
+        else:
+            title, sql = QUERIES[args.command]
+            print(f"{title}:")
+            columns, rows = index.query(sql, (args.argument,) if args.command == 'skill' else ())
+        elapsed = time.perf_counter() - start
+        print_rows(columns, rows, args.limit)
+        print(f"\n{len(rows)} 行（查询 {elapsed * 1000:.1f} ms）", file=sys.stderr)
+    except sqlite3.Error as e:
+        print(f"SQL 错误: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+根目录与 citycard-vue/ 镜像目录同步
+仓库根目录和 citycard-vue/ 下各有一份脚本和 src/，本工具：
+- 并行哈希两棵树（按 mtime/大小缓存哈希），一次列出内容不同、只在一侧存在的文件
+- 把指定文件从一侧同步到另一侧：优先写时复制（reflink），其次按 --mode 硬链接或普通复制，原子替换
+- run：在根目录运行一次转换命令，再把它改动的文件同步到镜像，不必每个脚本跑两遍
+
+用法:
+  python3 mirror_sync.py status [--all]                 # 列出差异（--all 同时列出只在一侧的文件）
+  python3 mirror_sync.py sync [路径 ...] [--from mirror] [--mode auto|hardlink|copy]
+  python3 mirror_sync.py run -- python3 log_pipeline.py  # 运行命令并同步其改动
+"""
+
+import argparse
+import errno
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+MIRROR_DIR = 'citycard-vue'
+CACHE_FILE = os.path.join('.codemod', 'cache', 'mirror_index.json')
+EXCLUDED_DIRS = {'.git', 'node_modules', 'dist', 'dist-ssr', '__pycache__', '.codemod', MIRROR_DIR}
+EXCLUDED_SUFFIXES = ('.pyc', '.pyo')
+
+# linux/fs.h: FICLONE = _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+def walk(root):
+    """{相对路径: (大小, mtime_ns)}，路径统一用 / 分隔"""
+    files = {}
+    root = os.path.abspath(root)
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in EXCLUDED_DIRS]
+        for name in filenames:
+            if name.endswith(EXCLUDED_SUFFIXES):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[os.path.relpath(path, root).replace(os.sep, '/')] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TreeIndex:
+    """两棵树的哈希索引；大小和 mtime 未变的文件沿用缓存中的哈希"""
+
+    def __init__(self, root='.', jobs=None):
+        self.root = root
+        self.mirror = os.path.join(root, MIRROR_DIR)
+        self.jobs = jobs or min(32, (os.cpu_count() or 1) * 4)
+        self.cache_path = os.path.join(root, CACHE_FILE)
+        self.hashed = 0
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def build(self):
+        """返回 (根目录 {路径: 哈希}, 镜像 {路径: 哈希})"""
+        trees = {'root': (self.root, walk(self.root)), 'mirror': (self.mirror, walk(self.mirror))}
+        cache = self._load_cache()
+        new_cache = {}
+        todo = []
+        for side, (base, files) in trees.items():
+            old = cache.get(side, {})
+            new_cache[side] = {}
+            for rel, (size, mtime) in files.items():
+                entry = old.get(rel)
+                if entry and entry[0] == size and entry[1] == mtime:
+                    new_cache[side][rel] = entry
+                else:
+                    todo.append((side, rel, size, mtime, os.path.join(base, rel)))
+
+        # hashlib 处理大块数据时释放 GIL，线程池即可并行
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            for (side, rel, size, mtime, _), digest in zip(todo, pool.map(lambda t: file_hash(t[4]), todo)):
+                new_cache[side][rel] = [size, mtime, digest]
+        self.hashed = len(todo)
+
+        if todo or new_cache != cache:
+            self._save_cache(new_cache)
+        return ({rel: e[2] for rel, e in new_cache['root'].items()},
+                {rel: e[2] for rel, e in new_cache['mirror'].items()})
+
+    def invalidate(self, side, paths):
+        """同步后清掉目标一侧的缓存条目（copy2 保留 mtime，可能与旧文件相同而误用旧哈希）"""
+        cache = self._load_cache()
+        entries = cache.get(side, {})
+        for rel in paths:
+            entries.pop(rel, None)
+        self._save_cache(cache)
+
+
+def compare(root_hashes, mirror_hashes):
+    """返回 (相同, 不同, 只在根目录, 只在镜像) 四个排好序的路径列表"""
+    same, differ = [], []
+    for rel, digest in root_hashes.items():
+        if rel in mirror_hashes:
+            (same if mirror_hashes[rel] == digest else differ).append(rel)
+    root_only = [rel for rel in root_hashes if rel not in mirror_hashes]
+    mirror_only = [rel for rel in mirror_hashes if rel not in root_hashes]
+    return sorted(same), sorted(differ), sorted(root_only), sorted(mirror_only)
+
+
+def _reflink(src, dst):
+    """写时复制；文件系统不支持时抛出 OSError"""
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    shutil.copystat(src, dst)
+
+
+def place(src, dst, mode='auto'):
+    """
+    把 src 原子地放到 dst，返回实际使用的方式
+    auto: reflink，不支持则普通复制；hardlink: 硬链接（跨设备时退回复制）；copy: 普通复制
+    """
+    directory = os.path.dirname(dst) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.sync-')
+    os.close(fd)
+    try:
+        method = 'copy'
+        if mode == 'hardlink':
+            os.unlink(tmp_path)
+            try:
+                os.link(src, tmp_path)
+                method = 'hardlink'
+            except OSError as e:
+                if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                    raise
+        elif mode == 'auto' and fcntl is not None and sys.platform.startswith('linux'):
+            try:
+                _reflink(src, tmp_path)
+                method = 'reflink'
+            except OSError:
+                pass
+        if method == 'copy':
+            shutil.copy2(src, tmp_path)
+        os.replace(tmp_path, dst)
+        return method
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def sync_paths(paths, root='.', source='root', mode='auto'):
+    """把 paths（相对路径）从 source 一侧同步到另一侧，返回 [(路径, 方式)]"""
+    mirror = os.path.join(root, MIRROR_DIR)
+    src_base, dst_base = (root, mirror) if source == 'root' else (mirror, root)
+    done = []
+    for rel in paths:
+        src = os.path.join(src_base, rel)
+        if not os.path.isfile(src):
+            print(f"  ✗ {rel}: {source} 一侧不存在", file=sys.stderr)
+            continue
+        done.append((rel, place(src, os.path.join(dst_base, rel), mode)))
+    return done
+
+
+def sync_outputs(paths, removed=(), root='.'):
+    """
+    生成脚本写完文件后调用：镜像目录存在时把 paths 中镜像缺失或内容不同的文件同步过去，
+    并删除镜像中的 removed（如已淘汰的生成文件）；返回同步和删除的相对路径
+    """
+    mirror = os.path.join(root, MIRROR_DIR)
+    if not os.path.isdir(mirror):
+        return []
+    changed = []
+    for rel in paths:
+        src = os.path.join(root, rel)
+        dst = os.path.join(mirror, rel)
+        with open(src, 'rb') as f:
+            data = f.read()
+        if os.path.isfile(dst):
+            with open(dst, 'rb') as f:
+                if f.read() == data:
+                    continue
+        place(src, dst)
+        changed.append(rel)
+    for rel in removed:
+        try:
+            os.remove(os.path.join(mirror, rel))
+            changed.append(rel)
+        except FileNotFoundError:
+            pass
+    return changed
+
+
+def _print_list(title, paths, limit=None):
+    if not paths:
+        return
+    print(f"\n{title}（{len(paths)} 个）:")
+    for rel in paths[:limit]:
+        print(f"  {rel}")
+    if limit and len(paths) > limit:
+        print(f"  ... 另外 {len(paths) - limit} 个（--all 查看全部）")
+
+
+def cmd_status(args):
+    start = time.perf_counter()
+    index = TreeIndex(jobs=args.jobs)
+    root_hashes, mirror_hashes = index.build()
+    same, differ, root_only, mirror_only = compare(root_hashes, mirror_hashes)
+    elapsed = time.perf_counter() - start
+
+    limit = None if args.all else 20
+    _print_list("内容不同", differ)
+    _print_list(f"只在根目录（不含 {MIRROR_DIR}/）", root_only, limit)
+    _print_list(f"只在 {MIRROR_DIR}/", mirror_only, limit)
+    print(f"\n相同 {len(same)}，不同 {len(differ)}，只在根目录 {len(root_only)}，只在镜像 {len(mirror_only)}"
+          f"  （重新哈希 {index.hashed} 个文件，{elapsed * 1000:.0f} ms）")
+    return 1 if differ else 0
+
+
+def cmd_sync(args):
+    index = TreeIndex(jobs=args.jobs)
+    root_hashes, mirror_hashes = index.build()
+    _, differ, root_only, mirror_only = compare(root_hashes, mirror_hashes)
+    if args.paths:
+        paths = [p.replace(os.sep, '/') for p in args.paths]
+    else:
+        # 默认只同步两侧都有但内容不同的文件
+        paths = differ
+    if not paths:
+        print("两侧已一致")
+        return 0
+    done = sync_paths(paths, source=args.source, mode=args.mode)
+    index.invalidate('mirror' if args.source == 'root' else 'root', [rel for rel, _ in done])
+    for rel, method in done:
+        print(f"  ✓ {rel}（{method}）")
+    other = root_only if args.source == 'root' else mirror_only
+    if other and not args.paths:
+        print(f"\n另有 {len(other)} 个文件只在 {args.source} 一侧，未同步（需要时显式列出路径）")
+    return 0
+
+
+def cmd_run(args):
+    command = args.command[1:] if args.command[:1] == ['--'] else args.command
+    if not command:
+        print("run 需要要执行的命令，例如: mirror_sync.py run -- python3 log_pipeline.py")
+        return 1
+    index = TreeIndex(jobs=args.jobs)
+    before, _ = index.build()
+    code = subprocess.call(command)
+    after, mirror_hashes = index.build()
+    changed = sorted(rel for rel, digest in after.items() if before.get(rel) != digest)
+    # 只同步镜像中本来就有的文件；新文件可能是临时产物
+    targets = [rel for rel in changed if rel in mirror_hashes]
+    skipped = [rel for rel in changed if rel not in mirror_hashes]
+    done = sync_paths(targets, mode=args.mode)
+    index.invalidate('mirror', [rel for rel, _ in done])
+    for rel, method in done:
+        print(f"  ✓ 同步 {rel}（{method}）")
+    _print_list(f"命令新建或改动、但 {MIRROR_DIR}/ 中没有的文件（未同步）", skipped)
+    if code:
+        print(f"\n⚠️  命令退出码 {code}")
+    return code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f'根目录与 {MIRROR_DIR}/ 镜像同步')
+    parser.add_argument('-j', '--jobs', type=int, help='哈希线程数')
+    sub = parser.add_subparsers(dest='cmd')
+
+    status = sub.add_parser('status', help='列出两侧差异')
+    status.add_argument('--all', action='store_true', help='列出全部只在一侧的文件')
+
+    sync = sub.add_parser('sync', help='把文件同步到另一侧（默认根目录 -> 镜像，只同步内容不同的文件）')
+    sync.add_argument('paths', nargs='*', help='要同步的相对路径')
+    sync.add_argument('--from', dest='source', choices=['root', 'mirror'], default='root')
+    sync.add_argument('--mode', choices=['auto', 'hardlink', 'copy'], default='auto')
+
+    run = sub.add_parser('run', help='运行命令，再把它改动的文件同步到镜像')
+    run.add_argument('--mode', choices=['auto', 'hardlink', 'copy'], default='auto')
+    run.add_argument('command', nargs=argparse.REMAINDER)
+
+    args = parser.parse_args()
+    if args.cmd is None:
+        args.cmd, args.all = 'status', False
+    handler = {'status': cmd_status, 'sync': cmd_sync, 'run': cmd_run}[args.cmd]
+    sys.exit(handler(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+改写规则的性能统计
+各转换脚本的正则规则通过 rule_profile.sub() 执行，基于 token 的整体改写函数用 @rule_profile.profiled 包装，
+开启统计后按规则累计：调用次数、耗时、匹配数、扫描字节数、改动字节数
+（整体改写函数的耗时包含其内部正则规则的耗时）
+
+未开启时 sub() 直接调用 re.sub，几乎没有额外开销
+
+开启方式（各转换脚本和 log_pipeline.py 通用）:
+  --profile report.json          # 机器可读的 JSON 报告
+  --metrics report.prom          # OpenMetrics 文本格式，可交给 Prometheus / node_exporter textfile
+两个参数都会在结束时把按耗时排序的汇总表打印到 stderr
+"""
+
+import contextlib
+import functools
+import json
+import os
+import re
+import sys
+import time
+
+import dry_run
+
+METRIC_PREFIX = 'codemod_rule'
+
+
+class RuleStats:
+    """单条规则的累计数据"""
+
+    __slots__ = ('name', 'pattern', 'calls', 'matches', 'seconds', 'bytes_scanned', 'bytes_changed')
+
+    def __init__(self, name, pattern=None):
+        self.name = name
+        self.pattern = pattern
+        self.calls = 0
+        self.matches = 0
+        self.seconds = 0.0
+        self.bytes_scanned = 0
+        self.bytes_changed = 0
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class Profiler:
+    """按规则名累计统计，rules 保持首次出现的顺序"""
+
+    def __init__(self):
+        self.enabled = False
+        self.rules = {}
+
+    def stats(self, name, pattern=None):
+        entry = self.rules.get(name)
+        if entry is None:
+            entry = self.rules[name] = RuleStats(name, pattern)
+        return entry
+
+    def reset(self):
+        self.rules = {}
+
+    def report(self, script=None):
+        rules = sorted(self.rules.values(), key=lambda r: r.seconds, reverse=True)
+        return {
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'script': script,
+            'rules': [r.as_dict() for r in rules],
+        }
+
+
+PROFILER = Profiler()
+
+
+def _size(text):
+    return len(text.encode('utf-8'))
+
+
+def sub(rule, pattern, repl, text):
+    """re.sub 的统计版本；rule 为规则名，未开启统计时直接调用 re.sub"""
+    if not PROFILER.enabled:
+        return re.sub(pattern, repl, text)
+
+    stats = PROFILER.stats(rule, pattern if isinstance(pattern, str) else pattern.pattern)
+    compiled = re.compile(pattern)
+    changed = 0
+
+    def replace(match):
+        nonlocal changed
+        old = match.group(0)
+        new = match.expand(repl) if isinstance(repl, str) else repl(match)
+        if new != old:
+            changed += _size(old)
+        return new
+
+    start = time.perf_counter()
+    result, count = compiled.subn(replace, text)
+    stats.seconds += time.perf_counter() - start
+    stats.calls += 1
+    stats.matches += count
+    stats.bytes_scanned += _size(text)
+    stats.bytes_changed += changed
+    return result
+
+
+def profiled(rule):
+    """
+    包装整体改写函数 func(source, ...) -> (新内容, 修改数或修改列表)，source 为 js_lexer.ParsedSource
+    改动字节数按新旧内容的差异计算，不计入耗时
+    """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(source, *args, **kwargs):
+            if not PROFILER.enabled:
+                return func(source, *args, **kwargs)
+            original = source.text
+            start = time.perf_counter()
+            result = func(source, *args, **kwargs)
+            elapsed = time.perf_counter() - start
+
+            new_text, changed = result
+            stats = PROFILER.stats(rule)
+            stats.seconds += elapsed
+            stats.calls += 1
+            stats.matches += changed if isinstance(changed, int) else len(changed)
+            stats.bytes_scanned += _size(original)
+            if new_text != original:
+                stats.bytes_changed += sum(_size(old) for _, _, old, _ in dry_run.iter_edits(original, new_text))
+            return result
+        return wrapper
+    return decorate
+
+
+# ---------------------------------------------------------------- 输出
+
+def _label(value):
+    """OpenMetrics 标签值转义"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_openmetrics(report):
+    """把报告转为 OpenMetrics 文本"""
+    families = [
+        ('calls', None, '规则被调用的次数', 'calls'),
+        ('seconds', 'seconds', '规则累计耗时', 'seconds'),
+        ('matches', None, '规则匹配/修改的次数', 'matches'),
+        ('scanned_bytes', 'bytes', '规则扫描的字节数', 'bytes_scanned'),
+        ('changed_bytes', 'bytes', '规则改动的原文字节数', 'bytes_changed'),
+    ]
+    script = _label(report.get('script') or '')
+    lines = []
+    for suffix, unit, help_text, key in families:
+        family = f'{METRIC_PREFIX}_{suffix}'
+        lines.append(f'# TYPE {family} counter')
+        if unit:
+            lines.append(f'# UNIT {family} {unit}')
+        lines.append(f'# HELP {family} {help_text}')
+        for rule in report['rules']:
+            labels = f'script="{script}",rule="{_label(rule["name"])}"'
+            if rule['pattern']:
+                labels += f',pattern="{_label(rule["pattern"])}"'
+            lines.append(f'{family}_total{{{labels}}} {rule[key]}')
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+def _write(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def print_summary(report, out=None):
+    out = out or sys.stderr
+    print("\n规则耗时统计（按耗时排序）:", file=out)
+    for rule in report['rules']:
+        print(f"  {rule['seconds'] * 1000:10.2f} ms  {rule['calls']:>7} 次调用  {rule['matches']:>6} 处匹配  "
+              f"{rule['bytes_scanned'] / 1024:10.1f} KB 扫描  {rule['bytes_changed'] / 1024:8.1f} KB 改动  "
+              f"{rule['name']}", file=out)
+
+
+@contextlib.contextmanager
+def session(profile_path=None, metrics_path=None, script=None):
+    """profile_path / metrics_path 任一不为空时开启统计，结束时写出报告"""
+    if not (profile_path or metrics_path):
+        yield PROFILER
+        return
+
+    PROFILER.reset()
+    PROFILER.enabled = True
+    try:
+        yield PROFILER
+    finally:
+        PROFILER.enabled = False
+        report = PROFILER.report(os.path.basename(script) if script else None)
+        print_summary(report)
+        if profile_path:
+            _write(profile_path, json.dumps(report, ensure_ascii=False, indent=1))
+            print(f"规则统计已写入: {profile_path}", file=sys.stderr)
+        if metrics_path:
+            _write(metrics_path, format_openmetrics(report))
+            print(f"OpenMetrics 已写入: {metrics_path}", file=sys.stderr)
+
+
+def _option(args, name):
+    """取 --name value 或 --name=value"""
+    for i, arg in enumerate(args):
+        if arg == name and i + 1 < len(args):
+            return args[i + 1]
+        if arg.startswith(name + '='):
+            return arg.split('=', 1)[1]
+    return None
+
+
+def session_from_argv(script, argv=None):
+    """供不使用 argparse 的脚本调用：从命令行取 --profile / --metrics"""
+    args = sys.argv[1:] if argv is None else argv
+    return session(_option(args, '--profile'), _option(args, '--metrics'), script)
@@ -0,0 +1,98 @@
+/**
+ * 博学多才题库加载器（自动生成，请勿手动修改）
+ * 由 build_question_packs.py 从 cityQuestions.js 生成；题库按城市分包，需要时才加载
+ */
+
+const LABELS = 'ABCDEFGH'
+
+// 城市 -> 题库包文件
+const CITY_PACKS = {"北京市":"q-0de23d3fe6.json","上海市":"q-3a6aa16258.json","广州市":"q-20720b1b80.json","深圳市":"q-7056b0d800.json","香港特别行政区":"q-f1350e7cb8.json","重庆市":"q-2b4165dcbc.json","苏州市":"q-593125db0a.json"}
+
+// 包文件 -> 动态导入（字面量路径，打包时每个包单独成块）
+const PACK_LOADERS = {
+  'q-0de23d3fe6.json': () => import('./q-0de23d3fe6.json'),
+  'q-3a6aa16258.json': () => import('./q-3a6aa16258.json'),
+  'q-20720b1b80.json': () => import('./q-20720b1b80.json'),
+  'q-7056b0d800.json': () => import('./q-7056b0d800.json'),
+  'q-f1350e7cb8.json': () => import('./q-f1350e7cb8.json'),
+  'q-2b4165dcbc.json': () => import('./q-2b4165dcbc.json'),
+  'q-593125db0a.json': () => import('./q-593125db0a.json')
+}
+
+const packCache = new Map()
+const cityCache = new Map()
+
+function decode(row) {
+  const [question, options, answer] = row
+  if (typeof answer === 'number') {
+    return {
+      question,
+      options: options.map((opt, i) => `${LABELS[i]}. ${opt}`),
+      answer: LABELS[answer]
+    }
+  }
+  return { question, options, answer }
+}
+
+function loadPack(file) {
+  if (!packCache.has(file)) {
+    packCache.set(file, PACK_LOADERS[file]().then(module => module.default || module))
+  }
+  return packCache.get(file)
+}
+
+/**
+ * 检查城市是否有专属题库（不加载题库包）
+ */
+export function hasCityQuestions(cityName) {
+  return Object.prototype.hasOwnProperty.call(CITY_PACKS, cityName) && cityName !== 'DEFAULT'
+}
+
+/**
+ * 有专属题库的城市列表
+ */
+export function questionCities() {
+  return Object.keys(CITY_PACKS).filter(city => city !== 'DEFAULT')
+}
+
+/**
+ * 加载城市题库，返回与 CITY_QUESTIONS[城市] 相同结构的 { 难度: [{question, options, answer}] }
+ * 城市没有题库时返回 null
+ */
+export async function loadCityQuestions(cityName) {
+  const file = CITY_PACKS[cityName]
+  if (!file) return null
+  if (!cityCache.has(cityName)) {
+    const pack = await loadPack(file)
+    const levels = {}
+    for (const [level, rows] of Object.entries(pack.c[cityName])) {
+      levels[level] = rows.map(decode)
+    }
+    cityCache.set(cityName, levels)
+  }
+  return cityCache.get(cityName)
+}
+
+/**
+ * 加载全部题库（刷题模式），返回与 CITY_QUESTIONS 相同结构的对象
+ */
+export async function loadAllCityQuestions() {
+  const cities = Object.keys(CITY_PACKS)
+  const all = await Promise.all(cities.map(loadCityQuestions))
+  return Object.fromEntries(cities.map((city, i) => [city, all[i]]))
+}
+
+/**
+ * 获取指定城市和难度的随机题目（城市没有题库时使用 DEFAULT 题库）
+ */
+export async function getCityQuestionAsync(cityName, difficulty) {
+  const cityQuestions = (await loadCityQuestions(cityName)) || (await loadCityQuestions('DEFAULT'))
+  if (!cityQuestions) return null
+  let questions = cityQuestions[difficulty]
+  if (!questions) {
+    const fallback = await loadCityQuestions('DEFAULT')
+    questions = fallback && fallback[difficulty]
+  }
+  if (!questions || questions.length === 0) return null
+  return questions[Math.floor(Math.random() * questions.length)]
+}
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+转换脚本的预演模式（--dry-run）
+不写任何文件、不做备份、不更新 .codemod 缓存，把改动直接流式输出到 stdout：
+- --dry-run / --dry-run diff：unified diff，可直接 git apply / patch -p1
+- --dry-run json：每行一个 JSON 对象 {"file", "pass", "start", "end", "line", "old", "new"}，
+  start/end 为该遍输入中的字符偏移，可交给 jq 等工具继续处理
+用 DryRun.read / track 登记读入的文件后，转换脚本每次 js_lexer.apply_edits 采用一处修改就立即输出这一处，
+不等整个文件转换完，也不再对整个文件做差异比较；同一文件被多遍转换（流水线的各阶段）时，
+每遍的偏移相对该遍的输入（pass 依次为 0, 1, 2...），diff 按遍输出、依次应用即可
+预演时脚本自身的提示信息改走 stderr，stdout 只有差异内容
+"""
+
+import contextlib
+import difflib
+import json
+import re
+import sys
+
+import backup_store
+import js_lexer
+
+MODES = ('diff', 'json')
+# unified diff 的上下文行数
+CONTEXT = 3
+
+_LINE = re.compile(r'[^\n]*\n|[^\n]+$')
+
+# 当前生效的 DryRun（只在预演时设置）
+_active = None
+
+
+def active():
+    """是否处于预演模式；各缓存据此只读不写"""
+    return _active is not None
+
+
+def track(filepath, text):
+    """登记读入的文件内容：预演时对它（及其后续各遍结果）的 apply_edits 逐条输出，返回 text"""
+    if _active is not None:
+        _active.track(filepath, text)
+    return text
+
+
+def mode_from_argv(argv=None):
+    """从命令行参数中取出 --dry-run [diff|json] 或 --dry-run=diff|json，返回模式或 None"""
+    args = sys.argv[1:] if argv is None else argv
+    for i, arg in enumerate(args):
+        if arg == '--dry-run':
+            following = args[i + 1] if i + 1 < len(args) else None
+            return following if following in MODES else 'diff'
+        if arg.startswith('--dry-run='):
+            mode = arg.split('=', 1)[1]
+            if mode not in MODES:
+                raise SystemExit(f"--dry-run 只支持: {', '.join(MODES)}")
+            return mode
+    return None
+
+
+def _line_offsets(lines):
+    """每一行在原文中的起始偏移，末尾多一个总长度"""
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    return offsets
+
+
+def iter_edits(original, new_content):
+    """逐块产出 (start, end, old, new)，偏移相对原文；按行对齐后再收紧到实际改动的字符"""
+    old_lines = original.splitlines(keepends=True)
+    new_lines = new_content.splitlines(keepends=True)
+    old_offsets = _line_offsets(old_lines)
+    new_offsets = _line_offsets(new_lines)
+
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        start, end = old_offsets[i1], old_offsets[i2]
+        old = original[start:end]
+        new = new_content[new_offsets[j1]:new_offsets[j2]]
+
+        # 去掉块内首尾相同的部分
+        prefix = 0
+        limit = min(len(old), len(new))
+        while prefix < limit and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+            suffix += 1
+        yield start + prefix, end - suffix, old[prefix:len(old) - suffix], new[prefix:len(new) - suffix]
+
+
+def stream_diff(filepath, original, new_content, out):
+    """整个文件的 unified diff，逐行写出（不经过 apply_edits 的改动，如生成的文件）"""
+    lines = difflib.unified_diff(original.splitlines(keepends=True), new_content.splitlines(keepends=True),
+                                 fromfile='a/' + filepath, tofile='b/' + filepath)
+    for line in lines:
+        out.write(line)
+        if not line.endswith('\n'):
+            out.write('\n\\ No newline at end of file\n')
+    out.flush()
+
+
+def stream_json(filepath, original, new_content, out, number=0):
+    """整个文件比较后每个改动一行 JSON（不经过 apply_edits 的改动）"""
+    line = 1
+    last = 0
+    for start, end, old, new in iter_edits(original, new_content):
+        line += original.count('\n', last, start)
+        last = start
+        _write_record(out, filepath, number, start, end, line, old, new)
+
+
+def _write_record(out, filepath, number, start, end, line, old, new):
+    record = {'file': filepath, 'pass': number, 'start': start, 'end': end, 'line': line, 'old': old, 'new': new}
+    out.write(json.dumps(record, ensure_ascii=False) + '\n')
+    out.flush()
+
+
+def _write_lines(out, prefix, text):
+    for line in _LINE.findall(text):
+        out.write(prefix + line)
+        if not line.endswith('\n'):
+            out.write('\n\\ No newline at end of file\n')
+
+
+class _Pass:
+    """
+    一个文件的一遍转换：按 apply_edits 给出的顺序（偏移递增）逐条输出修改
+    diff 模式下相邻（上下文重叠）的修改合成一个 hunk，只缓存当前这一个 hunk
+    """
+
+    def __init__(self, filepath, number, text, mode, out):
+        self.filepath = filepath
+        self.number = number
+        self.text = text
+        self.mode = mode
+        self.out = out
+        self.edits = 0
+        # 行号游标：偏移只增不减，数换行符只扫一遍
+        self._line_pos = 0
+        self._line = 1
+        # 已输出 hunk 造成的新旧行号差
+        self._delta = 0
+        # 当前 hunk：[[块起始行偏移, 块结束行偏移, [(start, end, replacement)]], ...]
+        self._hunk = []
+        self._header = False
+
+    def _line_at(self, offset):
+        self._line += self.text.count('\n', self._line_pos, offset)
+        self._line_pos = offset
+        return self._line
+
+    def edit(self, start, end, replacement):
+        self.edits += 1
+        if self.mode == 'json':
+            line = self._line_at(start)
+            _write_record(self.out, self.filepath, self.number, start, end, line, self.text[start:end], replacement)
+            return
+        text = self.text
+        block_start = text.rfind('\n', 0, start) + 1
+        block_end = text.find('\n', max(end - 1, start))
+        block_end = len(text) if block_end < 0 else block_end + 1
+        if self._hunk:
+            last = self._hunk[-1]
+            if block_start < last[1]:
+                last[1] = max(last[1], block_end)
+                last[2].append((start, end, replacement))
+                return
+            if text.count('\n', last[1], block_start) > 2 * CONTEXT:
+                self._flush()
+        self._hunk.append([block_start, block_end, [(start, end, replacement)]])
+
+    def _flush(self):
+        if not self._hunk:
+            return
+        text = self.text
+        if not self._header:
+            self.out.write(f'--- a/{self.filepath}\n+++ b/{self.filepath}\n')
+            self._header = True
+        # 前后各补 CONTEXT 行上下文
+        before = self._hunk[0][0]
+        for _ in range(CONTEXT):
+            if before == 0:
+                break
+            before = text.rfind('\n', 0, before - 1) + 1
+        after = self._hunk[-1][1]
+        for _ in range(CONTEXT):
+            if after >= len(text):
+                break
+            after = text.find('\n', after)
+            after = len(text) if after < 0 else after + 1
+
+        body = []
+        position = before
+        for block_start, block_end, edits in self._hunk:
+            parts = []
+            cursor = block_start
+            for start, end, replacement in edits:
+                parts.append(text[cursor:start])
+                parts.append(replacement)
+                cursor = end
+            parts.append(text[cursor:block_end])
+            body.append((' ', text[position:block_start]))
+            body.append(('-', text[block_start:block_end]))
+            body.append(('+', ''.join(parts)))
+            position = block_end
+        body.append((' ', text[position:after]))
+        old_lines = sum(len(_LINE.findall(chunk)) for prefix, chunk in body if prefix != '+')
+        new_lines = sum(len(_LINE.findall(chunk)) for prefix, chunk in body if prefix != '-')
+
+        old_start = self._line_at(before)
+        new_start = old_start + self._delta
+        self.out.write(f'@@ -{old_start if old_lines else old_start - 1},{old_lines} '
+                       f'+{new_start if new_lines else new_start - 1},{new_lines} @@\n')
+        for prefix, chunk in body:
+            _write_lines(self.out, prefix, chunk)
+        self.out.flush()
+        self._delta += new_lines - old_lines
+        self._hunk = []
+
+    def finish(self):
+        if self.mode == 'diff':
+            self._flush()
+
+
+class DryRun:
+    """
+    包住转换脚本的 main：
+      with DryRun(dry_run.mode_from_argv()) as output:
+          content = output.read(filepath)
+          ...
+          output.write(filepath, content, new_content, __file__)
+    mode 为 None 时照常备份并写文件；预演时 apply_edits 采用的每处修改立即输出
+    """
+
+    def __init__(self, mode=None, out=None):
+        self.mode = mode
+        self.out = out or sys.stdout
+        self._redirect = None
+        self._previous = None
+        # id(文本) -> (文本, _Pass)；持有文本本身，id 不会被复用
+        self._passes = {}
+        # 路径 -> (最新一遍的结果文本, 已完成的遍数)
+        self._latest = {}
+
+    @property
+    def enabled(self):
+        return self.mode is not None
+
+    def __enter__(self):
+        global _active
+        if self.enabled:
+            self._redirect = contextlib.redirect_stdout(sys.stderr)
+            self._redirect.__enter__()
+            self._previous = (_active, js_lexer.edit_hook)
+            _active = self
+            js_lexer.edit_hook = self
+        return self
+
+    def __exit__(self, *exc):
+        global _active
+        if self._previous is not None:
+            _active, js_lexer.edit_hook = self._previous
+            self._previous = None
+        if self._redirect is not None:
+            self._redirect.__exit__(*exc)
+            self._redirect = None
+        return False
+
+    def read(self, filepath):
+        """读取文件并登记（预演时之后的修改逐条输出）"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return self.track(filepath, f.read())
+
+    def track(self, filepath, text):
+        if self.enabled:
+            self._passes[id(text)] = (text, _Pass(filepath, 0, text, self.mode, self.out))
+            self._latest[filepath] = (text, 0)
+        return text
+
+    # ---- js_lexer.apply_edits 的钩子
+
+    def _pass_of(self, text):
+        entry = self._passes.get(id(text))
+        return entry[1] if entry is not None and entry[0] is text else None
+
+    def edit(self, text, start, end, replacement):
+        current = self._pass_of(text)
+        if current is not None:
+            current.edit(start, end, replacement)
+
+    def applied(self, text, result):
+        current = self._pass_of(text)
+        if current is None or result is text:
+            return
+        current.finish()
+        if current.edits:
+            number = current.number + 1
+            self._passes[id(result)] = (result, _Pass(current.filepath, number, result, self.mode, self.out))
+            self._latest[current.filepath] = (result, number)
+        else:
+            # 没有修改：结果与输入内容相同，沿用同一遍
+            self._passes[id(result)] = (result, current)
+
+    # ----
+
+    def _stream_rest(self, filepath, original, new_content):
+        """登记过的文件已逐条输出；只补上没经过 apply_edits 的剩余改动（或未登记文件的全部改动）"""
+        base, number = self._latest.get(filepath, (original, 0))
+        if base == new_content:
+            return
+        if self.mode == 'json':
+            stream_json(filepath, base, new_content, self.out, number)
+        else:
+            stream_diff(filepath, base, new_content, self.out)
+
+    def write(self, filepath, original, new_content, script):
+        """预演时输出尚未输出的差异并返回 None；否则备份原内容、写入新内容并返回备份 run-id"""
+        if self.enabled:
+            self._stream_rest(filepath, original, new_content)
+            return None
+        run_id = backup_store.backup_file(filepath, original, script)
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(new_content)
+        return run_id
+
+    def write_many(self, files, script):
+        """files 为 {路径: (原内容, 新内容)}，只处理有改动的文件；非预演时所有文件记在同一个备份里"""
+        changed = {path: pair for path, pair in files.items() if pair[0] != pair[1]}
+        if self.enabled:
+            for path, (original, new_content) in changed.items():
+                self._stream_rest(path, original, new_content)
+            return None
+        if not changed:
+            return None
+        run_id = backup_store.backup_files({path: pair[0] for path, pair in changed.items()}, script)
+        for path, (_, new_content) in changed.items():
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(new_content)
+        return run_id
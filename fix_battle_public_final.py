@@ -4,54 +4,73 @@
 在公开日志开头添加 ${caster.name}使用了XXX，
 """
 
-import re
+import dry_run
+import js_lexer
+import rule_profile
+from fix_battle_public_log import template_body_of
 
 filepath = 'src/composables/skills/battleSkills.js'
 
-with open(filepath, 'r', encoding='utf-8') as f:
-    content = f.read()
-
-# 备份
-with open(filepath + '.before_final_fix', 'w', encoding='utf-8') as f:
-    f.write(content)
+def is_quoted(content, arg):
+    """单引号字符串或模板字符串字面量"""
+    return arg.kind in ('string', 'template') and content[arg.start] in "'`" and arg.end - arg.start >= 3
 
 # 查找所有 addSkillUsageLog 调用，修改公开日志
-def replace_public_log(match):
-    indent = match.group(1)
-    skill_name = match.group(2)
-    public_msg = match.group(3)
-    private_msg = match.group(4)
+def replace_public_log(content, call):
+    args = js_lexer.arguments(call)
+    if len(args) != 5 or [content[a.start:a.end] for a in args[:2]] != ['gameStore', 'caster.name']:
+        return None
+    skill_arg, public_arg, private_arg = args[2:]
+    if not (content[skill_arg.start] == "'" and all(is_quoted(content, a) for a in args[2:])):
+        return None
+    private_msg = content[private_arg.start:private_arg.end]
+
+    indent = js_lexer.indent_at(content, call.start)
+    # 放进反引号前要转义 ` 和 ${，无法安全转换时跳过
+    skill_name = template_body_of(content, skill_arg)
+    public_msg = template_body_of(content, public_arg)
+    if skill_name is None or public_msg is None:
+        return None
 
     # 如果公开日志已经包含 ${caster.name}，跳过
     if '${caster.name}' in public_msg:
-        return match.group(0)
+        return None
 
     # 在公开日志开头添加 ${caster.name}使用了XXX，
     new_public_msg = f'${{caster.name}}使用了{skill_name}，{public_msg}'
 
     # 重新构建调用
-    result = f'''{indent}addSkillUsageLog(
+    result = f'''addSkillUsageLog(
 {indent}  gameStore,
 {indent}  caster.name,
-{indent}  '{skill_name}',
+{indent}  {content[skill_arg.start:skill_arg.end]},
 {indent}  `{new_public_msg}`,
 {indent}  {private_msg}
 {indent})'''
 
     return result
 
-# 匹配 addSkillUsageLog 调用（单引号公开日志）
-pattern = r"([ ]*)addSkillUsageLog\(\s*gameStore,\s*caster\.name,\s*'([^']+)',\s*'([^']+)',\s*(`[^`]+`|'[^']+')\s*\)"
-
-content = re.sub(pattern, replace_public_log, content, flags=re.MULTILINE)
+@rule_profile.profiled('fix_battle_public_final.fix_source')
+def fix_source(source):
+    """修正 source（js_lexer.ParsedSource）中的公开日志，返回 (新内容, 修改数)"""
+    content = source.text
+    edits = []
+    for call in source.calls(['addSkillUsageLog']):
+        replacement = replace_public_log(content, call)
+        if replacement is not None:
+            edits.append((call.start, call.end, replacement))
+    return js_lexer.apply_edits(content, edits), len(edits)
 
-# 匹配 addSkillUsageLog 调用（反引号公开日志）
-pattern2 = r"([ ]*)addSkillUsageLog\(\s*gameStore,\s*caster\.name,\s*'([^']+)',\s*`([^`]+)`,\s*(`[^`]+`|'[^']+')\s*\)"
+def main():
+    with dry_run.DryRun(dry_run.mode_from_argv()) as output:
+        content = output.read(filepath)
 
-content = re.sub(pattern2, replace_public_log, content, flags=re.MULTILINE)
+        new_content, changed = fix_source(js_lexer.ParsedSource(content))
+        output.write(filepath, content, new_content, __file__)
 
-with open(filepath, 'w', encoding='utf-8') as f:
-    f.write(content)
+        print("✅ 已修正 battleSkills.js 中的公开日志格式")
+        print(f"   在 {changed} 条公开日志开头添加了 ${{caster.name}}使用了XXX")
 
-print("✅ 已修正 battleSkills.js 中的公开日志格式")
-print("   在所有公开日志开头添加了 ${caster.name}使用了XXX")
+if __name__ == '__main__':
+    with rule_profile.session_from_argv(__file__):
+        main()
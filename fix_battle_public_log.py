@@ -6,80 +6,70 @@
 2. 否则，在开头添加 ${caster.name}使用XXX，
 """
 
-import re
+import dry_run
+import js_lexer
+import rule_profile
 
 filepath = 'src/composables/skills/battleSkills.js'
 
-with open(filepath, 'r', encoding='utf-8') as f:
-    lines = f.readlines()
-
-# 备份
-with open(filepath + '.before_fix_public', 'w', encoding='utf-8') as f:
-    f.writelines(lines)
-
-converted = []
-i = 0
-while i < len(lines):
-    line = lines[i]
-
-    # 查找 addSkillUsageLog 调用
-    if 'addSkillUsageLog(' in line:
-        # 读取完整的调用（可能跨多行）
-        call_lines = [line]
-        j = i + 1
-        paren_count = line.count('(') - line.count(')')
-
-        while paren_count > 0 and j < len(lines):
-            call_lines.append(lines[j])
-            paren_count += lines[j].count('(') - lines[j].count(')')
-            j += 1
-
-        # 解析技能名和公开日志
-        full_call = ''.join(call_lines)
-
-        # 提取技能名（第三个参数）
-        skill_match = re.search(r"addSkillUsageLog\(\s*gameStore,\s*caster\.name,\s*'([^']+)'", full_call)
-
-        if skill_match:
-            skill_name = skill_match.group(1)
-
-            # 提取公开日志（第四个参数）
-            # 可能是字符串字面量或模板字符串
-            public_msg_match = re.search(r"'([^']+)'\s*,\s*(?:`|\')([^`']+)", full_call, re.MULTILINE)
-
-            if not public_msg_match:
-                # 尝试匹配反引号格式
-                public_msg_match = re.search(r"'([^']+)'\s*,\s*`([^`]+)`", full_call, re.MULTILINE)
-
-            if not public_msg_match:
-                # 尝试匹配跨行格式
-                parts = full_call.split("'"+skill_name+"'")[1]
-                msgs = re.findall(r"[`']([^`']+)[`']", parts)
-
-                if len(msgs) >= 2:
-                    public_msg = msgs[0]
-
-                    # 修改公开日志
-                    if public_msg.startswith(skill_name):
-                        # 替换技能名为 ${caster.name}使用XXX
-                        new_public_msg = f'${{caster.name}}使用{public_msg}'
-                    else:
-                        # 在开头添加
-                        new_public_msg = f'${{caster.name}}使用了{skill_name}，{public_msg}'
-
-                    # 替换原文本
-                    old_pattern = f"'{public_msg}'"
-                    new_pattern = f"`{new_public_msg}`"
-                    full_call = full_call.replace(old_pattern, new_pattern, 1)
-
-        converted.extend(full_call.splitlines(True))
-        i = j
+def template_body_of(text, arg):
+    """字符串 / 模板字面量参数转为模板字符串的内容；含无法安全转换的转义时返回 None"""
+    value = js_lexer.literal_value(text, arg)
+    if value is None or arg.kind == 'template':
+        return value
+    if '\\' in value.replace("\\'", ''):
+        return None
+    return value.replace("\\'", "'").replace('`', '\\`').replace('${', '\\${')
+
+def unescaped_of(text, arg):
+    """template_body_of 能转换的参数去掉转义后的实际文本，用于比较内容"""
+    value = js_lexer.literal_value(text, arg)
+    if arg.kind == 'template':
+        return value.replace('\\`', '`').replace('\\${', '${')
+    return value.replace("\\'", "'")
+
+def fix_public_log(text, call):
+    """返回公开日志参数的 (start, end, 新字面量)；不需要修改时返回 None"""
+    args = js_lexer.arguments(call)
+    if len(args) < 4 or [text[a.start:a.end] for a in args[:2]] != ['gameStore', 'caster.name']:
+        return None
+    skill_arg, public_arg = args[2], args[3]
+    if skill_arg.kind != 'string':
+        return None
+    skill_name = template_body_of(text, skill_arg)
+    public_msg = template_body_of(text, public_arg)
+    if skill_name is None or public_msg is None or '${caster.name}' in public_msg:
+        return None
+
+    if unescaped_of(text, public_arg).startswith(unescaped_of(text, skill_arg)):
+        # 公开日志以技能名开头：XXX... -> ${caster.name}使用XXX...
+        new_public_msg = f'${{caster.name}}使用{public_msg}'
     else:
-        converted.append(line)
-        i += 1
-
-with open(filepath, 'w', encoding='utf-8') as f:
-    f.writelines(converted)
-
-print("✅ 已修正 battleSkills.js 中的公开日志格式")
-print("   请手动检查结果")
+        # 否则在开头添加 ${caster.name}使用了XXX，
+        new_public_msg = f'${{caster.name}}使用了{skill_name}，{public_msg}'
+    return public_arg.start, public_arg.end, f'`{new_public_msg}`'
+
+@rule_profile.profiled('fix_battle_public_log.fix_source')
+def fix_source(source):
+    """修正 source（js_lexer.ParsedSource）中的公开日志，返回 (新内容, 修改数)"""
+    content = source.text
+    edits = []
+    for call in source.calls(['addSkillUsageLog']):
+        edit = fix_public_log(content, call)
+        if edit is not None:
+            edits.append(edit)
+    return js_lexer.apply_edits(content, edits), len(edits)
+
+def main():
+    with dry_run.DryRun(dry_run.mode_from_argv()) as output:
+        content = output.read(filepath)
+
+        new_content, _ = fix_source(js_lexer.ParsedSource(content))
+        output.write(filepath, content, new_content, __file__)
+
+        print("✅ 已修正 battleSkills.js 中的公开日志格式")
+        print("   请手动检查结果")
+
+if __name__ == '__main__':
+    with rule_profile.session_from_argv(__file__):
+        main()
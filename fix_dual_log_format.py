@@ -5,92 +5,69 @@
 2. 公开日志：必须包含 ${caster.name}
 """
 
-import re
 import sys
 
-def fix_battle_skills():
-    """修正 battleSkills.js"""
-    filepath = 'src/composables/skills/battleSkills.js'
-
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # 备份
-    with open(filepath + '.before_fix', 'w', encoding='utf-8') as f:
-        f.write(content)
+import dry_run
+import js_lexer
+import rule_profile
 
+# battleSkills.js 的私密日志规则
+BATTLE_RULES = [
     # 模式1: 修正所有 '你使用了' -> '${caster.name}使用了'
-    # 但要注意只替换私密日志中的，不要替换注释中的
-    content = re.sub(
-        r"'你使用了([^']+)'",
-        r"'${caster.name}使用了\1'",
-        content
-    )
-
+    (r"'你使用了([^']+)'", r"'${caster.name}使用了\1'"),
     # 模式2: 修正所有 `你使用了 -> `${caster.name}使用了
-    content = re.sub(
-        r"`你使用了([^`]+)`",
-        r"`${caster.name}使用了\1`",
-        content
-    )
+    (r"`你使用了([^`]+)`", r"`${caster.name}使用了\1`"),
+]
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
+# nonBattleSkills.js 额外处理转账日志
+NON_BATTLE_RULES = BATTLE_RULES + [
+    # 模式3: 修正 '你转账 -> '${caster.name}转账
+    (r"'你转账([^']+)'", r"'${caster.name}转账\1'"),
+    # 模式4: 修正 `你转账 -> `${caster.name}转账
+    (r"`你转账([^`]+)`", r"`${caster.name}转账\1`"),
+]
 
-    print(f"✅ 修正 {filepath}")
+@rule_profile.profiled('fix_dual_log_format.apply_rules')
+def apply_rules(source, rules):
+    """只在 source（js_lexer.ParsedSource）的字符串 / 模板字面量内应用替换规则，注释中的文字不受影响"""
+    def fix_literal(literal):
+        for pattern, replacement in rules:
+            literal = rule_profile.sub(f'fix_dual_log_format:{pattern}', pattern, replacement, literal)
+        return literal
 
-def fix_non_battle_skills():
-    """修正 nonBattleSkills.js"""
-    filepath = 'src/composables/skills/nonBattleSkills.js'
+    return js_lexer.rewrite_literals(source.text, fix_literal, source.tokens)
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+def fix_battle_skills(output):
+    """修正 battleSkills.js（output 为 dry_run.DryRun，预演时只输出差异）"""
+    filepath = 'src/composables/skills/battleSkills.js'
 
-    # 备份
-    with open(filepath + '.before_fix', 'w', encoding='utf-8') as f:
-        f.write(content)
+    content = output.read(filepath)
 
-    # 模式1: 修正所有 '你使用了' -> '${caster.name}使用了'
-    content = re.sub(
-        r"'你使用了([^']+)'",
-        r"'${caster.name}使用了\1'",
-        content
-    )
+    new_content, changed = apply_rules(js_lexer.ParsedSource(content), BATTLE_RULES)
+    output.write(filepath, content, new_content, __file__)
 
-    # 模式2: 修正所有 `你使用了 -> `${caster.name}使用了
-    content = re.sub(
-        r"`你使用了([^`]+)`",
-        r"`${caster.name}使用了\1`",
-        content
-    )
+    print(f"✅ 修正 {filepath}（{changed} 处字面量）")
 
-    # 模式3: 修正 '你转账 -> '${caster.name}转账
-    content = re.sub(
-        r"'你转账([^']+)'",
-        r"'${caster.name}转账\1'",
-        content
-    )
+def fix_non_battle_skills(output):
+    """修正 nonBattleSkills.js（output 为 dry_run.DryRun，预演时只输出差异）"""
+    filepath = 'src/composables/skills/nonBattleSkills.js'
 
-    # 模式4: 修正 `你转账 -> `${caster.name}转账
-    content = re.sub(
-        r"`你转账([^`]+)`",
-        r"`${caster.name}转账\1`",
-        content
-    )
+    content = output.read(filepath)
 
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(content)
+    new_content, changed = apply_rules(js_lexer.ParsedSource(content), NON_BATTLE_RULES)
+    output.write(filepath, content, new_content, __file__)
 
-    print(f"✅ 修正 {filepath}")
+    print(f"✅ 修正 {filepath}（{changed} 处字面量）")
 
 if __name__ == '__main__':
-    print("修正双日志格式...")
-    print("\n1. 修正 battleSkills.js")
-    fix_battle_skills()
+    with rule_profile.session_from_argv(__file__), dry_run.DryRun(dry_run.mode_from_argv()) as output:
+        print("修正双日志格式...")
+        print("\n1. 修正 battleSkills.js")
+        fix_battle_skills(output)
 
-    print("\n2. 修正 nonBattleSkills.js")
-    fix_non_battle_skills()
+        print("\n2. 修正 nonBattleSkills.js")
+        fix_non_battle_skills(output)
 
-    print("\n✅ 完成！")
-    print("\n注意：这个脚本只修正了私密日志中的'你'")
-    print("公开日志中移除的 ${caster.name} 需要手动恢复")
+        print("\n✅ 完成！")
+        print("\n注意：这个脚本只修正了私密日志中的'你'")
+        print("公开日志中移除的 ${caster.name} 需要手动恢复")
@@ -5,41 +5,73 @@
 2. 私密日志中 '你' -> '${caster.name}'
 """
 
-import re
+import dry_run
+import js_lexer
+import rule_profile
 
 filepath = 'src/composables/skills/nonBattleSkills.js'
 
-with open(filepath, 'r', encoding='utf-8') as f:
-    content = f.read()
+# 私密日志替换规则（只作用于字符串 / 模板字面量，注释保持不变）
+PRIVATE_LOG_RULES = [
+    # 1. '你转账' -> '${caster.name}转账'
+    (r"'你转账", r"'${caster.name}转账"),
+    (r"`你转账", r"`${caster.name}转账"),
+    # 2. '你使用了' -> '${caster.name}使用了'
+    (r"'你使用了", r"'${caster.name}使用了"),
+    (r"`你使用了", r"`${caster.name}使用了"),
+    # 3. '你对' -> '${caster.name}对'
+    (r"'你对 ", r"'${caster.name}对 "),
+    (r"`你对 ", r"`${caster.name}对 "),
+]
 
-# 备份
-with open(filepath + '.before_fix3', 'w', encoding='utf-8') as f:
-    f.write(content)
+def fix_literal(literal):
+    for pattern, replacement in PRIVATE_LOG_RULES:
+        literal = rule_profile.sub(f'fix_non_battle_dual_log:{pattern}', pattern, replacement, literal)
+    return literal
 
-# 替换私密日志中的 '你'
-# 1. '你转账' -> '${caster.name}转账'
-content = re.sub(r"'你转账", r"'${caster.name}转账", content)
-content = re.sub(r"`你转账", r"`${caster.name}转账", content)
+@rule_profile.profiled('fix_non_battle_dual_log.fix_source')
+def fix_source(source):
+    """修正 source（js_lexer.ParsedSource）中的双日志格式，返回 (新内容, 修改数)"""
+    content = source.text
 
-# 2. '你使用了' -> '${caster.name}使用了'
-content = re.sub(r"'你使用了", r"'${caster.name}使用了", content)
-content = re.sub(r"`你使用了", r"`${caster.name}使用了", content)
+    # 修正公开日志 - 在特定模式的开头添加 ${caster.name}
+    # 模式1: `转账${amount}` -> `${caster.name}转账${amount}`
+    transfer_starts = set()
+    for call in source.calls(['addSkillUsageLog']):
+        args = js_lexer.arguments(call)
+        if len(args) < 4:
+            continue
+        texts = [content[a.start:a.end] for a in args[:3]]
+        public_arg = args[3]
+        if (texts == ['gameStore', 'caster.name', "'转账给他人'"] and public_arg.kind == 'template'
+                and content.startswith('`转账', public_arg.start)):
+            transfer_starts.add(public_arg.start)
 
-# 3. '你对' -> '${caster.name}对'
-content = re.sub(r"'你对 ", r"'${caster.name}对 ", content)
-content = re.sub(r"`你对 ", r"`${caster.name}对 ", content)
+    # 替换私密日志中的 '你'，与公开日志修正共用同一次扫描
+    edits = []
+    for tok in source.tokens:
+        if tok.kind not in ('string', 'template'):
+            continue
+        literal = content[tok.start:tok.end]
+        new_literal = fix_literal(literal)
+        if tok.start in transfer_starts:
+            new_literal = '`${caster.name}' + new_literal[1:]
+        if new_literal != literal:
+            edits.append((tok.start, tok.end, new_literal))
 
-# 修正公开日志 - 在特定模式的开头添加 ${caster.name}
-# 模式1: `转账${amount}` -> `${caster.name}转账${amount}`
-content = re.sub(
-    r"addSkillUsageLog\(\s*gameStore,\s*caster\.name,\s*'转账给他人',\s*`转账",
-    r"addSkillUsageLog(\n      gameStore,\n      caster.name,\n      '转账给他人',\n      `${caster.name}转账",
-    content
-)
+    return js_lexer.apply_edits(content, edits), len(edits)
 
-with open(filepath, 'w', encoding='utf-8') as f:
-    f.write(content)
+def main():
+    with dry_run.DryRun(dry_run.mode_from_argv()) as output:
+        content = output.read(filepath)
 
-print("✅ 已修正 nonBattleSkills.js 中的双日志格式")
-print("   - 私密日志：'你' -> '${caster.name}'")
-print("   - 公开日志：添加了 ${caster.name}")
+        new_content, _ = fix_source(js_lexer.ParsedSource(content))
+        output.write(filepath, content, new_content, __file__)
+
+        print("✅ 已修正 nonBattleSkills.js 中的双日志格式")
+        print("   - 私密日志：'你' -> '${caster.name}'")
+        print("   - 公开日志：添加了 ${caster.name}")
+
+if __name__ == '__main__':
+    with rule_profile.session_from_argv(__file__):
+        main()
@@ -1,88 +1,98 @@
 #!/usr/bin/env python3
 """
 处理多行和复杂格式的 gameStore.addLog 调用
+基于 js_lexer 单次扫描定位调用，不再对整个文件多次正则替换
 """
 
 import re
 
+import dry_run
+import js_lexer
+import rule_profile
+
+IDENTIFIER = re.compile(r'\w+')
+
 def process_multiline_logs(filepath):
     """处理多行的 gameStore.addLog 调用"""
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
 
-    # 模式1: gameStore.addLog(variable) - 使用变量的日志
-    # 这些需要保持为效果日志，因为无法判断内容
-    content = re.sub(
-        r'gameStore\.addLog\((\w+)\)',
-        r'addSkillEffectLog(gameStore, \1)',
-        content
-    )
-
-    # 模式2: 多行 gameStore.addLog(`...\n...`)
-    # 匹配跨行的模板字符串
-    def replace_multiline(match):
-        full_match = match.group(0)
-        message = match.group(1)
-
-        # 判断是否为效果日志
-        if '${caster.name}' not in message:
-            return f'addSkillEffectLog(gameStore, `{message}`)'
-
-        # 技能使用日志 - 移除玩家名
-        public_msg = re.sub(r'\$\{caster\.name\}\s*', '', message)
-        public_msg = re.sub(r'\$\{caster\.name\}', '', public_msg)
-
-        # 由于多行且复杂，使用通用私密消息
-        result = f'''addSkillUsageLog(
+    new_content, _ = process_source(js_lexer.ParsedSource(content))
+    return new_content
+
+@rule_profile.profiled('fix_remaining_logs.process_source')
+def process_source(source):
+    """处理 source（js_lexer.ParsedSource）中的多行调用，返回 (新内容, 修改数)"""
+    content = source.text
+    edits = []
+    for call in source.calls(['gameStore.addLog']):
+        if len(call.args) != 1:
+            continue
+        arg_start, arg_end = call.args[0]
+        arg = content[arg_start:arg_end]
+
+        # 模式1: gameStore.addLog(variable) - 使用变量的日志
+        # 这些需要保持为效果日志，因为无法判断内容
+        if IDENTIFIER.fullmatch(arg):
+            edits.append((call.start, call.end, f'addSkillEffectLog(gameStore, {arg})'))
+            continue
+
+        message = js_lexer.template_body(content, call.args[0])
+        if message is None:
+            continue
+
+        # 模式2: 多行 gameStore.addLog(`...\n...`)
+        if arg_start == call.paren + 1 and '\n' in message:
+            edits.append((call.start, call.end, replace_multiline(message)))
+        # 模式3: gameStore.addLog(\n      `...`\n    )
+        elif '\n' in content[call.paren:arg_start]:
+            edits.append((call.start, call.end, f'addSkillEffectLog(gameStore, `{message}`)'))
+
+    return js_lexer.apply_edits(content, edits), len(edits)
+
+def replace_multiline(message):
+    """多行模板字符串日志的替换文本"""
+    # 判断是否为效果日志
+    if '${caster.name}' not in message:
+        return f'addSkillEffectLog(gameStore, `{message}`)'
+
+    # 技能使用日志 - 移除玩家名
+    public_msg = rule_profile.sub('fix_remaining_logs:strip_caster_name', r'\$\{caster\.name\}\s*', '', message)
+    public_msg = rule_profile.sub('fix_remaining_logs:strip_caster_name_inline', r'\$\{caster\.name\}', '', public_msg)
+
+    # 由于多行且复杂，使用通用私密消息
+    result = f'''addSkillUsageLog(
       gameStore,
       caster.name,
       '技能',  // TODO: 手动填写技能名
       `{public_msg}`,
       `你使用了技能`  // TODO: 手动完善消息
     )'''
-        return result
-
-    content = re.sub(
-        r'gameStore\.addLog\(`([^`]*\n[^`]*)`\)',
-        replace_multiline,
-        content,
-        flags=re.MULTILINE
-    )
-
-    # 模式3: gameStore.addLog(\n      `...`\n    )
-    content = re.sub(
-        r'gameStore\.addLog\(\s*\n\s*`([^`]+)`\s*\n\s*\)',
-        lambda m: f'addSkillEffectLog(gameStore, `{m.group(1)}`)',
-        content,
-        flags=re.MULTILINE
-    )
-
-    return content
+    return result
 
 def main():
     filepath = 'src/composables/skills/nonBattleSkills.js'
 
-    print(f"处理文件: {filepath}")
+    with dry_run.DryRun(dry_run.mode_from_argv()) as output:
+        print(f"处理文件: {filepath}")
 
-    # 备份
-    with open(filepath, 'r', encoding='utf-8') as f:
-        original = f.read()
+        original = output.read(filepath)
 
-    log_count_before = original.count('gameStore.addLog')
-    print(f"处理前: {log_count_before} 个 gameStore.addLog 调用")
+        log_count_before = original.count('gameStore.addLog')
+        print(f"处理前: {log_count_before} 个 gameStore.addLog 调用")
 
-    # 处理
-    new_content = process_multiline_logs(filepath)
+        # 处理
+        new_content, _ = process_source(js_lexer.ParsedSource(original))
 
-    log_count_after = new_content.count('gameStore.addLog')
-    print(f"处理后: {log_count_after} 个 gameStore.addLog 调用")
-    print(f"转换了: {log_count_before - log_count_after} 个调用")
+        log_count_after = new_content.count('gameStore.addLog')
+        print(f"处理后: {log_count_after} 个 gameStore.addLog 调用")
+        print(f"转换了: {log_count_before - log_count_after} 个调用")
 
-    # 保存
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(new_content)
+        # 备份并保存（预演时只输出差异）
+        output.write(filepath, original, new_content, __file__)
 
-    print(f"\n✅ 完成！剩余 {log_count_after} 个需要手动处理")
+        print(f"\n✅ 完成！剩余 {log_count_after} 个需要手动处理")
 
 if __name__ == '__main__':
-    main()
+    with rule_profile.session_from_argv(__file__):
+        main()
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+整局蒙特卡洛模拟（多进程）
+在 battle_sim 的向量化战斗逻辑上模拟完整对局，一批对局按 (对局, 玩家, 城市) 数组同时推进：
+- 抽城：drawRandomCities，每位玩家从全部城市中不重复地抽 --cities 座
+- 中心城市：first（抽到的第一座，与 useGameLogic 一致）、max（HP 最高）、random
+- 每位玩家的回合按 selectAIBattleTarget 随机选存活的对手、对手的存活城市、己方存活城市出战：
+  出战前 applyFatigueReduction（连续出战 HP 减半），simulateBattle 结算，
+  之后 updateFatigueStreaks（出战城市 +1，其余归零），回合结束 applyEndOfTurnDamage（毒）
+- 中心城市阵亡即出局，只剩一位玩家时获胜；超过 --max-rounds 记为平局
+对局按固定大小分块，每块的随机种子由 (--seed, 块号) 决定，结果与进程数无关；
+各块的统计可直接相加，最后按城市、按专属技能给出胜率和 Wilson 95% 置信区间
+
+用法:
+  python3 game_sim.py --games 100000
+  python3 game_sim.py --games 1000000 --players 3 --center max --workers 8 --json report.json
+  python3 game_sim.py --games 20000 --skills --poison-round 30 --poison 1000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import battle_sim
+
+CHUNK_SIZE = 5000
+CENTER_STRATEGIES = ['first', 'max', 'random']
+Z_95 = 1.959963984540054
+
+
+class Tally:
+    """可相加的统计：对局数、平局数、总回合数，以及按城市的出场 / 获胜次数（作为中心时另计）"""
+
+    FIELDS = ['appearances', 'wins', 'center_appearances', 'center_wins']
+
+    def __init__(self, size):
+        self.games = 0
+        self.draws = 0
+        self.rounds = 0
+        for field in self.FIELDS:
+            setattr(self, field, np.zeros(size, dtype=np.int64))
+
+    def merge(self, other):
+        self.games += other.games
+        self.draws += other.draws
+        self.rounds += other.rounds
+        for field in self.FIELDS:
+            getattr(self, field)[:] += getattr(other, field)
+        return self
+
+    def to_dict(self):
+        result = {'games': self.games, 'draws': self.draws, 'rounds': self.rounds}
+        result.update({field: getattr(self, field).tolist() for field in self.FIELDS})
+        return result
+
+    @classmethod
+    def from_dict(cls, data):
+        tally = cls(len(data['appearances']))
+        tally.games, tally.draws, tally.rounds = data['games'], data['draws'], data['rounds']
+        for field in cls.FIELDS:
+            setattr(tally, field, np.asarray(data[field], dtype=np.int64))
+        return tally
+
+
+def _pick(rng, mask):
+    """每行在 mask 为真的位置中均匀随机取一个下标（全假的行返回 0，由调用方排除）"""
+    return np.where(mask, rng.random(mask.shape), -1.0).argmax(axis=-1)
+
+
+def draw_cities(rng, games, players, per_player, size):
+    """每局不重复抽 players × per_player 座城市，返回 (对局, 玩家, 城市) 的城市下标"""
+    order = rng.random((games, size)).argsort(axis=1)[:, :players * per_player]
+    return order.reshape(games, players, per_player)
+
+
+def choose_centers(rng, hp, strategy):
+    if strategy == 'max':
+        return hp.argmax(axis=2)
+    if strategy == 'random':
+        return rng.integers(0, hp.shape[2], hp.shape[:2])
+    return np.zeros(hp.shape[:2], dtype=np.int64)
+
+
+def simulate_games(roster, rng, games, config, events=None):
+    """
+    模拟一批对局，返回 Tally
+    events 为列表时记录每场战斗（对局、回合、攻击方玩家和城市、目标城市、HP 变化、是否摧毁、
+    攻击方技能是否生效），结束时合并成一个 {列名: 数组} 放回列表，并补上攻击方是否最终获胜的 win 列
+    """
+    players, per_player = config['players'], config['cities']
+    cities = draw_cities(rng, games, players, per_player, len(roster))
+    hp = roster.hp[cities]
+    center = choose_centers(rng, hp, config['center'])
+    is_center = np.arange(per_player) == center[:, :, None]
+    boosted = np.zeros(hp.shape, dtype=bool)
+    if config['skills']:
+        skilled_hp = battle_sim.skill_hp(roster, hp, is_center, cities)
+        # 被动 HP 加成在开局就已生效，记下哪些城市的 HP 真的变了
+        boosted = skilled_hp != hp
+        hp = skilled_hp
+    alive = hp > 0
+    streak = np.zeros_like(hp)
+    game_index = np.arange(games)
+    defeated = ~alive[game_index[:, None], np.arange(players), center]
+    over = (~defeated).sum(axis=1) <= 1
+    finished_round = np.where(over, 0, config['max_rounds'])
+
+    for round_number in range(1, config['max_rounds'] + 1):
+        if over.all():
+            break
+        poisoned = round_number >= config['poison_round'] if config['poison_round'] else False
+        for p in range(players):
+            # selectAIBattleTarget：还有存活城市的对手中随机选一个，再随机选目标城市和己方出战城市
+            opponents = ~defeated & alive.any(axis=2)
+            opponents[:, p] = False
+            acting = ~over & ~defeated[:, p] & opponents.any(axis=1)
+            g = np.flatnonzero(acting)
+            if len(g):
+                opponent = _pick(rng, opponents[g])
+                target = _pick(rng, alive[g, opponent])
+                own = _pick(rng, alive[g, p])
+
+                # applyFatigueReduction：上一回合也出战的城市 HP 减半
+                attacker_hp = hp[g, p, own]
+                attacker_hp = np.where(streak[g, p, own] >= 1, attacker_hp // 2, attacker_hp)
+                attacker_center = own == center[g, p]
+                power = battle_sim.city_power(attacker_hp, np.where(attacker_center, battle_sim.MODIFIERS['center'], 0))
+                applied = boosted[g, p, own]
+                if config['skills']:
+                    skilled = battle_sim.skill_power(roster, power, attacker_hp, attacker_center, cities[g, p, own])
+                    # 技能生效：开局 HP 被加成过，或者本场攻击力被倍数 / 首都上限改变了
+                    applied = applied | (skilled != power)
+                    power = skilled
+                result = battle_sim.simulate_battle(power, attacker_hp, hp[g, opponent, target])
+                hp[g, p, own] = result['attackerHp']
+                hp[g, opponent, target] = result['defenderHp']
+                alive[g, opponent, target] &= result['defenderHp'] > 0
+
+                if events is not None:
+                    events.append({
+                        'game': g,
+                        'round': np.full(len(g), round_number),
+                        'player': np.full(len(g), p),
+                        'city': cities[g, p, own],
+                        'target': cities[g, opponent, target],
+                        'hpDelta': -result['damage'],
+                        'destroyed': result['defenderHp'] == 0,
+                        'skillApplied': applied,
+                    })
+
+                # updateFatigueStreaks：出战城市 +1，其余归零
+                previous = streak[g, p, own]
+                streak[g, p] = 0
+                streak[g, p, own] = previous + 1
+
+            # applyEndOfTurnDamage：中毒时己方全部存活城市扣血
+            if poisoned:
+                g = np.flatnonzero(~over & ~defeated[:, p])
+                hp[g, p] = np.where(alive[g, p], np.maximum(hp[g, p] - config['poison'], 0), hp[g, p])
+                alive[g, p] &= hp[g, p] > 0
+
+            defeated = ~alive[game_index[:, None], np.arange(players), center]
+            ended = ~over & ((~defeated).sum(axis=1) <= 1)
+            finished_round[ended] = round_number
+            over |= ended
+
+    tally = Tally(len(roster))
+    survivors = (~defeated).sum(axis=1)
+    decided = over & (survivors == 1)
+    winner = np.where(decided, (~defeated).argmax(axis=1), -1)
+    tally.games = games
+    tally.draws = int(games - decided.sum())
+    tally.rounds = int(finished_round.sum())
+    won = np.broadcast_to((np.arange(players) == winner[:, None])[:, :, None], cities.shape)
+    size = len(roster)
+    tally.appearances += np.bincount(cities.ravel(), minlength=size)
+    tally.wins += np.bincount(cities[won], minlength=size)
+    centers = cities[game_index[:, None], np.arange(players), center]
+    tally.center_appearances += np.bincount(centers.ravel(), minlength=size)
+    tally.center_wins += np.bincount(centers[np.arange(players) == winner[:, None]], minlength=size)
+    if events:
+        merged = {field: np.concatenate([part[field] for part in events]) for field in events[0]}
+        # 攻击方最终获胜为 1、落败为 0、平局为 -1
+        game_winner = winner[merged['game']]
+        merged['win'] = np.where(game_winner < 0, -1, game_winner == merged['player'])
+        events[:] = [merged]
+    return tally
+
+
+# ---------------------------------------------------------------- 多进程
+
+_roster = None
+
+
+def _init_worker():
+    global _roster
+    _roster = battle_sim.load_roster()
+
+
+def run_chunk(task):
+    """(块号, 对局数, 配置, 种子) -> Tally；种子只由 (种子, 块号) 决定"""
+    chunk, games, config, seed = task
+    rng = np.random.default_rng([seed, chunk])
+    return simulate_games(_roster, rng, games, config)
+
+
+def chunk_tasks(total, config, seed, chunk_size=CHUNK_SIZE, first_chunk=0):
+    tasks = []
+    chunk = first_chunk
+    while total > 0:
+        games = min(chunk_size, total)
+        tasks.append((chunk, games, config, seed))
+        total -= games
+        chunk += 1
+    return tasks
+
+
+def run_parallel(tasks, size, workers, progress=True):
+    tally = Tally(size)
+    if workers <= 1:
+        _init_worker()
+        results = map(run_chunk, tasks)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker)
+        results = pool.imap_unordered(run_chunk, tasks)
+    try:
+        done = 0
+        for part in results:
+            tally.merge(part)
+            done += 1
+            if progress and sys.stderr.isatty():
+                print(f"\r{done}/{len(tasks)} 块，{tally.games} 局", end='', file=sys.stderr)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if progress and sys.stderr.isatty():
+        print(file=sys.stderr)
+    return tally
+
+
+# ---------------------------------------------------------------- 报告
+
+def wilson(wins, n, z=Z_95):
+    """Wilson 置信区间，返回 (下限, 上限)；n 为 0 时为 (0, 1)"""
+    wins = np.asarray(wins, dtype=float)
+    n = np.asarray(n, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = wins / n
+        denom = 1 + z * z / n
+        centre = (p + z * z / (2 * n)) / denom
+        half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    empty = n == 0
+    return np.where(empty, 0.0, centre - half), np.where(empty, 1.0, centre + half)
+
+
+def rate_table(labels, wins, appearances):
+    """[(标签, 出场, 获胜, 胜率, 下限, 上限)]，按胜率降序"""
+    low, high = wilson(wins, appearances)
+    rows = [(label, int(n), int(w), w / n, float(lo), float(hi))
+            for label, n, w, lo, hi in zip(labels, appearances, wins, low, high) if n]
+    rows.sort(key=lambda row: -row[3])
+    return rows
+
+
+def skill_totals(roster, tally):
+    """把城市统计按专属技能名合并（同名技能的城市合在一起）"""
+    names = sorted({name for name in roster.skill_names if name})
+    index = {name: i for i, name in enumerate(names)}
+    ids = np.array([index.get(name, -1) for name in roster.skill_names])
+    has = ids >= 0
+    wins = np.bincount(ids[has], weights=tally.wins[has], minlength=len(names)).astype(np.int64)
+    appearances = np.bincount(ids[has], weights=tally.appearances[has], minlength=len(names)).astype(np.int64)
+    return names, wins, appearances
+
+
+def _print_rows(title, rows, top):
+    print(f"\n{title}")
+    shown = rows if top is None or len(rows) <= 2 * top else rows[:top] + [None] + rows[-top:]
+    for row in shown:
+        if row is None:
+            print("  ...")
+            continue
+        label, n, w, rate, lo, hi = row
+        print(f"  {rate:6.1%}  [{lo:6.1%}, {hi:6.1%}]  {w:>8}/{n:<8}  {label}")
+
+
+def report(roster, tally, config, elapsed, top, min_appearances):
+    decided = tally.games - tally.draws
+    print(f"{tally.games} 局（{config['players']} 人，每人 {config['cities']} 城，中心 {config['center']}"
+          f"{'，套用被动技能' if config['skills'] else ''}），用时 {elapsed:.1f} s（{tally.games / max(elapsed, 1e-9):.0f} 局/秒）")
+    print(f"分出胜负 {decided} 局，平局 {tally.draws} 局，平均 {tally.rounds / max(tally.games, 1):.1f} 回合"
+          f"；基准胜率 {1 / config['players']:.1%}")
+
+    enough = tally.appearances >= min_appearances
+    rows = rate_table(np.array(roster.names)[enough], tally.wins[enough], tally.appearances[enough])
+    _print_rows(f"城市胜率（出场 ≥ {min_appearances}，共 {len(rows)} 座）:", rows, top)
+    enough = tally.center_appearances >= min_appearances
+    rows = rate_table(np.array(roster.names)[enough], tally.center_wins[enough], tally.center_appearances[enough])
+    _print_rows(f"作为中心城市的胜率（共 {len(rows)} 座）:", rows, top)
+    names, wins, appearances = skill_totals(roster, tally)
+    enough = appearances >= min_appearances
+    rows = rate_table(np.array(names)[enough], wins[enough], appearances[enough])
+    _print_rows(f"专属技能胜率（共 {len(rows)} 个）:", rows, top)
+
+
+def json_report(roster, tally, config):
+    low, high = wilson(tally.wins, tally.appearances)
+    center_low, center_high = wilson(tally.center_wins, tally.center_appearances)
+    cities = [{'city': name, 'skill': skill, 'appearances': int(n), 'wins': int(w),
+               'ci95': [round(float(lo), 5), round(float(hi), 5)],
+               'centerAppearances': int(cn), 'centerWins': int(cw),
+               'centerCi95': [round(float(clo), 5), round(float(chi), 5)]}
+              for name, skill, n, w, lo, hi, cn, cw, clo, chi
+              in zip(roster.names, roster.skill_names, tally.appearances, tally.wins, low, high,
+                     tally.center_appearances, tally.center_wins, center_low, center_high)]
+    names, wins, appearances = skill_totals(roster, tally)
+    low, high = wilson(wins, appearances)
+    skills = [{'skill': name, 'appearances': int(n), 'wins': int(w),
+               'ci95': [round(float(lo), 5), round(float(hi), 5)]}
+              for name, n, w, lo, hi in zip(names, appearances, wins, low, high)]
+    return {'config': config, 'games': tally.games, 'draws': tally.draws, 'rounds': tally.rounds,
+            'cities': cities, 'skills': skills}
+
+
+def game_config(args):
+    return {
+        'players': args.players,
+        'cities': args.cities,
+        'center': args.center,
+        'skills': args.skills,
+        'max_rounds': args.max_rounds,
+        'poison_round': args.poison_round,
+        'poison': args.poison,
+    }
+
+
+def add_game_arguments(parser):
+    parser.add_argument('--players', type=int, default=2, help='玩家数（默认 2）')
+    parser.add_argument('--cities', type=int, default=10, help='每位玩家的城市数（默认 10，与 useGameLogic 一致）')
+    parser.add_argument('--center', choices=CENTER_STRATEGIES, default='first', help='中心城市的选择方式（默认 first）')
+    parser.add_argument('--skills', action='store_true', help='套用 citySkills.js 中的被动数值')
+    parser.add_argument('--max-rounds', type=int, default=200, help='超过该回合数记为平局（默认 200）')
+    parser.add_argument('--poison-round', type=int, default=0, help='从第几回合起所有玩家中毒（默认不中毒）')
+    parser.add_argument('--poison', type=int, default=1000, help='中毒时每回合扣血（默认 1000，同 applyEndOfTurnDamage）')
+    parser.add_argument('--seed', type=int, default=battle_sim.SEED, help='随机种子')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='多进程整局蒙特卡洛模拟，按城市和技能统计胜率')
+    parser.add_argument('--games', type=int, default=100000, help='对局数（默认 100000）')
+    add_game_arguments(parser)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='进程数（默认 CPU 核数）')
+    parser.add_argument('--chunk', type=int, default=CHUNK_SIZE, help=f'每块对局数（默认 {CHUNK_SIZE}，影响随机序列）')
+    parser.add_argument('--top', type=int, default=10, help='各表只列出最高和最低的若干项（默认 10）')
+    parser.add_argument('--min-appearances', type=int, default=100, help='列入胜率表的最少出场次数（默认 100）')
+    parser.add_argument('--json', metavar='PATH', help='把完整统计写成 JSON')
+    args = parser.parse_args()
+
+    battle_sim._require_numpy()
+    config = game_config(args)
+    roster = battle_sim.load_roster()
+    if args.players < 2 or args.players * args.cities > len(roster):
+        parser.error('玩家数至少为 2，且玩家数 × 城市数不能超过城市总数')
+    start = time.perf_counter()
+    tally = run_parallel(chunk_tasks(args.games, config, args.seed, args.chunk), len(roster), args.workers)
+    elapsed = time.perf_counter() - start
+    report(roster, tally, config, elapsed, args.top, args.min_appearances)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(json_report(roster, tally, config), f, ensure_ascii=False, indent=1)
+        print(f"\n报告已写入: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
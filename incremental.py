@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+增量转换
+把文件按 execute* 函数切成若干块（函数本身一块，函数之间的顶层代码一块），
+每块按内容哈希缓存转换结果，缓存键还包含规则版本（转换脚本及其导入的本目录模块的源码 + 技能注册表的哈希）：
+- 整个文件和规则都没变：直接拼出上次的结果，不做词法扫描
+- 只改了某个函数：沿用上次的分块，头尾未变的块只比较哈希，只重新扫描和转换中间变化的部分
+
+缓存在 .codemod/cache/incremental/<阶段>--<文件>.json，只保留当前分块对应的结果
+"""
+
+import hashlib
+import importlib
+import json
+import os
+import sys
+import types
+
+import dry_run
+import function_index
+import js_lexer
+
+CACHE_DIR = os.path.join('.codemod', 'cache', 'incremental')
+CACHE_VERSION = 1
+
+# 所有阶段共用的解析代码，改动后全部缓存失效
+SHARED_SOURCES = ['js_lexer.py', 'function_index.py']
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def rule_sources(stage_name):
+    """
+    影响阶段结果的源文件名：阶段脚本、它直接或间接导入的本目录模块（import x 和 from x import f 都算），
+    以及共用解析代码
+    """
+    names = set(SHARED_SOURCES)
+    seen = set()
+    pending = [importlib.import_module(stage_name)]
+    while pending:
+        module = pending.pop()
+        path = getattr(module, '__file__', None)
+        if module.__name__ in seen or not path or os.path.dirname(os.path.abspath(path)) != _HERE:
+            continue
+        seen.add(module.__name__)
+        names.add(os.path.basename(path))
+        for value in vars(module).values():
+            if isinstance(value, types.ModuleType):
+                pending.append(value)
+            elif getattr(value, '__module__', None) in sys.modules:
+                pending.append(sys.modules[value.__module__])
+    return sorted(names)
+
+
+def rules_version(stage_name, extra=None):
+    """阶段的规则版本：rule_sources 各文件的源码哈希，extra 为其他影响结果的数据（如注册表）"""
+    digest = hashlib.sha256(str(CACHE_VERSION).encode('ascii'))
+    for name in rule_sources(stage_name):
+        with open(os.path.join(_HERE, name), 'rb') as f:
+            digest.update(f.read())
+    if extra is not None:
+        digest.update(json.dumps(extra, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _line_end(text, offset):
+    """offset 所在行换行符之后的位置"""
+    end = text.find('\n', offset)
+    return len(text) if end < 0 else end + 1
+
+
+def split_chunks(text, tokens=None):
+    """按函数区间切块：每个函数从所在行首到结束行的换行符，其余部分各成一块；返回各块长度"""
+    bounds = {0, len(text)}
+    for span in function_index.scan_functions(text, tokens=tokens):
+        bounds.add(js_lexer.line_start(text, span.start))
+        bounds.add(_line_end(text, span.end - 1))
+    bounds = sorted(bounds)
+    return [b - a for a, b in zip(bounds, bounds[1:])]
+
+
+def _reuse_chunks(text, old_chunks):
+    """
+    与上次的分块比较，返回 (头部沿用的块, 中间文本的起止位置, 尾部沿用的块)
+    块为 (长度, 哈希)
+    """
+    head = []
+    offset = 0
+    for length, digest in old_chunks:
+        if offset + length > len(text) or _hash(text[offset:offset + length]) != digest:
+            break
+        head.append((length, digest))
+        offset += length
+
+    tail = []
+    end = len(text)
+    for length, digest in reversed(old_chunks[len(head):]):
+        if end - length < offset or _hash(text[end - length:end]) != digest:
+            break
+        tail.append((length, digest))
+        end -= length
+    tail.reverse()
+    return head, offset, end, tail
+
+
+def rechunk(text, old_chunks):
+    """按上次的分块 [(长度, 哈希)] 重新分块：头尾未变的块直接沿用，只扫描中间变化的部分"""
+    head, start, end, tail = _reuse_chunks(text, old_chunks)
+    middle = text[start:end]
+    chunks = list(head)
+    offset = start
+    for length in split_chunks(middle) if middle else []:
+        chunks.append((length, _hash(text[offset:offset + length])))
+        offset += length
+    return chunks + tail
+
+
+class IncrementalCache:
+    """一个 (阶段, 文件) 的分块缓存"""
+
+    def __init__(self, stage_name, path, root='.'):
+        safe = path.replace('/', '_').replace('\\', '_')
+        self.path = os.path.join(root, CACHE_DIR, f'{stage_name}--{safe}.json')
+        self.entry = None
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entry = json.load(f)
+        except (OSError, ValueError):
+            self.entry = None
+        return self.entry
+
+    def save(self, entry):
+        self.entry = entry
+        if dry_run.active():
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+def transform(stage_name, path, text, run, version, root='.'):
+    """
+    增量运行 run(ParsedSource) -> (新内容, 修改数)
+    返回 (新内容, 修改数, 统计)，统计为 {'chunks': 总块数, 'transformed': 重新转换的块数}
+    """
+    cache = IncrementalCache(stage_name, path, root)
+    entry = cache.load()
+    if entry and entry.get('version') != version:
+        entry = None
+
+    input_hash = _hash(text)
+    memo = entry['memo'] if entry else {}
+    if entry and entry['input'] == input_hash:
+        # 文件没变：直接拼接
+        output = ''.join(memo[digest][0] for _, digest in entry['chunks'])
+        changed = sum(memo[digest][1] for _, digest in entry['chunks'])
+        return output, changed, {'chunks': len(entry['chunks']), 'transformed': 0}
+
+    chunks = rechunk(text, entry['chunks'] if entry else [])
+
+    new_memo = {}
+    transformed = 0
+    offset = 0
+    for length, digest in chunks:
+        if digest not in new_memo:
+            if digest in memo:
+                new_memo[digest] = memo[digest]
+            else:
+                new_text, changed = run(js_lexer.ParsedSource(text[offset:offset + length]))
+                new_memo[digest] = [new_text, changed]
+                transformed += 1
+        offset += length
+
+    output = ''.join(new_memo[digest][0] for _, digest in chunks)
+    changed = sum(new_memo[digest][1] for _, digest in chunks)
+    cache.save({'version': version, 'input': input_hash, 'chunks': chunks, 'memo': new_memo})
+    return output, changed, {'chunks': len(chunks), 'transformed': transformed}
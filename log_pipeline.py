@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+双日志迁移流水线
+把原先需要依次运行的 batch_convert_logs、correct_batch_convert_logs、fix_remaining_logs、
+fix_remaining_logs2、fix_dual_log_format、fix_non_battle_dual_log、fix_battle_skills_private_log、
+fix_battle_public_final 串成一条流水线：
+- 每个目标文件只读一次，各阶段共享同一个 js_lexer.ParsedSource（同一版本文本只扫描一次）
+- 中间结果只保存在内存里，全部阶段结束后每个改动过的文件只写一次
+
+用法:
+  python3 log_pipeline.py                     # 按默认顺序运行默认阶段
+  python3 log_pipeline.py --stages a,b,c      # 指定要运行的阶段及顺序
+  python3 log_pipeline.py --skip a,b          # 从默认阶段中跳过部分阶段
+  python3 log_pipeline.py --list              # 列出所有阶段
+  python3 log_pipeline.py --dry-run [json]    # 不写文件，把 unified diff（或 JSON 改动列表）输出到 stdout
+  python3 log_pipeline.py --profile r.json --metrics r.prom   # 按规则统计耗时、匹配数和字节数
+  python3 log_pipeline.py --incremental       # 只重新转换上次运行后有变化的函数
+"""
+
+import argparse
+import os
+import time
+from collections import namedtuple
+
+import batch_convert_logs
+import correct_batch_convert_logs
+import dry_run
+import fix_battle_public_final
+import fix_battle_public_log
+import fix_battle_skills_private_log
+import fix_dual_log_format
+import fix_non_battle_dual_log
+import fix_remaining_logs
+import fix_remaining_logs2
+import incremental
+import js_lexer
+import rule_profile
+import skill_registry
+
+NON_BATTLE = 'src/composables/skills/nonBattleSkills.js'
+BATTLE = 'src/composables/skills/battleSkills.js'
+
+# targets: [(相对路径, 阶段函数)]，阶段函数接收 ParsedSource，返回 (新内容, 修改数)
+Stage = namedtuple('Stage', 'name targets description')
+
+
+_registry = None
+
+
+def _load_registry():
+    """每次 run_pipeline 只读取一次注册表（增量模式下阶段函数会按块被调用多次）"""
+    global _registry
+    if _registry is None:
+        _registry = skill_registry.load_registry()
+    return _registry
+
+
+def reset_registry():
+    """技能注册表的源文件变化后调用，下次使用时重新读取"""
+    global _registry
+    _registry = None
+
+
+def _with_registry(convert):
+    """为需要技能注册表的转换函数补上 registry 参数"""
+    def run(source):
+        new_text, edits = convert(source, _load_registry())
+        return new_text, len(edits)
+    run.uses_registry = True
+    return run
+
+
+def _with_rules(rules):
+    def run(source):
+        return fix_dual_log_format.apply_rules(source, rules)
+    return run
+
+
+STAGES = [
+    Stage('batch_convert_logs',
+          [(NON_BATTLE, _with_registry(batch_convert_logs.convert_source))],
+          'gameStore.addLog -> 双日志（公开日志去掉玩家名）'),
+    Stage('correct_batch_convert_logs',
+          [(NON_BATTLE, _with_registry(correct_batch_convert_logs.convert_source))],
+          'gameStore.addLog -> 双日志（公开日志保留玩家名）'),
+    Stage('fix_remaining_logs',
+          [(NON_BATTLE, fix_remaining_logs.process_source)],
+          '变量参数和多行模板字符串的 addLog'),
+    Stage('fix_remaining_logs2',
+          [(NON_BATTLE, fix_remaining_logs2.process_source)],
+          '参数另起一行的 addLog'),
+    Stage('fix_dual_log_format',
+          [(BATTLE, _with_rules(fix_dual_log_format.BATTLE_RULES)),
+           (NON_BATTLE, _with_rules(fix_dual_log_format.NON_BATTLE_RULES))],
+          "私密日志 '你使用了' / '你转账' -> ${caster.name}"),
+    Stage('fix_non_battle_dual_log',
+          [(NON_BATTLE, fix_non_battle_dual_log.fix_source)],
+          '非战斗技能私密日志和转账公开日志'),
+    Stage('fix_battle_skills_private_log',
+          [(BATTLE, fix_battle_skills_private_log.fix_source)],
+          "战斗技能私密日志 '你' -> ${caster.name}"),
+    Stage('fix_battle_public_log',
+          [(BATTLE, fix_battle_public_log.fix_source)],
+          '战斗技能公开日志补玩家名（旧版，默认不启用）'),
+    Stage('fix_battle_public_final',
+          [(BATTLE, fix_battle_public_final.fix_source)],
+          '战斗技能公开日志开头补 ${caster.name}使用了XXX'),
+]
+
+STAGE_MAP = {stage.name: stage for stage in STAGES}
+
+DEFAULT_STAGES = [
+    'batch_convert_logs',
+    'correct_batch_convert_logs',
+    'fix_remaining_logs',
+    'fix_remaining_logs2',
+    'fix_dual_log_format',
+    'fix_non_battle_dual_log',
+    'fix_battle_skills_private_log',
+    'fix_battle_public_final',
+]
+
+
+def _stage_version(name, run):
+    """增量缓存用的规则版本；依赖注册表的阶段把函数->技能映射也算进去"""
+    extra = _load_registry().functions if getattr(run, 'uses_registry', False) else None
+    return incremental.rules_version(name, extra)
+
+
+def run_pipeline(stage_names, root='.', use_incremental=False):
+    """
+    在内存中依次运行各阶段，不写盘
+    use_incremental=True 时按函数分块缓存，只重新转换有变化的块
+    返回 (originals, sources, report)：
+    originals/sources 以相对路径为键，report 为 [(阶段, 路径, 修改数, 耗时秒, 重新转换的块数/总块数)]
+    """
+    reset_registry()
+    originals = {}
+    sources = {}
+    report = []
+
+    for name in stage_names:
+        for path, run in STAGE_MAP[name].targets:
+            if path not in sources:
+                with open(os.path.join(root, path), 'r', encoding='utf-8') as f:
+                    originals[path] = dry_run.track(path, f.read())
+                sources[path] = js_lexer.ParsedSource(originals[path])
+
+            source = sources[path]
+            start = time.perf_counter()
+            if use_incremental:
+                new_text, changed, stats = incremental.transform(
+                    name, path, source.text, run, _stage_version(name, run), root)
+                chunks = f"{stats['transformed']}/{stats['chunks']}"
+            else:
+                new_text, changed = run(source)
+                chunks = None
+            source.text = new_text
+            report.append((name, path, changed, time.perf_counter() - start, chunks))
+
+    return originals, sources, report
+
+
+def parse_stage_list(value):
+    names = [n.strip() for n in value.split(',') if n.strip()]
+    unknown = [n for n in names if n not in STAGE_MAP]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"未知阶段: {', '.join(unknown)}（可用 --list 查看）")
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description='双日志迁移流水线：单次读取、内存中串行各阶段、最后一次写入')
+    parser.add_argument('--stages', type=parse_stage_list, help='逗号分隔的阶段列表，按给定顺序运行')
+    parser.add_argument('--skip', type=parse_stage_list, default=[], help='逗号分隔的要跳过的阶段')
+    parser.add_argument('--list', action='store_true', help='列出所有阶段')
+    parser.add_argument('--dry-run', nargs='?', const='diff', choices=dry_run.MODES,
+                        help='不写文件，把改动以 diff（默认）或 json 输出到 stdout')
+    parser.add_argument('--incremental', action='store_true',
+                        help='按函数分块缓存转换结果，只重新转换源码或规则有变化的函数')
+    parser.add_argument('--profile', metavar='PATH', help='把每条改写规则的统计写成 JSON')
+    parser.add_argument('--metrics', metavar='PATH', help='把每条改写规则的统计写成 OpenMetrics 文本')
+    args = parser.parse_args()
+
+    if args.list:
+        for stage in STAGES:
+            mark = '*' if stage.name in DEFAULT_STAGES else ' '
+            files = ', '.join(os.path.basename(path) for path, _ in stage.targets)
+            print(f" {mark} {stage.name:<32} [{files}] {stage.description}")
+        print("\n* 为默认启用的阶段")
+        return
+
+    stage_names = [n for n in (args.stages or DEFAULT_STAGES) if n not in args.skip]
+    if not stage_names:
+        print("没有要运行的阶段")
+        return
+
+    with rule_profile.session(args.profile, args.metrics, __file__), dry_run.DryRun(args.dry_run) as output:
+        print(f"运行 {len(stage_names)} 个阶段: {' -> '.join(stage_names)}")
+        use_incremental = args.incremental and not output.enabled
+        if args.incremental and output.enabled:
+            # 分块缓存命中的函数不会重新转换，也就没有可以逐条输出的修改
+            print("预演时忽略 --incremental，整文件转换以便逐条输出改动（不读写分块缓存）")
+        originals, sources, report = run_pipeline(stage_names, use_incremental=use_incremental)
+
+        for name, path, changed, elapsed, chunks in report:
+            blocks = f"  重新转换 {chunks} 块" if chunks else ''
+            print(f"  {name:<32} {os.path.basename(path):<22} {changed:>5} 处修改  {elapsed * 1000:8.1f} ms{blocks}")
+
+        # 整条流水线只备份一次，所有改动文件记在同一个清单里
+        files = {path: (originals[path], source.text) for path, source in sources.items()}
+        run_id = output.write_many(files, __file__)
+        written = [path for path, (old, new) in files.items() if old != new]
+        if run_id:
+            for path in written:
+                print(f"写入: {path}")
+            print(f"\n备份: {run_id}（恢复: python3 backup_store.py restore {run_id}）")
+
+        total = sum(r[2] for r in report)
+        action = '预演' if output.enabled else '写入'
+        print(f"\n✅ 完成！共 {total} 处修改，{action} {len(written)} 个文件")
+
+if __name__ == '__main__':
+    main()
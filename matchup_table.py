@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+全配对对战结果表（内存映射）
+用 battle_sim 预先算出 攻击方 × 防守方 × 攻击方修饰符组合 的完整结果，存成 .npy 文件：
+- power.npy        (修饰符, 攻击方) int32：calculateCityPower 的攻击力
+- defender_hp.npy  (修饰符, 攻击方, 防守方) int32：simulateBattle 后防守方剩余 HP
+- index.json       城市名、修饰符位掩码、形状和源文件摘要
+修饰符轴直接以 battle_sim.MODIFIERS 的位掩码为下标（共 2^7 = 128 行），
+查询时 np.load(mmap_mode='r') 只映射文件、不读入内存，多个进程共享同一份只读页面，每次查询 O(1)
+防守方状态（屏障、伪装 HP、既来则安）带任意数值，不预先计算，需要时直接调用 battle_sim
+
+用法:
+  python3 matchup_table.py build [--skills]          # 生成到 .codemod/matchups/（--skills 为 skills/ 子目录）
+  python3 matchup_table.py build --check             # 源文件变化、表已过期时返回 1
+  python3 matchup_table.py query 北京市 天津市 [--mods center+desperate]
+  python3 matchup_table.py kills 上海市 [--mods center]   # 该攻击方一击摧毁的城市
+  python3 matchup_table.py info
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import battle_sim
+import build_city_table
+
+TABLE_DIR = os.path.join('.codemod', 'matchups')
+INDEX = 'index.json'
+FORMAT_VERSION = 1
+DTYPE = 'int32'
+MODIFIER_COUNT = 1 << len(battle_sim.MODIFIERS)
+# 一次计算的修饰符行数：16 × 381 × 381 × 8 项 int64 约 150 MB
+BATCH = 16
+SOURCES = [build_city_table.CITIES_SOURCE, build_city_table.SKILLS_SOURCE,
+           battle_sim.SIMULATOR_SOURCE, 'battle_sim.py']
+
+
+def table_dir(root, skills):
+    return os.path.join(root, 'skills') if skills else root
+
+
+def sources_digest():
+    digest = hashlib.sha256(str(FORMAT_VERSION).encode('ascii'))
+    for path in SOURCES:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def parse_mods(value):
+    """'center+desperate' -> 位掩码（只接受攻击方修饰符）"""
+    scenario = battle_sim.parse_scenario(value)
+    if scenario['barrier'] or scenario['disguise'] or scenario['anchored']:
+        raise argparse.ArgumentTypeError('对战表只包含攻击方修饰符，防守方状态请用 battle_sim.py')
+    return scenario['mods']
+
+
+def mods_label(mods):
+    names = [name for name, bit in battle_sim.MODIFIERS.items() if mods & bit]
+    return '+'.join(names) or 'base'
+
+
+def build(directory, skills):
+    """按批计算全部修饰符组合，先写到临时文件再替换，正在读旧表的进程不受影响"""
+    battle_sim._require_numpy()
+    roster = battle_sim.load_roster()
+    n = len(roster)
+    os.makedirs(directory, exist_ok=True)
+    power_tmp = os.path.join(directory, 'power.npy.tmp')
+    hp_tmp = os.path.join(directory, 'defender_hp.npy.tmp')
+    power = np.lib.format.open_memmap(power_tmp, mode='w+', dtype=DTYPE, shape=(MODIFIER_COUNT, n))
+    defender_hp = np.lib.format.open_memmap(hp_tmp, mode='w+', dtype=DTYPE, shape=(MODIFIER_COUNT, n, n))
+    for start in range(0, MODIFIER_COUNT, BATCH):
+        scenarios = [battle_sim.parse_scenario(mods_label(mods)) for mods in range(start, start + BATCH)]
+        result = battle_sim.evaluate(roster, scenarios, skills)
+        power[start:start + BATCH] = result['attackPower'][:, :, 0]
+        defender_hp[start:start + BATCH] = result['defenderHp']
+    power.flush()
+    defender_hp.flush()
+    del power, defender_hp
+    os.replace(power_tmp, os.path.join(directory, 'power.npy'))
+    os.replace(hp_tmp, os.path.join(directory, 'defender_hp.npy'))
+
+    # 防守方战前 HP（套用技能时含被动加成），查询时用来算伤害
+    hp = battle_sim.skill_hp(roster, roster.hp, False) if skills else roster.hp
+    index = {
+        'version': FORMAT_VERSION,
+        'source': sources_digest(),
+        'skills': skills,
+        'dtype': DTYPE,
+        'modifiers': battle_sim.MODIFIERS,
+        'shape': [MODIFIER_COUNT, n, n],
+        'names': roster.names,
+        'hp': hp.tolist(),
+    }
+    tmp_path = os.path.join(directory, INDEX + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(directory, INDEX))
+    return index
+
+
+class MatchupTable:
+    """只读的对战表；数组通过内存映射访问"""
+
+    def __init__(self, directory=TABLE_DIR):
+        battle_sim._require_numpy()
+        with open(os.path.join(directory, INDEX), 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+        if self.index.get('version') != FORMAT_VERSION:
+            raise ValueError(f'{directory} 的格式版本不同，请重新生成')
+        self.names = self.index['names']
+        self.city = {name: i for i, name in enumerate(self.names)}
+        self.hp = np.asarray(self.index['hp'], dtype=np.int64)
+        self.power = np.load(os.path.join(directory, 'power.npy'), mmap_mode='r')
+        self.defender_hp = np.load(os.path.join(directory, 'defender_hp.npy'), mmap_mode='r')
+
+    def stale(self):
+        return self.index['source'] != sources_digest()
+
+    def _id(self, name):
+        try:
+            return self.city[name]
+        except KeyError:
+            raise KeyError(f'未知城市: {name}') from None
+
+    def lookup(self, attacker, defender, mods=0):
+        """返回 (攻击力, 伤害, 防守方剩余 HP, 是否摧毁)"""
+        a, d = self._id(attacker), self._id(defender)
+        power = int(self.power[mods, a])
+        remaining = int(self.defender_hp[mods, a, d])
+        return power, int(self.hp[d]) - remaining, remaining, remaining == 0
+
+    def kills(self, attacker, mods=0):
+        """该攻击方一击摧毁的防守方城市名"""
+        row = self.defender_hp[mods, self._id(attacker)]
+        return [self.names[i] for i in np.flatnonzero(row == 0)]
+
+
+def _open(args):
+    directory = table_dir(args.dir, args.skills)
+    try:
+        table = MatchupTable(directory)
+    except OSError:
+        raise SystemExit(f"❌ {directory} 中没有对战表，先运行 python3 matchup_table.py build"
+                         f"{' --skills' if args.skills else ''}")
+    if table.stale():
+        print(f"⚠️  源文件已变化，{directory} 中的对战表已过期", file=sys.stderr)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description='预先计算并内存映射全部城市配对的对战结果')
+    parser.add_argument('command', choices=['build', 'query', 'kills', 'info'])
+    parser.add_argument('cities', nargs='*', help='query：攻击方 防守方；kills：攻击方')
+    parser.add_argument('--mods', type=parse_mods, default=0, help='攻击方修饰符，如 center+desperate')
+    parser.add_argument('--skills', action='store_true', help='使用套用被动技能数值的表')
+    parser.add_argument('--dir', default=TABLE_DIR, help=f'对战表目录（默认 {TABLE_DIR}）')
+    parser.add_argument('--check', action='store_true', help='build 时只检查，表过期时返回 1')
+    args = parser.parse_args()
+
+    battle_sim._require_numpy()
+    directory = table_dir(args.dir, args.skills)
+    if args.command == 'build':
+        if args.check:
+            try:
+                with open(os.path.join(directory, INDEX), 'r', encoding='utf-8') as f:
+                    current = json.load(f).get('source') == sources_digest()
+            except (OSError, ValueError):
+                current = False
+            print("✅ 对战表是最新的" if current else f"过期: {directory}（运行 python3 matchup_table.py build 重新生成）")
+            sys.exit(0 if current else 1)
+        start = time.perf_counter()
+        index = build(directory, args.skills)
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in ('power.npy', 'defender_hp.npy'))
+        modifiers, n, _ = index['shape']
+        print(f"{n} × {n} × {modifiers} 个修饰符组合，{size / 1024 / 1024:.1f} MB，"
+              f"用时 {time.perf_counter() - start:.1f} s → {directory}")
+        return
+
+    table = _open(args)
+    if args.command == 'info':
+        modifiers, n, _ = table.index['shape']
+        print(f"{directory}: {n} 座城市 × {modifiers} 个修饰符组合（{table.index['dtype']}），"
+              f"{'套用被动技能，' if table.index['skills'] else ''}源文件摘要 {table.index['source']}")
+        return
+
+    label = mods_label(args.mods)
+    try:
+        if args.command == 'query':
+            if len(args.cities) != 2:
+                parser.error('query 需要 攻击方 防守方 两个城市名')
+            power, damage, remaining, destroyed = table.lookup(args.cities[0], args.cities[1], args.mods)
+            print(f"{args.cities[0]} → {args.cities[1]}（{label}）：攻击力 {power}，伤害 {damage}，"
+                  f"剩余 HP {remaining}{'，摧毁' if destroyed else ''}")
+        else:
+            if len(args.cities) != 1:
+                parser.error('kills 需要一个攻击方城市名')
+            killed = table.kills(args.cities[0], args.mods)
+            print(f"{args.cities[0]}（{label}）一击摧毁 {len(killed)}/{len(table.names)} 座城市")
+            if killed:
+                print('、'.join(killed))
+    except KeyError as e:
+        raise SystemExit(f"❌ {e.args[0]}")
+
+
+if __name__ == '__main__':
+    main()
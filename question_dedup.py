@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+题库近似重复检测
+对 cityQuestions.js 中每道题取特征（题干的字符 k-gram + 每个选项整体），计算 MinHash 签名，
+再按 LSH 分段分桶：只有落进同一个桶的题目才比较，整体近似线性，不做 O(n²) 两两比较；
+候选对用精确 Jaccard 相似度复核后用并查集聚成重复簇
+
+索引保存在 .codemod/cache/question_index.json（按题目内容哈希存签名），
+--new 增量模式只为新增的题目计算签名，并只报告与新题有关的重复
+
+用法:
+  python3 question_dedup.py                      # 全量建索引并报告重复簇
+  python3 question_dedup.py --new                # 只检查上次建索引之后新增的题目
+  python3 question_dedup.py --threshold 0.6 --bands 32 --rows 4 --json report.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+
+import build_question_packs
+
+INDEX_FILE = os.path.join('.codemod', 'cache', 'question_index.json')
+INDEX_VERSION = 1
+
+# 2^61 - 1，MinHash 的排列取 (a * x + b) mod P
+PRIME = (1 << 61) - 1
+SEED = 20240601
+
+# 去掉空白和标点后再取特征，避免"？"和"?"之类的差别
+_NOISE = re.compile(r'[\s\W_]+', re.U)
+
+
+def normalize(text):
+    return _NOISE.sub('', text).lower()
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def content_key(item):
+    """题目内容哈希：同一道题在不同位置（城市/难度/序号）共享签名"""
+    return hashlib.sha1(json.dumps([item['question'], item['options']], ensure_ascii=False)
+                        .encode('utf-8')).hexdigest()
+
+
+def shingles(item, k):
+    """题干的字符 k-gram，加上去掉 'A. ' 标签后的每个选项（选项顺序无关）"""
+    question = normalize(item['question'])
+    features = {question[i:i + k] for i in range(max(1, len(question) - k + 1))}
+    _, options, _ = build_question_packs.encode_question(item)
+    features.update('\x01' + normalize(opt) for opt in options)
+    return {_hash64(f) for f in features}
+
+
+class MinHasher:
+    def __init__(self, num_perm, seed=SEED):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.perms = [(rng.randrange(1, PRIME), rng.randrange(0, PRIME)) for _ in range(num_perm)]
+
+    def signature(self, features):
+        return [min((a * x + b) % PRIME for x in features) for a, b in self.perms]
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def lsh_buckets(signatures, bands, rows):
+    """{(段号, 段内签名): [内容键]}"""
+    buckets = {}
+    for key, sig in signatures.items():
+        for band in range(bands):
+            chunk = tuple(sig[band * rows:(band + 1) * rows])
+            buckets.setdefault((band, chunk), []).append(key)
+    return buckets
+
+
+def candidate_pairs(buckets, only=None):
+    """同桶的内容键对；only 不为空时只产出至少一端在 only 中的对"""
+    pairs = set()
+    for keys in buckets.values():
+        if len(keys) < 2:
+            continue
+        for i, a in enumerate(keys):
+            for b in keys[i + 1:]:
+                if only is not None and a not in only and b not in only:
+                    continue
+                pairs.add((a, b) if a < b else (b, a))
+    return pairs
+
+
+def clusters_from_pairs(pairs):
+    """并查集：[(a, b)] -> [[键, ...]]"""
+    parent = {}
+
+    def find(x):
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for a, b in pairs:
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[rb] = ra
+    groups = {}
+    for x in parent:
+        groups.setdefault(find(x), []).append(x)
+    return [sorted(g) for g in groups.values()]
+
+
+def load_questions():
+    """返回 ({内容键: 题目}, {内容键: [(城市, 难度, 序号)]})"""
+    with open(build_question_packs.SOURCE, 'r', encoding='utf-8') as f:
+        bank = build_question_packs.parse_questions(f.read())
+    items = {}
+    places = {}
+    for city, levels in bank.items():
+        for level, questions in levels.items():
+            for i, item in enumerate(questions):
+                key = content_key(item)
+                items.setdefault(key, item)
+                places.setdefault(key, []).append((city, level, i + 1))
+    return items, places
+
+
+def load_index(params):
+    try:
+        with open(INDEX_FILE, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get('version') != INDEX_VERSION or index.get('params') != params:
+        return None
+    return index
+
+
+def save_index(params, signatures, occurrences):
+    os.makedirs(os.path.dirname(INDEX_FILE), exist_ok=True)
+    tmp_path = INDEX_FILE + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'params': params, 'signatures': signatures,
+                   'occurrences': occurrences}, f)
+    os.replace(tmp_path, INDEX_FILE)
+
+
+def _place(place):
+    city, level, number = place
+    return f"{city}/{level}#{number}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MinHash/LSH 题库近似重复检测')
+    parser.add_argument('--new', action='store_true', help='增量：只检查索引中没有的新题目')
+    parser.add_argument('--threshold', type=float, default=0.7, help='判为重复的 Jaccard 相似度（默认 0.7）')
+    parser.add_argument('--bands', type=int, default=32, help='LSH 段数（默认 32）')
+    parser.add_argument('--rows', type=int, default=4, help='每段行数（默认 4，签名长度 = 段数 × 行数）')
+    parser.add_argument('-k', type=int, default=2, help='题干字符 k-gram 长度（默认 2，中文按二元组）')
+    parser.add_argument('--json', metavar='PATH', help='把重复簇写成 JSON')
+    args = parser.parse_args()
+
+    params = {'k': args.k, 'num_perm': args.bands * args.rows, 'seed': SEED}
+    start = time.perf_counter()
+    items, places = load_questions()
+    hasher = MinHasher(params['num_perm'])
+
+    index = load_index(params) if args.new else None
+    if args.new and index is None:
+        print("没有可用的索引（或参数不同），改为全量建索引", file=sys.stderr)
+    stored = index['signatures'] if index else {}
+    stored_occurrences = index['occurrences'] if index else {}
+
+    new_keys = [key for key in items if key not in stored]
+    fresh = set(new_keys)
+    features = {}
+    signatures = {key: sig for key, sig in stored.items() if key in items}
+    for key in new_keys:
+        features[key] = shingles(items[key], args.k)
+        signatures[key] = hasher.signature(features[key])
+    removed = len(stored) - (len(signatures) - len(new_keys))
+    indexed = time.perf_counter() - start
+
+    buckets = lsh_buckets(signatures, args.bands, args.rows)
+    candidates = candidate_pairs(buckets, fresh if index else None)
+
+    # 候选对用精确 Jaccard 复核（特征按需计算）
+    pairs = []
+    for a, b in candidates:
+        for key in (a, b):
+            if key not in features:
+                features[key] = shingles(items[key], args.k)
+        similarity = jaccard(features[a], features[b])
+        if similarity >= args.threshold:
+            pairs.append((a, b, similarity))
+    clusters = clusters_from_pairs((a, b) for a, b, _ in pairs)
+    best = {}
+    for a, b, similarity in pairs:
+        for key in (a, b):
+            best[key] = max(best.get(key, 0), similarity)
+    elapsed = time.perf_counter() - start
+    save_index(params, signatures, {key: len(where) for key, where in places.items()})
+
+    # 同一道题在题库中出现多次（内容完全相同）也算重复；增量模式只报告出现次数增加的
+    clustered = {key for cluster in clusters for key in cluster}
+    exact = [key for key, where in places.items()
+             if len(where) > max(1, stored_occurrences.get(key, 0) if index else 1) and key not in clustered]
+    clusters += [[key] for key in exact]
+    clusters.sort(key=lambda c: (-sum(len(places[k]) for k in c), places[c[0]][0]))
+
+    mode = f"增量（新题 {len(new_keys)} 道，移除 {removed} 道）" if index else "全量"
+    print(f"{mode}：{len(items)} 道不同题目，签名 {params['num_perm']} 位（{args.bands} 段 × {args.rows} 行），"
+          f"候选对 {len(candidates)}，确认 {len(pairs)} 对，索引 {indexed * 1000:.0f} ms，总计 {elapsed * 1000:.0f} ms")
+
+    report = []
+    for n, cluster in enumerate(clusters, 1):
+        occurrences = [(key, place) for key in cluster for place in places[key]]
+        print(f"\n簇 {n}（{len(occurrences)} 处）:")
+        entries = []
+        for key, place in occurrences:
+            similarity = best.get(key, 1.0)
+            marker = ' [新]' if index and key in fresh else ''
+            print(f"  {similarity:4.2f}  {_place(place)}{marker}  {items[key]['question']}")
+            entries.append({'city': place[0], 'level': place[1], 'number': place[2],
+                            'question': items[key]['question'], 'similarity': round(similarity, 3),
+                            'new': bool(index and key in fresh)})
+        report.append(entries)
+
+    if not clusters:
+        print("\n✅ 没有发现近似重复的题目")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"\n报告已写入: {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+导出存档批量分析
+逐块读取 useGameSave.exportSave 导出的 JSON，边解析边统计，不把整份存档读进内存：
+- gameState.players 按 serializePlayers 的布局（玩家字段 + cities 数组）逐个玩家组装，
+  城市按 deserializePlayers 的规则补齐（isAlive !== false，currentHp || hp）
+- logs / playerPrivateLogs / roundActions 逐条组装、统计后即丢弃，内存只与单条记录大小有关
+- 目录下的存档分给多个进程，各自统计后合并
+
+统计:
+  技能   使用次数（公开日志中的"X 使用了技能"）、出现在多少份存档、平均使用回合
+  城市   出场次数、存活率、平均剩余 HP、作为中心城市的次数、城市技能【】使用次数
+  回合   公开 / 私密日志条数、技能使用次数、回合行动数、停在该回合的存档数
+
+用法:
+  python3 save_analyzer.py saves/                     # 递归分析目录下的 .json
+  python3 save_analyzer.py a.json b.json --workers 1
+  python3 save_analyzer.py saves/ --json report.json --top 30
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from json.decoder import scanstring
+
+import skill_registry
+
+READ_SIZE = 1 << 16
+# 只组装这些前缀下的值（map 的键用 . 连接，数组元素记为 item）
+PLAYER = 'gameState.players.item'
+ROUND = 'gameState.currentRound'
+LOG = 'logs.item'
+ACTION = 'roundActions.item'
+PRIVATE_LOG = 'playerPrivateLogs.*.item'
+WANTED = {PLAYER, ROUND, LOG, ACTION, PRIVATE_LOG}
+# 这些 map 的键是玩家名等任意值，前缀中记为 *
+WILDCARD = {'playerPrivateLogs'}
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_LITERAL = re.compile(r'-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null')
+_CITY_SKILL = re.compile(r'使用了\s*(\S+?)\s*的【([^】]+)】')
+
+
+# ---------------------------------------------------------------- 流式解析
+
+def iter_items(f, wanted=WANTED, wildcard=WILDCARD, read_size=READ_SIZE):
+    """
+    产出 (前缀, 值)：前缀在 wanted 中的对象 / 数组整体交给 json 的 C 解码器组装，
+    其余值逐个记号走过、不保存；缓冲区只保留尚未解析的部分，单个值跨块时再读一块拼上
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(read_size)
+    pos = 0
+    eof = not buffer
+    # 每层容器一项：path 为当前键（数组为 item），expect_key 为真时下一个字符串是键（数组为 None）
+    path = []
+    expect_key = []
+
+    def refill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(read_size)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos >= len(buffer):
+            if eof:
+                break
+            refill()
+            continue
+        char = buffer[pos]
+        if char in '}]':
+            if not path:
+                raise ValueError('多余的 }/]')
+            path.pop()
+            expect_key.pop()
+            pos += 1
+            continue
+        if char == ',':
+            if expect_key and expect_key[-1] is not None:
+                expect_key[-1] = True
+            pos += 1
+            continue
+        if char == ':':
+            pos += 1
+            continue
+        if char == '"':
+            try:
+                value, end = scanstring(buffer, pos + 1)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError('字符串没有结束')
+                refill()
+                continue
+            if expect_key and expect_key[-1]:
+                pos = end
+                expect_key[-1] = False
+                path[-1] = '*' if '.'.join(path[:-1]) in wildcard else value
+                continue
+        prefix = '.'.join(path)
+        if char in '{[':
+            if prefix not in wanted:
+                path.append(None if char == '{' else 'item')
+                expect_key.append(True if char == '{' else None)
+                pos += 1
+                continue
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError(f'{prefix} 不是完整的 JSON')
+                refill()
+                continue
+        elif char != '"':
+            match = _LITERAL.match(buffer, pos)
+            # 数字可能在块尾被截断（如 "2." + "5"），后面紧跟的不是分隔符时再读一块
+            if not match or (not eof and (match.end() == len(buffer) or buffer[match.end()] in '.eE+-')):
+                if eof:
+                    raise ValueError(f'无法解析的内容: {buffer[pos:pos + 20]!r}')
+                refill()
+                continue
+            value, end = json.loads(match.group()), match.end()
+        pos = end
+        if prefix in wanted:
+            yield prefix, value
+    if path:
+        raise ValueError('JSON 没有结束')
+
+
+# ---------------------------------------------------------------- 统计
+
+class Aggregates:
+    """可合并的统计结果；各项都是 名称 -> [计数...]"""
+
+    SKILL = ['uses', 'saves', 'roundSum']
+    CITY = ['appearances', 'alive', 'hpSum', 'centers', 'skillUses']
+    ROUND = ['logs', 'privateLogs', 'skillUses', 'actions', 'savesEnded']
+
+    def __init__(self):
+        self.files = 0
+        self.bytes = 0
+        self.errors = []
+        self.skills = {}
+        self.cities = {}
+        self.rounds = {}
+        self.actions = {}
+
+    @staticmethod
+    def _add(table, key, index, amount, width):
+        row = table.get(key)
+        if row is None:
+            row = table[key] = [0] * width
+        row[index] += amount
+
+    def skill(self, name, field, amount=1):
+        self._add(self.skills, name, self.SKILL.index(field), amount, len(self.SKILL))
+
+    def city(self, name, field, amount=1):
+        self._add(self.cities, name, self.CITY.index(field), amount, len(self.CITY))
+
+    def round(self, number, field, amount=1):
+        self._add(self.rounds, number, self.ROUND.index(field), amount, len(self.ROUND))
+
+    def merge(self, other):
+        self.files += other.files
+        self.bytes += other.bytes
+        self.errors.extend(other.errors)
+        for mine, theirs in ((self.skills, other.skills), (self.cities, other.cities), (self.rounds, other.rounds)):
+            for key, row in theirs.items():
+                if key in mine:
+                    mine[key] = [a + b for a, b in zip(mine[key], row)]
+                else:
+                    mine[key] = list(row)
+        for key, count in other.actions.items():
+            self.actions[key] = self.actions.get(key, 0) + count
+
+    def to_dict(self):
+        def rows(table, fields):
+            return {str(key): dict(zip(fields, row)) for key, row in table.items()}
+        return {
+            'files': self.files,
+            'bytes': self.bytes,
+            'errors': self.errors,
+            'skills': rows(self.skills, self.SKILL),
+            'cities': rows(self.cities, self.CITY),
+            'rounds': rows(self.rounds, self.ROUND),
+            'actions': self.actions,
+        }
+
+
+def deserialize_cities(player):
+    """与 deserializePlayers 相同：cities 可能是数组或对象，补齐 isAlive / currentHp"""
+    cities = player.get('cities') or []
+    if isinstance(cities, dict):
+        cities = list(cities.values())
+    return [dict(city, isAlive=city.get('isAlive') is not False,
+                 currentHp=city.get('currentHp') or city.get('hp') or 0)
+            for city in cities if isinstance(city, dict)]
+
+
+def _skill_pattern(names):
+    """'玩家 使用了技能：X' / '玩家 使用了 X' 等写法，X 取注册表中最长的匹配"""
+    alternatives = '|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True))
+    return re.compile(r'使用了\s*(?:(?:战斗)?技能\s*[:：]?\s*)?(' + alternatives + ')')
+
+
+_skill_names = None
+_skill_re = None
+
+
+def _init_worker(names=None):
+    global _skill_names, _skill_re
+    _skill_names = names if names is not None else sorted(skill_registry.load_registry().names)
+    _skill_re = _skill_pattern(_skill_names)
+
+
+def _log_round(entry, fallback):
+    value = entry.get('round')
+    return value if isinstance(value, int) else fallback
+
+
+def analyze_file(path):
+    """流式统计一份存档，解析失败时记入 errors"""
+    stats = Aggregates()
+    used = set()
+    current_round = 0
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for prefix, value in iter_items(f):
+                if prefix == ROUND:
+                    current_round = value if isinstance(value, int) else 0
+                elif prefix == PLAYER:
+                    center = value.get('centerCityName')
+                    for city in deserialize_cities(value):
+                        name = city.get('name')
+                        stats.city(name, 'appearances')
+                        if city['isAlive']:
+                            stats.city(name, 'alive')
+                            stats.city(name, 'hpSum', city['currentHp'])
+                        if name == center:
+                            stats.city(name, 'centers')
+                elif prefix == LOG:
+                    round_number = _log_round(value, current_round)
+                    stats.round(round_number, 'logs')
+                    message = value.get('message')
+                    if not isinstance(message, str) or '使用了' not in message:
+                        continue
+                    for match in _skill_re.finditer(message):
+                        skill = match.group(1)
+                        used.add(skill)
+                        stats.skill(skill, 'uses')
+                        stats.skill(skill, 'roundSum', round_number)
+                        stats.round(round_number, 'skillUses')
+                    for match in _CITY_SKILL.finditer(message):
+                        stats.city(match.group(1), 'skillUses')
+                elif prefix == ACTION:
+                    stats.round(_log_round(value, current_round), 'actions')
+                    action = str(value.get('action'))
+                    stats.actions[action] = stats.actions.get(action, 0) + 1
+                else:
+                    stats.round(_log_round(value, current_round), 'privateLogs')
+    except (OSError, ValueError, AttributeError, TypeError, IndexError) as e:
+        return _failed(path, e)
+    for skill in used:
+        stats.skill(skill, 'saves')
+    stats.round(current_round, 'savesEnded')
+    stats.files = 1
+    stats.bytes = os.path.getsize(path)
+    return stats
+
+
+def _failed(path, error):
+    stats = Aggregates()
+    stats.errors.append(f'{path}: {error}')
+    return stats
+
+
+def find_saves(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names) if name.endswith('.json'))
+        else:
+            files.append(path)
+    return files
+
+
+def analyze(files, workers, progress=True):
+    total = Aggregates()
+    names = sorted(skill_registry.load_registry().names)
+    if workers <= 1:
+        _init_worker(names)
+        results = map(analyze_file, files)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(names,))
+        results = pool.imap_unordered(analyze_file, files, chunksize=8)
+    try:
+        for done, part in enumerate(results, 1):
+            total.merge(part)
+            if progress and sys.stderr.isatty() and done % 100 == 0:
+                print(f"\r{done}/{len(files)} 份存档", end='', file=sys.stderr)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    if progress and sys.stderr.isatty() and len(files) >= 100:
+        print(file=sys.stderr)
+    total.errors.sort()
+    return total
+
+
+# ---------------------------------------------------------------- 报告
+
+def report(stats, elapsed, top):
+    print(f"{stats.files} 份存档（{stats.bytes / 1024 / 1024:.1f} MB），用时 {elapsed:.1f} s"
+          f"{f'，{len(stats.errors)} 份无法解析' if stats.errors else ''}")
+    for error in stats.errors[:10]:
+        print(f"  ❌ {error}")
+
+    skills = sorted(stats.skills.items(), key=lambda item: -item[1][0])
+    print(f"\n技能使用（共 {len(skills)} 种）:")
+    for name, (uses, saves, round_sum) in skills[:top]:
+        print(f"  {uses:>7} 次  {saves:>6} 份存档  平均第 {round_sum / uses:>5.1f} 回合  {name}")
+
+    cities = sorted(stats.cities.items(), key=lambda item: -item[1][0])
+    print(f"\n城市（共 {len(cities)} 座）:")
+    for name, (appearances, alive, hp_sum, centers, skill_uses) in cities[:top]:
+        mean_hp = hp_sum / alive if alive else 0
+        print(f"  {appearances:>7} 次出场  存活 {alive / appearances:>6.1%}  平均 HP {mean_hp:>9.0f}  "
+              f"中心 {centers:>5}  技能 {skill_uses:>5}  {name}")
+
+    print("\n回合:")
+    print(f"  {'回合':>4} {'公开日志':>8} {'私密日志':>8} {'技能':>6} {'行动':>6} {'存档停留':>8}")
+    for number in sorted(stats.rounds):
+        logs, private, skill_uses, actions, ended = stats.rounds[number]
+        print(f"  {number:>6} {logs:>10} {private:>10} {skill_uses:>8} {actions:>8} {ended:>10}")
+
+    if stats.actions:
+        print("\n回合行动:")
+        for action, count in sorted(stats.actions.items(), key=lambda item: -item[1])[:top]:
+            print(f"  {count:>7}  {action}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='流式、多进程统计导出的存档 JSON')
+    parser.add_argument('paths', nargs='+', help='存档文件或目录（目录递归查找 .json）')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='进程数（默认 CPU 核数）')
+    parser.add_argument('--top', type=int, default=20, help='技能、城市各输出前几名')
+    parser.add_argument('--json', help='把完整统计写入该 JSON 文件')
+    args = parser.parse_args()
+
+    files = find_saves(args.paths)
+    if not files:
+        raise SystemExit("❌ 没有找到存档 JSON")
+    start = time.perf_counter()
+    stats = analyze(files, min(args.workers, len(files)))
+    report(stats, time.perf_counter() - start, args.top)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(stats.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f"\n完整统计已写入 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
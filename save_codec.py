@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+紧凑二进制存档格式（参考实现）
+localStorage 约 5 MB 上限，长局的 logs / playerPrivateLogs 容易写满。该格式可无损表示任意 JSON 存档：
+- 字符串驻留：每个不同的字符串（键、城市名、技能名、玩家名、日志消息）只写一次，之后写编号
+- 整数用 zigzag varint；非整数用 float64，保留 1 与 1.0 的区别
+- 元素都是同键同序对象的数组（logs、私密日志、roundActions、城市列表等）按列存：
+  键只写一次，整数列写与上一行的差值，timestamp、round 这类单调列每项通常只占 1~2 字节
+
+布局: 'CCS' 版本(1 字节) 值
+值 = 类型(1 字节) 内容：
+  0 null  1 false  2 true  3 整数 zigzag varint  4 float64 小端
+  5 新字符串 varint 字节数 + UTF-8（依次编号 0,1,2...）  6 已有字符串 varint 编号
+  7 数组 varint 长度 + 值...  8 对象 varint 键数 + (键字符串值, 值)...
+  9 表 varint 行数 + varint 列数 + 键字符串值... + 每列: 0 逐项值 / 1 整数差值 varint...
+
+用法:
+  python3 save_codec.py encode save.json save.ccs
+  python3 save_codec.py decode save.ccs save.json
+  python3 save_codec.py bench saves/ [--repeat 5]     # 与 JSON 比较大小和编解码速度，并校验往返一致
+"""
+
+import argparse
+import base64
+import json
+import os
+import struct
+import sys
+import time
+import zlib
+
+import save_analyzer
+
+MAGIC = b'CCS'
+FORMAT_VERSION = 1
+
+NULL, FALSE, TRUE, INT, FLOAT, NEW_STRING, STRING, ARRAY, OBJECT, TABLE = range(10)
+COLUMN_VALUES, COLUMN_DELTA = 0, 1
+# 少于这么多行的数组不按表存（键表的开销不划算）
+TABLE_MIN_ROWS = 2
+
+_FLOAT = struct.Struct('<d')
+
+
+class FormatError(ValueError):
+    pass
+
+
+# ---------------------------------------------------------------- 编码
+
+def _varint(out, value):
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _is_int(value):
+    return type(value) is int
+
+
+class Encoder:
+
+    def __init__(self):
+        self.out = bytearray()
+        self.strings = {}
+
+    def string(self, value):
+        out = self.out
+        index = self.strings.get(value)
+        if index is not None:
+            out.append(STRING)
+            _varint(out, index)
+            return
+        self.strings[value] = len(self.strings)
+        data = value.encode('utf-8')
+        out.append(NEW_STRING)
+        _varint(out, len(data))
+        out += data
+
+    def value(self, value):
+        out = self.out
+        if value is None:
+            out.append(NULL)
+        elif value is True:
+            out.append(TRUE)
+        elif value is False:
+            out.append(FALSE)
+        elif isinstance(value, str):
+            self.string(value)
+        elif _is_int(value):
+            out.append(INT)
+            _varint(out, _zigzag(value))
+        elif isinstance(value, float):
+            out.append(FLOAT)
+            out += _FLOAT.pack(value)
+        elif isinstance(value, dict):
+            out.append(OBJECT)
+            _varint(out, len(value))
+            for key, item in value.items():
+                self.string(key)
+                self.value(item)
+        elif isinstance(value, list):
+            keys = _table_keys(value)
+            if keys is None:
+                out.append(ARRAY)
+                _varint(out, len(value))
+                for item in value:
+                    self.value(item)
+            else:
+                self.table(value, keys)
+        else:
+            raise TypeError(f'无法编码 {type(value).__name__}')
+
+    def table(self, rows, keys):
+        out = self.out
+        out.append(TABLE)
+        _varint(out, len(rows))
+        _varint(out, len(keys))
+        for key in keys:
+            self.string(key)
+        for key in keys:
+            column = [row[key] for row in rows]
+            if all(_is_int(item) for item in column):
+                out.append(COLUMN_DELTA)
+                previous = 0
+                for item in column:
+                    _varint(out, _zigzag(item - previous))
+                    previous = item
+            else:
+                out.append(COLUMN_VALUES)
+                for item in column:
+                    self.value(item)
+
+
+def _table_keys(rows):
+    """元素都是键顺序相同的对象时返回键元组，否则 None"""
+    if len(rows) < TABLE_MIN_ROWS or not isinstance(rows[0], dict) or not rows[0]:
+        return None
+    keys = tuple(rows[0])
+    for row in rows:
+        if not isinstance(row, dict) or len(row) != len(keys) or tuple(row) != keys:
+            return None
+    return keys
+
+
+def encode(data):
+    encoder = Encoder()
+    encoder.out += MAGIC
+    encoder.out.append(FORMAT_VERSION)
+    encoder.value(data)
+    return bytes(encoder.out)
+
+
+# ---------------------------------------------------------------- 解码
+
+class Decoder:
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+        self.strings = []
+
+    def varint(self):
+        data = self.data
+        result = 0
+        shift = 0
+        while True:
+            try:
+                byte = data[self.pos]
+            except IndexError:
+                raise FormatError('数据在 varint 中间结束') from None
+            self.pos += 1
+            result |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                return result
+            shift += 7
+
+    def signed(self):
+        value = self.varint()
+        return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+    def string(self):
+        tag = self.data[self.pos]
+        self.pos += 1
+        return self._string(tag)
+
+    def _string(self, tag):
+        if tag == STRING:
+            index = self.varint()
+            try:
+                return self.strings[index]
+            except IndexError:
+                raise FormatError(f'字符串编号越界: {index}') from None
+        if tag != NEW_STRING:
+            raise FormatError(f'应为字符串，实际类型 {tag}')
+        size = self.varint()
+        end = self.pos + size
+        if end > len(self.data):
+            raise FormatError('数据在字符串中间结束')
+        value = self.data[self.pos:end].decode('utf-8')
+        self.pos = end
+        self.strings.append(value)
+        return value
+
+    def value(self):
+        try:
+            tag = self.data[self.pos]
+        except IndexError:
+            raise FormatError('数据提前结束') from None
+        self.pos += 1
+        if tag == NULL:
+            return None
+        if tag == FALSE:
+            return False
+        if tag == TRUE:
+            return True
+        if tag == INT:
+            return self.signed()
+        if tag == FLOAT:
+            end = self.pos + 8
+            if end > len(self.data):
+                raise FormatError('数据在浮点数中间结束')
+            value = _FLOAT.unpack_from(self.data, self.pos)[0]
+            self.pos = end
+            return value
+        if tag in (NEW_STRING, STRING):
+            return self._string(tag)
+        if tag == ARRAY:
+            return [self.value() for _ in range(self.varint())]
+        if tag == OBJECT:
+            result = {}
+            for _ in range(self.varint()):
+                key = self.string()
+                result[key] = self.value()
+            return result
+        if tag == TABLE:
+            return self.table()
+        raise FormatError(f'未知类型 {tag}（位置 {self.pos - 1}）')
+
+    def table(self):
+        count = self.varint()
+        keys = [self.string() for _ in range(self.varint())]
+        columns = []
+        for _ in keys:
+            kind = self.data[self.pos]
+            self.pos += 1
+            if kind == COLUMN_DELTA:
+                column = []
+                previous = 0
+                for _ in range(count):
+                    previous += self.signed()
+                    column.append(previous)
+            elif kind == COLUMN_VALUES:
+                column = [self.value() for _ in range(count)]
+            else:
+                raise FormatError(f'未知列类型 {kind}')
+            columns.append(column)
+        return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+def decode(data):
+    if data[:len(MAGIC)] != MAGIC or len(data) <= len(MAGIC):
+        raise FormatError('不是紧凑存档（文件头不对）')
+    if data[len(MAGIC)] != FORMAT_VERSION:
+        raise FormatError(f'不支持的格式版本 {data[len(MAGIC)]}')
+    decoder = Decoder(data)
+    decoder.pos = len(MAGIC) + 1
+    try:
+        value = decoder.value()
+    except (IndexError, UnicodeDecodeError) as e:
+        raise FormatError(f'数据损坏（位置 {decoder.pos}）: {e}') from None
+    if decoder.pos != len(data):
+        raise FormatError(f'末尾多出 {len(data) - decoder.pos} 字节')
+    return value
+
+
+# ---------------------------------------------------------------- 基准
+
+def _stringify(data):
+    """与 JSON.stringify 相同的紧凑写法"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def _same(a, b):
+    """逐项比较，连 int / float / bool 的类型也要一致"""
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return list(a) == list(b) and all(_same(a[key], b[key]) for key in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    return a == b or (a != a and b != b)
+
+
+def _best(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench(files, repeat):
+    """返回 (每个文件的结果, 失败列表)"""
+    rows = []
+    failures = []
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            failures.append(f'{path}: 不是 JSON（{e}）')
+            continue
+        compact = _stringify(data).encode('utf-8')
+        json_encode, _ = _best(lambda: _stringify(data).encode('utf-8'), repeat)
+        json_decode, _ = _best(lambda: json.loads(compact), repeat)
+        binary_encode, binary = _best(lambda: encode(data), repeat)
+        binary_decode, restored = _best(lambda: decode(binary), repeat)
+        if not _same(data, restored) or _stringify(restored).encode('utf-8') != compact:
+            failures.append(f'{path}: 往返结果不一致')
+        rows.append({
+            'file': path,
+            'json': len(compact),
+            'binary': len(binary),
+            'base64': len(base64.b64encode(binary)),
+            'jsonDeflate': len(zlib.compress(compact, 6)),
+            'binaryDeflate': len(zlib.compress(binary, 6)),
+            'jsonEncode': json_encode,
+            'jsonDecode': json_decode,
+            'binaryEncode': binary_encode,
+            'binaryDecode': binary_decode,
+        })
+    return rows, failures
+
+
+def report(rows, failures):
+    if rows:
+        total = {key: sum(row[key] for row in rows) for key in rows[0] if key != 'file'}
+        json_size = total['json']
+        print(f"{len(rows)} 份存档")
+        print(f"  {'格式':<16} {'字节数':>12} {'相对 JSON':>10}")
+        for label, key in (('JSON', 'json'), ('二进制', 'binary'), ('二进制 base64', 'base64'),
+                           ('JSON + deflate', 'jsonDeflate'), ('二进制 + deflate', 'binaryDeflate')):
+            print(f"  {label:<16} {total[key]:>12} {total[key] / json_size:>10.1%}")
+        mb = json_size / 1024 / 1024
+        print(f"\n  {'':<16} {'编码':>12} {'解码':>12}   （全部文件，取 {len(rows)} 份各自最快一次之和）")
+        for label, prefix in (('JSON（C 实现）', 'json'), ('二进制（纯 Python）', 'binary')):
+            encode_time, decode_time = total[prefix + 'Encode'], total[prefix + 'Decode']
+            print(f"  {label:<16} {encode_time * 1000:>9.1f} ms {decode_time * 1000:>9.1f} ms"
+                  f"   {mb / max(encode_time, 1e-9):>6.1f} / {mb / max(decode_time, 1e-9):>6.1f} MB/s")
+        largest = max(rows, key=lambda row: row['json'])
+        print(f"\n最大的存档 {largest['file']}: JSON {largest['json']} → 二进制 {largest['binary']} 字节"
+              f"（{largest['binary'] / largest['json']:.1%}）")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if rows and not failures:
+        print("✅ 全部往返一致（逐项比较且重新序列化后与 JSON.stringify 结果相同）")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='紧凑二进制存档的编码、解码和与 JSON 的对比')
+    parser.add_argument('command', choices=['encode', 'decode', 'bench'])
+    parser.add_argument('paths', nargs='+', help='encode / decode：输入 输出；bench：存档文件或目录')
+    parser.add_argument('--repeat', type=int, default=3, help='bench：每项计时重复次数，取最快一次')
+    parser.add_argument('--json', help='bench：把逐文件结果写入该 JSON 文件')
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        files = save_analyzer.find_saves(args.paths)
+        if not files:
+            raise SystemExit("❌ 没有找到存档 JSON")
+        rows, failures = bench(files, args.repeat)
+        report(rows, failures)
+        if args.json:
+            with open(args.json, 'w', encoding='utf-8') as f:
+                json.dump(rows, f, ensure_ascii=False, indent=2)
+        sys.exit(1 if failures else 0)
+
+    if len(args.paths) != 2:
+        parser.error(f'{args.command} 需要 输入 输出 两个路径')
+    source, target = args.paths
+    try:
+        if args.command == 'encode':
+            with open(source, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            output = encode(data)
+            mode = 'wb'
+        else:
+            with open(source, 'rb') as f:
+                output = _stringify(decode(f.read()))
+            mode = 'w'
+    except (OSError, ValueError) as e:
+        raise SystemExit(f"❌ {source}: {e}")
+    tmp_path = target + '.tmp'
+    with open(tmp_path, mode, **({} if mode == 'wb' else {'encoding': 'utf-8'})) as f:
+        f.write(output)
+    os.replace(tmp_path, target)
+    print(f"{source} ({os.path.getsize(source)} 字节) → {target} ({os.path.getsize(target)} 字节)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+整局模拟的分片任务队列（协调者 / 工作者）
+把 game_sim 的对局按种子区间切成分片，放进一个共享目录作为工作队列，多台机器挂载同一目录即可一起跑：
+  <队列目录>/job.json        任务配置（对局参数、种子、每块对局数）
+  <队列目录>/pending/<分片>  待领取的分片
+  <队列目录>/leased/<分片>   已被领取；工作者定期更新 mtime 作为心跳（租约）
+  <队列目录>/done/<分片>.json 分片结果（game_sim.Tally，可任意顺序相加）
+- 领取用 rename(pending → leased)，同一分片只会被一个工作者拿到
+- 工作者崩溃时只丢失它的租约：心跳超过 --lease 秒未更新的分片会被任何工作者或 reap 放回 pending
+- 分片结果只由 (种子, 块号) 决定，超时后被重复计算也只会写出相同的结果
+- collect 合并已完成的分片（部分完成时也可以先看中间结果）
+
+用法:
+  python3 sim_queue.py submit /shared/q1 --games 10000000 --players 3
+  python3 sim_queue.py work /shared/q1 --processes 8        # 每台机器上运行
+  python3 sim_queue.py status /shared/q1
+  python3 sim_queue.py reap /shared/q1                      # 手动回收过期租约
+  python3 sim_queue.py collect /shared/q1 --json report.json
+  python3 sim_queue.py local /tmp/q --games 200000 --workers 4   # 单机多进程代替多节点
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+
+import battle_sim
+import game_sim
+
+JOB = 'job.json'
+STATES = ['pending', 'leased', 'done']
+LEASE_SECONDS = 60
+# 每个分片包含的 game_sim 块数
+SHARD_CHUNKS = 4
+
+
+def _path(queue, *parts):
+    return os.path.join(queue, *parts)
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.tmp-{socket.gethostname()}-{os.getpid()}'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def shard_name(index):
+    return f'shard-{index:06d}'
+
+
+def load_job(queue):
+    try:
+        return _read_json(_path(queue, JOB))
+    except OSError:
+        raise SystemExit(f"❌ {queue} 不是任务队列（没有 {JOB}），先运行 submit")
+
+
+# ---------------------------------------------------------------- 协调者
+
+def submit(queue, games, config, seed, chunk_size, shard_chunks):
+    """切分片并写入队列；返回分片数"""
+    if os.path.exists(_path(queue, JOB)):
+        raise SystemExit(f"❌ {queue} 中已有任务，换一个目录或先删除")
+    for state in STATES:
+        os.makedirs(_path(queue, state), exist_ok=True)
+    tasks = game_sim.chunk_tasks(games, config, seed, chunk_size)
+    shards = [tasks[i:i + shard_chunks] for i in range(0, len(tasks), shard_chunks)]
+    for index, shard in enumerate(shards):
+        _write_json(_path(queue, 'pending', shard_name(index)),
+                    {'chunks': [[chunk, count] for chunk, count, _, _ in shard]})
+    # job.json 最后写入：工作者看到它时分片已经全部就位
+    _write_json(_path(queue, JOB), {
+        'config': config, 'seed': seed, 'games': games, 'chunk': chunk_size,
+        'shards': len(shards), 'submitted': time.time(),
+    })
+    return len(shards)
+
+
+def reap(queue, lease_seconds):
+    """把心跳过期的租约放回 pending，返回回收的分片名"""
+    now = time.time()
+    reaped = []
+    leased = _path(queue, 'leased')
+    for name in sorted(os.listdir(leased)):
+        path = _path(queue, 'leased', name)
+        try:
+            expired = now - os.stat(path).st_mtime > lease_seconds
+            if expired and os.path.exists(_path(queue, 'done', name + '.json')):
+                os.remove(path)
+            elif expired:
+                os.rename(path, _path(queue, 'pending', name))
+                reaped.append(name)
+        except FileNotFoundError:
+            continue  # 工作者刚好完成或其他进程已回收
+    return reaped
+
+
+def queue_status(queue):
+    return {state: sorted(name for name in os.listdir(_path(queue, state)) if '.tmp-' not in name)
+            for state in STATES}
+
+
+def collect(queue):
+    """合并 done/ 中的全部分片，返回 (Tally, 已完成分片数, 计算秒数合计, 最后完成时间)"""
+    tally = game_sim.Tally(len(battle_sim.load_roster()))
+    seconds = 0.0
+    last = 0.0
+    names = queue_status(queue)['done']
+    for name in names:
+        path = _path(queue, 'done', name)
+        result = _read_json(path)
+        tally.merge(game_sim.Tally.from_dict(result['tally']))
+        seconds += result['seconds']
+        last = max(last, os.stat(path).st_mtime)
+    return tally, len(names), seconds, last
+
+
+# ---------------------------------------------------------------- 工作者
+
+class Heartbeat(threading.Thread):
+    """后台定期更新租约文件的 mtime；租约被回收（文件不见了）时记下 lost"""
+
+    def __init__(self, path, interval):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.lost = False
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                self.lost = True
+                return
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def claim(queue):
+    """领取一个分片，返回分片名；没有待领取的分片时返回 None"""
+    for name in sorted(os.listdir(_path(queue, 'pending'))):
+        if '.tmp-' in name:
+            continue
+        try:
+            # 先刷新 mtime 再移动：rename 保留提交时的 mtime，晚启动的工作者领到的租约会立刻被判为过期
+            os.utime(_path(queue, 'pending', name))
+            os.rename(_path(queue, 'pending', name), _path(queue, 'leased', name))
+        except FileNotFoundError:
+            continue  # 被其他工作者抢先领取
+        try:
+            os.utime(_path(queue, 'leased', name))
+        except FileNotFoundError:
+            continue  # 刚领取就被回收，交给重新领取的工作者
+        return name
+    return None
+
+
+def run_shard(queue, name, job, worker_id, lease_seconds):
+    lease = _path(queue, 'leased', name)
+    try:
+        shard = _read_json(lease)
+    except FileNotFoundError:
+        return False
+    heartbeat = Heartbeat(lease, max(lease_seconds / 4, 0.05))
+    heartbeat.start()
+    start = time.perf_counter()
+    tally = game_sim.Tally(len(game_sim._roster))
+    try:
+        for chunk, games in shard['chunks']:
+            tally.merge(game_sim.run_chunk((chunk, games, job['config'], job['seed'])))
+    finally:
+        heartbeat.stop()
+    _write_json(_path(queue, 'done', name + '.json'), {
+        'tally': tally.to_dict(), 'chunks': shard['chunks'], 'worker': worker_id,
+        'seconds': time.perf_counter() - start,
+    })
+    try:
+        os.remove(lease)
+    except FileNotFoundError:
+        pass  # 租约已被回收并重新分配，结果相同，不影响合并
+    if heartbeat.lost:
+        print(f"[{worker_id}] {name} 的租约曾过期被回收（结果仍已写入）", file=sys.stderr)
+    return True
+
+
+def work(queue, worker_id, lease_seconds, wait=False, poll=1.0):
+    """领取并计算分片直到队列清空；wait 为真时等待其他工作者的租约结束或过期"""
+    job = load_job(queue)
+    game_sim._init_worker()
+    completed = 0
+    while True:
+        reap(queue, lease_seconds)
+        name = claim(queue)
+        if name is None:
+            if wait and queue_status(queue)['leased']:
+                time.sleep(poll)
+                continue
+            break
+        if run_shard(queue, name, job, worker_id, lease_seconds):
+            completed += 1
+            print(f"[{worker_id}] 完成 {name}", file=sys.stderr)
+    return completed
+
+
+def _work_process(queue, worker_id, lease_seconds, wait):
+    work(queue, worker_id, lease_seconds, wait)
+
+
+def start_workers(queue, count, lease_seconds, wait, prefix):
+    processes = [multiprocessing.Process(target=_work_process, args=(queue, f'{prefix}-{i}', lease_seconds, wait))
+                 for i in range(count)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+# ---------------------------------------------------------------- 命令行
+
+def print_status(queue):
+    job = load_job(queue)
+    status = queue_status(queue)
+    done = len(status['done'])
+    print(f"{queue}: {job['games']} 局，{job['shards']} 个分片 —— 待领取 {len(status['pending'])}，"
+          f"进行中 {len(status['leased'])}，已完成 {done}（{done / max(job['shards'], 1):.0%}）")
+    now = time.time()
+    for name in status['leased']:
+        try:
+            age = now - os.stat(_path(queue, 'leased', name)).st_mtime
+        except FileNotFoundError:
+            continue
+        print(f"  {name} 心跳 {age:.0f} s 前")
+
+
+def print_collect(queue, top, min_appearances, json_path):
+    job = load_job(queue)
+    tally, done, seconds, last = collect(queue)
+    if done < job['shards']:
+        print(f"⚠️  只完成 {done}/{job['shards']} 个分片，以下为部分结果\n")
+    roster = battle_sim.load_roster()
+    game_sim.report(roster, tally, job['config'], max(last - job['submitted'], 1e-9), top, min_appearances)
+    print(f"\n计算时间合计 {seconds:.1f} s（{tally.games / max(seconds, 1e-9):.0f} 局/秒/进程）")
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(game_sim.json_report(roster, tally, job['config']), f, ensure_ascii=False, indent=1)
+        print(f"报告已写入: {json_path}")
+    return done == job['shards']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='整局模拟的分片任务队列（共享目录）')
+    parser.add_argument('command', choices=['submit', 'work', 'status', 'reap', 'collect', 'local'])
+    parser.add_argument('queue', help='队列目录（多节点时为共享目录）')
+    parser.add_argument('--games', type=int, default=1000000, help='submit / local：对局数（默认 1000000）')
+    game_sim.add_game_arguments(parser)
+    parser.add_argument('--chunk', type=int, default=game_sim.CHUNK_SIZE, help='每块对局数（影响随机序列）')
+    parser.add_argument('--shard-chunks', type=int, default=SHARD_CHUNKS, help=f'每个分片的块数（默认 {SHARD_CHUNKS}）')
+    parser.add_argument('--processes', type=int, default=1, help='work：本机启动的工作进程数')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='local：工作进程数（默认 CPU 核数）')
+    parser.add_argument('--id', default=f'{socket.gethostname()}-{os.getpid()}', help='工作者名称')
+    parser.add_argument('--lease', type=float, default=LEASE_SECONDS, help=f'租约超时秒数（默认 {LEASE_SECONDS}）')
+    parser.add_argument('--wait', action='store_true', help='work：队列清空后继续等待其他工作者的租约结束或过期')
+    parser.add_argument('--top', type=int, default=10, help='collect：各表列出的最高和最低项数')
+    parser.add_argument('--min-appearances', type=int, default=100, help='collect：列入胜率表的最少出场次数')
+    parser.add_argument('--json', metavar='PATH', help='collect：把完整统计写成 JSON')
+    args = parser.parse_args()
+
+    battle_sim._require_numpy()
+    if args.command == 'submit':
+        count = submit(args.queue, args.games, game_sim.game_config(args), args.seed, args.chunk, args.shard_chunks)
+        print(f"已提交 {args.games} 局，{count} 个分片 → {args.queue}")
+    elif args.command == 'work':
+        if args.processes <= 1:
+            completed = work(args.queue, args.id, args.lease, args.wait)
+            print(f"[{args.id}] 完成 {completed} 个分片")
+        else:
+            for process in start_workers(args.queue, args.processes, args.lease, args.wait, args.id):
+                process.join()
+        print_status(args.queue)
+    elif args.command == 'status':
+        print_status(args.queue)
+    elif args.command == 'reap':
+        load_job(args.queue)
+        reaped = reap(args.queue, args.lease)
+        print(f"回收 {len(reaped)} 个过期租约" + (f": {', '.join(reaped)}" if reaped else ''))
+    elif args.command == 'collect':
+        sys.exit(0 if print_collect(args.queue, args.top, args.min_appearances, args.json) else 1)
+    else:
+        count = submit(args.queue, args.games, game_sim.game_config(args), args.seed, args.chunk, args.shard_chunks)
+        print(f"已提交 {args.games} 局，{count} 个分片，启动 {args.workers} 个工作进程")
+        for process in start_workers(args.queue, args.workers, args.lease, True, 'local'):
+            process.join()
+        print_collect(args.queue, args.top, args.min_appearances, args.json)
+
+
+if __name__ == '__main__':
+    main()
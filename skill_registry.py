@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+技能注册表
+从 JS 源码自动提取技能信息，取代各脚本里手抄的 SKILL_MAP：
+- 技能名称、费用、战斗/非战斗分类：src/data/skills.js、src/data/skillMetadata.js、src/constants/skillCosts.js
+- 函数名 -> 技能名：useSkillEffects.js 的分发表、函数体内的 checkAndDeductGold 和函数注释
+
+提取结果缓存在 .codemod/cache/skill_registry.json，按源文件 mtime 和哈希校验，
+源文件未变化时直接读缓存，查询均为 O(1) 字典查找
+
+用法: python3 skill_registry.py [--rebuild] [技能名或函数名 ...]
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+
+import dry_run
+import function_index
+import js_lexer
+
+CACHE_DIR = os.path.join('.codemod', 'cache')
+CACHE_FILE = os.path.join(CACHE_DIR, 'skill_registry.json')
+CACHE_VERSION = 1
+
+DATA_SOURCES = [
+    'src/data/skills.js',
+    'src/data/skillMetadata.js',
+    'src/constants/skillCosts.js',
+]
+MODULE_SOURCES = {
+    'nonBattle': 'src/composables/skills/nonBattleSkills.js',
+    'battle': 'src/composables/skills/battleSkills.js',
+}
+DISPATCH_SOURCE = 'src/composables/useSkillEffects.js'
+
+FUNCTION_PREFIX = 'execute'
+
+
+def _read(root, path):
+    with open(os.path.join(root, path), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _block_tokens(content, name):
+    """取 name = [...] 或 name = {...} 字面量内的 token（不含注释），返回 (块文本, tokens)"""
+    match = re.search(r'\b' + re.escape(name) + r'\s*=\s*([\[{])', content)
+    if not match:
+        return '', []
+    start = match.start(1)
+    block = content[start:js_lexer.match_bracket(content, start)]
+    return block, [t for t in js_lexer.tokenize(block) if t.kind != 'comment']
+
+
+def _string_value(block, tok):
+    return block[tok.start + 1:tok.end - 1]
+
+
+def object_entries(content, name):
+    """解析对象字面量的顶层 '键': 值，值为数字时转为 int/float，否则保留源码文本"""
+    block, tokens = _block_tokens(content, name)
+    entries = {}
+    depth = 0
+    for i, tok in enumerate(tokens):
+        text = block[tok.start:tok.end]
+        if tok.kind == 'punct':
+            if text in '([{':
+                depth += 1
+            elif text in ')]}':
+                depth -= 1
+            continue
+        if (depth == 1 and tok.kind == 'string' and i + 2 < len(tokens)
+                and block[tokens[i + 1].start:tokens[i + 1].end] == ':'):
+            value_tok = tokens[i + 2]
+            value = block[value_tok.start:value_tok.end]
+            if value_tok.kind == 'number':
+                value = float(value) if '.' in value else int(value)
+            entries[_string_value(block, tok)] = value
+    return entries
+
+
+def array_strings(content, name):
+    """解析数组字面量中的顶层字符串元素"""
+    block, tokens = _block_tokens(content, name)
+    items = []
+    depth = 0
+    for tok in tokens:
+        text = block[tok.start:tok.end]
+        if tok.kind == 'punct':
+            if text in '([{':
+                depth += 1
+            elif text in ')]}':
+                depth -= 1
+        elif depth == 1 and tok.kind == 'string':
+            items.append(_string_value(block, tok))
+    return items
+
+
+def _doc_title(content, start):
+    """取函数前紧邻的 /** */ 注释首行"""
+    head = content[max(0, start - 500):start]
+    match = re.search(r'/\*\*((?:(?!\*/).)*)\*/\s*$', head, re.S)
+    if not match:
+        return None
+    for line in match.group(1).splitlines():
+        line = line.strip(' *\t')
+        if line:
+            return line
+    return None
+
+
+def _match_known_name(title, names):
+    """注释首行以已知技能名开头时返回最长的那个"""
+    best = None
+    for name in names:
+        if title.startswith(name) and (best is None or len(name) > len(best)):
+            best = name
+    return best
+
+
+def extract(root='.'):
+    """从 JS 源码提取注册表数据（不读写缓存）"""
+    skills_js = _read(root, 'src/data/skills.js')
+    metadata_js = _read(root, 'src/data/skillMetadata.js')
+    costs_js = _read(root, 'src/constants/skillCosts.js')
+
+    costs = object_entries(costs_js, 'SKILL_COSTS')
+    restrictions = object_entries(skills_js, 'SKILL_RESTRICTIONS')
+    battle = set(array_strings(skills_js, 'BATTLE_SKILLS')) | set(array_strings(metadata_js, 'BATTLE_SKILLS'))
+    non_battle = set(array_strings(skills_js, 'NON_BATTLE_SKILLS')) | set(array_strings(metadata_js, 'NON_BATTLE_SKILLS'))
+    names = set(costs) | set(restrictions) | battle | non_battle
+
+    # 分发表：case '技能名': return xxxSkills.executeXxx(...)
+    dispatch = {}
+    dispatch_js = _read(root, DISPATCH_SOURCE)
+    for match in re.finditer(r"case\s+'([^']+)'\s*:\s*return\s+\w+\.(" + FUNCTION_PREFIX + r"\w+)\(", dispatch_js):
+        dispatch.setdefault(match.group(2), match.group(1))
+
+    functions = {}
+    modules = {}
+    for module, path in MODULE_SOURCES.items():
+        content = _read(root, path)
+        for span in function_index.scan_functions(content, FUNCTION_PREFIX):
+            key = span.name[len(FUNCTION_PREFIX):]
+            if key in functions:
+                continue
+            skill = dispatch.get(span.name)
+            if skill is None:
+                gold = re.search(r"checkAndDeductGold\(\s*'([^']+)'", content[span.body:span.end])
+                skill = gold.group(1) if gold else None
+            if skill is None:
+                title = _doc_title(content, span.start)
+                if title:
+                    skill = _match_known_name(title, names) or re.split(r'[\s\-（(]', title, 1)[0]
+            if skill:
+                functions[key] = skill
+                modules[key] = module
+
+    return {
+        'names': sorted(names),
+        'costs': costs,
+        'battle': sorted(battle),
+        'functions': functions,
+        'modules': modules,
+    }
+
+
+class SkillRegistry:
+    """技能注册表，所有查询均为字典查找"""
+
+    def __init__(self, data):
+        self.names = frozenset(data['names'])
+        self.costs = data['costs']
+        self.battle = frozenset(data['battle'])
+        # 函数名去掉 execute 前缀 -> 技能名，与原 SKILL_MAP 的键一致
+        self.functions = data['functions']
+        self.modules = data['modules']
+        self._by_skill = {}
+        for key, skill in self.functions.items():
+            self._by_skill.setdefault(skill, FUNCTION_PREFIX + key)
+
+    def skill_for_function(self, func_name):
+        """executeXxx 或 Xxx -> 技能名"""
+        if func_name.startswith(FUNCTION_PREFIX):
+            func_name = func_name[len(FUNCTION_PREFIX):]
+        return self.functions.get(func_name)
+
+    def function_for_skill(self, skill_name):
+        """技能名 -> executeXxx"""
+        return self._by_skill.get(skill_name)
+
+    def cost(self, skill_name):
+        return self.costs.get(skill_name)
+
+    def is_battle_skill(self, skill_name):
+        return skill_name in self.battle
+
+
+def _fingerprint(root, path, cached=None):
+    """源文件指纹 [mtime_ns, size, sha256]；mtime 和大小未变时沿用缓存中的哈希"""
+    stat = os.stat(os.path.join(root, path))
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached
+    with open(os.path.join(root, path), 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return [stat.st_mtime_ns, stat.st_size, digest]
+
+
+def source_paths():
+    return DATA_SOURCES + list(MODULE_SOURCES.values()) + [DISPATCH_SOURCE]
+
+
+def load_registry(root='.', use_cache=True, rebuild=False):
+    """读取注册表；缓存有效时不解析任何 JS 文件，rebuild=True 时忽略旧缓存重新提取"""
+    cache_path = os.path.join(root, CACHE_FILE)
+    cached = None
+    if use_cache and not rebuild and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            cached = None
+        if cached and cached.get('version') != CACHE_VERSION:
+            cached = None
+
+    old_sources = cached['sources'] if cached else {}
+    sources = {path: _fingerprint(root, path, old_sources.get(path)) for path in source_paths()}
+
+    if cached and all(sources[p][2] == (old_sources.get(p) or [None, None, None])[2] for p in sources):
+        if sources != old_sources and not dry_run.active():
+            # 只是 mtime 变了（例如 git checkout），刷新指纹避免下次重新哈希
+            _write_cache(cache_path, sources, cached['registry'])
+        return SkillRegistry(cached['registry'])
+
+    data = extract(root)
+    # 预演时不更新缓存
+    if use_cache and not dry_run.active():
+        _write_cache(cache_path, sources, data)
+    return SkillRegistry(data)
+
+
+def _write_cache(cache_path, sources, data):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'sources': sources, 'registry': data},
+                  f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, cache_path)
+
+
+def main():
+    args = sys.argv[1:]
+    rebuild = '--rebuild' in args
+    queries = [a for a in args if a != '--rebuild']
+
+    registry = load_registry(rebuild=rebuild)
+
+    if not queries:
+        print(f"技能总数: {len(registry.names)}（战斗技能 {len(registry.battle)} 个）")
+        print(f"已关联函数: {len(registry.functions)} 个")
+        unknown = sorted(k for k, v in registry.functions.items() if v not in registry.names)
+        if unknown:
+            print("⚠️  以下函数对应的技能不在技能表中：")
+            for key in unknown:
+                print(f"   - {FUNCTION_PREFIX}{key} -> {registry.functions[key]}")
+        return
+
+    for query in queries:
+        skill = registry.skill_for_function(query)
+        if skill:
+            print(f"{query} -> {skill}（{registry.cost(skill)} 金币）")
+            continue
+        func = registry.function_for_skill(query)
+        if func or query in registry.names:
+            print(f"{query} -> {func or '无对应函数'}（{registry.cost(query)} 金币）")
+        else:
+            print(f"{query}: 未找到")
+
+
+if __name__ == '__main__':
+    main()
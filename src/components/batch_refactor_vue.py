@@ -1,21 +1,69 @@
 #!/usr/bin/env python3
 """
 批量重构Vue组件：从数组索引改为城市名称
+
+自动发现 src/ 及 citycard-vue/src/ 下所有 .vue/.js 文件，用进程池并行转换，
+原子写入并输出每个文件的耗时汇总
+
+用法: python3 batch_refactor_vue.py [目录 ...] [-j 进程数] [--top N]
 """
 
+import argparse
 import os
 import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def refactor_vue_file(filepath):
-    """重构单个Vue文件"""
-    print(f"Processing {filepath.name}...")
+PATTERNS = ('*.vue', '*.js')
+EXCLUDED_DIRS = {'node_modules', 'dist', 'dist-ssr', '.git', '.codemod'}
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
 
-    original_content = content
+_FOREACH_INDEX = re.compile(r'\.cities\.forEach\(\(city, (idx|index|cityIdx)\)')
+
+
+def _call_end(content, start):
+    """从 forEach( 之后的位置起找到与之配对的 )，返回其后的位置（跳过字符串和注释）"""
+    depth = 1
+    i = start
+    while i < len(content):
+        char = content[i]
+        if char in '\'"`':
+            i += 1
+            while i < len(content) and content[i] != char:
+                i += 2 if content[i] == '\\' else 1
+        elif content.startswith('//', i):
+            i = content.find('\n', i)
+            if i < 0:
+                break
+        elif content.startswith('/*', i):
+            i = content.find('*/', i)
+            if i < 0:
+                break
+            i += 1
+        elif char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return len(content)
+
+
+def _drop_unused_index(match):
+    content = match.string
+    # 回调体 = 参数列表之后到 forEach( 配对的 ) 为止；字符串、注释里出现同名也算用到，宁可不改
+    body = content[match.end():_call_end(content, match.start() + len('.cities.forEach('))]
+    if re.search(r'(?<![\w$.])' + match.group(1) + r'(?![\w$])', body):
+        return match.group(0)
+    return '.cities.forEach((city)'
+
 
+def refactor_content(content):
+    """对文件内容应用全部重构规则，返回新内容"""
     # 1. 替换 centerIndex -> centerCityName
     content = re.sub(r'\.centerIndex', '.centerCityName', content)
     content = re.sub(r'centerIndex\s*:', 'centerCityName:', content)
@@ -28,12 +76,8 @@ def refactor_vue_file(filepath):
     )
 
     # 3. 替换 cities.forEach((city, idx) -> Object.values(cities).forEach((city)
-    # 但保留需要索引的情况
-    content = re.sub(
-        r'\.cities\.forEach\(\(city, (idx|index|cityIdx)\)',
-        r'.cities.forEach((city)',
-        content
-    )
+    # 但保留需要索引的情况：回调体里仍用到 idx 时不改
+    content = _FOREACH_INDEX.sub(_drop_unused_index, content)
 
     # 4. 替换 Object.entries 模式用于需要键名的情况
     # cities.forEach((city, idx) => { ... cityIdx ... })
@@ -41,40 +85,111 @@ def refactor_vue_file(filepath):
 
     # 这个需要更复杂的处理，暂时跳过
 
-    # 只有内容改变时才写入
-    if content != original_content:
-        with open(filepath, 'w', encoding='utf-8') as f:
+    return content
+
+
+def write_atomic(filepath, content):
+    """先写同目录临时文件再替换，中途失败不会留下半个文件"""
+    filepath = Path(filepath)
+    fd, tmp_path = tempfile.mkstemp(dir=filepath.parent, prefix=f'.{filepath.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
             f.write(content)
-        print(f"  ✓ Updated {filepath.name}")
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def refactor_vue_file(filepath):
+    """重构单个Vue文件，内容改变时原子写入；返回是否修改"""
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        content = f.read()
+
+    new_content = refactor_content(content)
+
+    # 只有内容改变时才写入
+    if new_content != content:
+        write_atomic(filepath, new_content)
         return True
-    else:
-        print(f"  - No changes needed for {filepath.name}")
-        return False
+    return False
+
+
+def _process(filepath):
+    """进程池任务：返回 (路径, 是否修改, 耗时秒, 错误信息)"""
+    start = time.perf_counter()
+    try:
+        changed = refactor_vue_file(filepath)
+        error = None
+    except (OSError, UnicodeDecodeError) as e:
+        changed = False
+        error = str(e)
+    return str(filepath), changed, time.perf_counter() - start, error
+
+
+def discover(roots, patterns=PATTERNS):
+    """按 glob 发现所有待处理文件（跳过 node_modules、dist 等目录和本脚本自身）"""
+    this_file = Path(__file__).resolve()
+    found = set()
+    for root in roots:
+        root = Path(root)
+        for pattern in patterns:
+            for path in root.rglob(pattern):
+                if EXCLUDED_DIRS.intersection(path.relative_to(root).parts):
+                    continue
+                if path.is_file() and path.resolve() != this_file:
+                    found.add(path)
+    return sorted(found)
+
+
+def default_roots():
+    """默认处理本仓库的 src/，以及镜像目录 citycard-vue/src/（存在时）"""
+    src_dir = Path(__file__).resolve().parent.parent
+    roots = [src_dir]
+    mirror = src_dir.parent / 'citycard-vue' / 'src'
+    if mirror.is_dir():
+        roots.append(mirror)
+    return roots
+
 
 def main():
-    # 需要处理的文件列表
-    files_to_process = [
-        'Game/CityDeployment.vue',
-        'Game/OpponentKnownCities.vue',
-        'Game/PendingSwapsPanel.vue',
-        'PlayerMode/CenterCitySelection.vue',
-        'PlayerMode/PlayerModeOnline.vue',
-        'AdminMode/CityEditor.vue',
-        'Game/BattleAnimation.vue'
-    ]
-
-    base_dir = Path(__file__).parent
-    updated_count = 0
-
-    for file_path in files_to_process:
-        full_path = base_dir / file_path
-        if full_path.exists():
-            if refactor_vue_file(full_path):
-                updated_count += 1
-        else:
-            print(f"  ✗ File not found: {file_path}")
-
-    print(f"\n✓ Completed! Updated {updated_count}/{len(files_to_process)} files")
+    parser = argparse.ArgumentParser(description='批量重构Vue组件：从数组索引改为城市名称')
+    parser.add_argument('roots', nargs='*', help='要扫描的目录（默认 src/ 和 citycard-vue/src/）')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='并行进程数（默认为CPU核数）')
+    parser.add_argument('--top', type=int, default=10, help='汇总中显示最慢的文件数')
+    args = parser.parse_args()
+
+    roots = [Path(r) for r in args.roots] or default_roots()
+    files = discover(roots)
+    if not files:
+        print("No .vue/.js files found")
+        return
+
+    print(f"Processing {len(files)} files with {args.jobs} workers...")
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = list(pool.map(_process, files, chunksize=max(1, len(files) // (args.jobs * 4))))
+    wall = time.perf_counter() - wall_start
+
+    updated = [r for r in results if r[1]]
+    failed = [r for r in results if r[3]]
+    busy = sum(r[2] for r in results)
+
+    for path, _, elapsed, _ in updated:
+        print(f"  ✓ Updated {path} ({elapsed * 1000:.1f} ms)")
+    for path, _, _, error in failed:
+        print(f"  ✗ {path}: {error}")
+
+    print(f"\nSlowest {min(args.top, len(results))} files:")
+    for path, changed, elapsed, _ in sorted(results, key=lambda r: r[2], reverse=True)[:args.top]:
+        mark = '✓' if changed else '-'
+        print(f"  {mark} {elapsed * 1000:8.1f} ms  {path}")
+
+    print(f"\n✓ Completed! Updated {len(updated)}/{len(files)} files")
+    print(f"  Wall time: {wall:.2f}s, worker time: {busy:.2f}s, failed: {len(failed)}")
+    if failed:
+        sys.exit(1)
+
 
 if __name__ == '__main__':
     main()
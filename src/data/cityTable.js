@@ -0,0 +1,51 @@
+/**
+ * 城市卡牌数据表（自动生成，请勿手动修改）
+ * 由 build_city_table.py 从 cities.js 和 citySkills.js 生成，源数据摘要 cbc716295a29956a
+ * 列式存储：CITY_TABLE.columns 的每一列按城市顺序排列，province / skill 为 provinces / skills 中的编号（-1 表示无技能）
+ */
+
+export const CITY_FLAGS = {"capital":1,"municipality":2,"sar":4,"plan":8}
+
+export const CITY_TABLE = {"version":1,"source":"cbc716295a29956a","flags":{"capital":1,"municipality":2,"sar":4,"plan":8},"provinces":["直辖市和特区","河北省","山西省","内蒙古自治区","辽宁省","吉林省","黑龙江省","江苏省","浙江省","安徽省","福建省","江西省","山东省","河南省","湖北省","湖南省","广东省","广西壮族自治区","海南省","四川省","贵州省","云南省","西藏自治区","陕西省","甘肃省","青海省","宁夏回族自治区","新疆维吾尔自治区","台湾省"],"skills":[["首都权威","passive","battle"],["经济中心","active","battle"],["津门守卫","passive","nonBattle"],["山城迷踪","active","battle"],["东方之珠","active","battle"],["赌城风云","active","nonBattle"],["安济桥","active","nonBattle"],["钢铁之城","passive","nonBattle"],["山海关","passive","nonBattle"],["邯郸学步","active","nonBattle"],["冬奥盛会","active","nonBattle"],["避暑山庄","active","nonBattle"],["夹缝求生","passive","nonBattle"],["衡水模式","passive","nonBattle"],["千年大计","passive","nonBattle"],["清徐陈醋","active","nonBattle"],["北岳恒山","active","nonBattle"],["五台山","passive","nonBattle"],["平遥古城","active","nonBattle"],["壶口瀑布","active","nonBattle"],["鹳雀楼","active","nonBattle"],["稀土之都","active","nonBattle"],["草原牧场","active","nonBattle"],["元上都","active","nonBattle"],["中国煤都","passive","nonBattle"],["载人航天","active","nonBattle"],["盛京荣耀","passive","battle"],["浪漫之都","active","nonBattle"],["钢都铁壁","active","battle"],["煤都重生","passive","nonBattle"],["本溪水洞","active","battle"],["鸭绿江","passive","battle"],["笔架山","active","nonBattle"],["鲅鱼圈","active","battle"],["玛瑙之光","active","nonBattle"],["辽阳白塔","passive","battle"],["红海滩","active","nonBattle"],["小品之乡","active","battle"],["兴城海滨","active","nonBattle"],["汽车城","active","nonBattle"],["雾凇奇观","active","nonBattle"],["英雄之城","passive","battle"],["梅花鹿之乡","passive","battle"],["通化葡萄酒","active","nonBattle"],["洮南古城","active","nonBattle"],["长白山","passive","battle"],["查干湖冬捕","active","nonBattle"],["冰城奇观","passive","nonBattle"],["鹤城守护","passive","battle"],["镜泊湖光","active","battle"],["三江平原","active","nonBattle"],["石油之城","active","battle"],["林都迷踪","passive","battle"],["石墨之都","passive","battle"],["完达山","passive","battle"],["奥运冠军","passive","battle"],["五大连池","passive","battle"],["林海雪原","active","nonBattle"],["古都守护","active","battle"],["灵山大佛","active","nonBattle"],["汉王故里","active","nonBattle"],["恐龙震慑","passive","battle"],["园林迷阵","active","battle"],["南通小卷","active","battle"],["花果山","active","nonBattle"],["盱眙小龙虾","active","nonBattle"],["无山阻隔","passive","battle"],["美食之都","active","nonBattle"],["镇江香醋","active","nonBattle"],["医药城","active","nonBattle"],["项王故里","passive","battle"],["西湖秘境","active","battle"],["宁波港","active","nonBattle"],["方言谜语","active","nonBattle"],["鲁迅文学","active","nonBattle"],["笔走龙蛇","passive","battle"],["南湖印记","active","nonBattle"],["世界义乌","active","nonBattle"],["三头一掌","passive","battle"],["天台山","active","nonBattle"],["景宁畲乡","active","battle"],["舟山海鲜","active","nonBattle"],["科创新城","active","nonBattle"],["天门山","active","nonBattle"],["中国铜都","active","nonBattle"],["天柱山","active","nonBattle"],["黄山","active","nonBattle"],["醉翁亭记","active","nonBattle"],["大别山","active","nonBattle"],["宣纸","active","battle"],["九华山","active","nonBattle"],["中药集散中心","active","nonBattle"],["闽都榕城","passive","nonBattle"],["妈祖之乡","passive","nonBattle"],["海丝起点","passive","nonBattle"],["海上花园","passive","battle"],["水仙花之乡","passive","nonBattle"],["古田会址","passive","nonBattle"],["闽人之源","passive","nonBattle"],["武夷山水","passive","nonBattle"],["福鼎肉片","passive","nonBattle"],["八一记忆","active","battle"],["长征伊始","active","nonBattle"],["明月山","active","nonBattle"],["井冈山","active","battle"],["鄱阳湖","active","nonBattle"],["庐山胜境","active","nonBattle"],["中国瓷都","active","battle"],["泉城水攻","passive","battle"],["青岛啤酒","active","nonBattle"],["淄博烧烤","active","nonBattle"],["台儿庄战役","active","nonBattle"],["胜利油田","active","nonBattle"],["蓬莱仙境","active","nonBattle"],["风筝探测","active","nonBattle"],["孔孟故里","active","nonBattle"],["泰山压顶","active","nonBattle"],["刘公岛","active","nonBattle"],["城建幻觉","active","battle"],["德州扒鸡","active","nonBattle"],["东阿阿胶","active","nonBattle"],["物流之都","active","nonBattle"],["菏泽牡丹","active","nonBattle"],["中原枢纽","active","battle"],["八朝古都","active","nonBattle"],["十三朝古都","active","nonBattle"],["中原大佛","active","nonBattle"],["殷墟古韵","active","battle"],["淇河灵韵","active","nonBattle"],["牧野雄风","active","nonBattle"],["云台奇景","active","nonBattle"],["魏都遗风","active","nonBattle"],["黄河明珠","active","nonBattle"],["商祖故里","active","nonBattle"],["伏羲故里","active","nonBattle"],["卧龙圣地","active","battle"],["信阳毛尖","active","battle"],["王屋山","active","battle"],["九省通衢","active","nonBattle"],["武当山","passive","nonBattle"],["三国战场","passive","battle"],["三峡大坝","active","nonBattle"],["隆中景区","active","nonBattle"],["火烧赤壁","active","nonBattle"],["潜江小龙虾","active","nonBattle"],["野人出没","passive","battle"],["土家风情","active","nonBattle"],["神农故里","active","nonBattle"],["橘子洲头","active","nonBattle"],["炎帝陵","active","nonBattle"],["伟人故里","active","nonBattle"],["南岳衡山","active","nonBattle"],["岳阳楼记","active","nonBattle"],["千山迷阵","active","nonBattle"],["桃花源记","active","nonBattle"],["世界锑都","active","nonBattle"],["永州八记","active","nonBattle"],["华南交通中枢","passive","nonBattle"],["凤凰古城","active","nonBattle"],["千年商都","active","nonBattle"],["特区领袖","active","nonBattle"],["浪漫海滨","passive","battle"],["侨乡潮韵","active","nonBattle"],["房产大亨","passive","battle"],["丹霞古韵","active","nonBattle"],["南国港湾","active","nonBattle"],["山水砚都","active","nonBattle"],["侨风碉楼","active","nonBattle"],["油城果乡","active","nonBattle"],["大亚湾区","passive","nonBattle"],["客家祖地","active","battle"],["深汕合作","passive","nonBattle"],["万绿水城","active","nonBattle"],["刀剪之都","active","nonBattle"],["北江凤韵","passive","nonBattle"],["世界工厂","active","nonBattle"],["伟人故里","passive","nonBattle"],["瓷都古韵","active","nonBattle"],["玉都商埠","active","nonBattle"],["石都禅意","active","nonBattle"],["南宁老友粉","active","nonBattle"],["螺蛳粉","active","nonBattle"],["桂林米粉","active","nonBattle"],["百年商埠","active","nonBattle"],["湾海双子","active","nonBattle"],["友谊关","passive","nonBattle"],["盘古文化","active","nonBattle"],["西江明珠","passive","nonBattle"],["三省通衢","passive","nonBattle"],["乐业天坑","active","battle"],["刘三姐故乡","active","battle"],["山海边境","active","battle"],["秀英炮台","active","nonBattle"],["绚丽海滨","active","nonBattle"],["南海守望","passive","nonBattle"],["博鳌论坛","active","nonBattle"],["文昌卫星","active","nonBattle"],["神州半岛","active","nonBattle"],["五指山","active","nonBattle"],["千年水利，天府之国","passive","battle"],["诗仙故里","active","nonBattle"],["盐井花灯","active","battle"],["泸州老窖","active","nonBattle"],["三星堆遗址","active","nonBattle"],["剑门蜀道","active","battle"],["中国甜都","passive","battle"],["峨眉金顶，乐山大佛","active","battle"],["安岳柠檬","active","battle"],["五粮液","active","nonBattle"],["阆中古城","active","nonBattle"],["雾雨朦胧","active","battle"],["天下九寨沟","passive","nonBattle"],["稻城亚丁","passive","nonBattle"],["彝族火把节","passive","nonBattle"],["三苏祠","active","battle"],["大数据中心","active","battle"],["中国凉都","active","battle"],["红色会址，茅台飘香","passive","battle"],["梵净金顶","active","nonBattle"],["中国金州","passive","nonBattle"],["百里杜鹃","active","battle"],["黄果树瀑布","active","battle"],["歌舞之州","active","nonBattle"],["中国天眼","passive","nonBattle"],["四季如春","active","battle"],["昭通苹果","active","nonBattle"],["宣威火腿","active","nonBattle"],["人类摇篮","active","nonBattle"],["玉溪烟草","active","nonBattle"],["哈尼梯田","active","battle"],["三七粉","active","nonBattle"],["普洱茶","active","nonBattle"],["西双版纳","active","nonBattle"],["白族之乡","active","nonBattle"],["咖啡之城","active","battle"],["丽江古城","active","nonBattle"],["三江并流","passive","nonBattle"],["香格里拉","active","battle"],["茶马古道","active","battle"],["布达拉宫","active","nonBattle"],["珠穆朗玛峰","passive","battle"],["冈仁波齐","active","battle"],["雅鲁藏布大峡谷","active","nonBattle"],["暗度陈仓","active","battle"],["大秦王朝","passive","battle"],["华山论剑","active","battle"],["汉朝之源","active","battle"],["秦岭天竺山","active","nonBattle"],["红色故都","active","nonBattle"],["能源示范城","passive","nonBattle"],["黄河明珠","passive","nonBattle"],["嘉峪关","active","nonBattle"],["莫高窟","passive","nonBattle"],["七彩丹霞","active","nonBattle"],["青铜峡","active","nonBattle"],["亚洲中心","passive","nonBattle"],["军垦第一连","passive","nonBattle"],["沙湾大盘鸡","active","nonBattle"],["水塔雪都，额河之源","passive","nonBattle"],["黑油山，魔鬼城","active","nonBattle"],["红山，洼地","active","nonBattle"],["甜蜜之旅","passive","battle"],["冰糖心","passive","nonBattle"],["喀喇昆仑","active","nonBattle"],["玉石之路","active","battle"]],"skillFields":["name","type","category"],"columns":{"name":["北京市","上海市","天津市","重庆市","香港特别行政区","澳门特别行政区","石家庄市","唐山市","秦皇岛市","邯郸市","邢台市","保定市","张家口市","承德市","沧州市","廊坊市","衡水市","雄安新区","太原市","大同市","阳泉市","长治市","晋城市","朔州市","忻州市","吕梁市","晋中市","临汾市","运城市","呼和浩特市","包头市","乌海市","赤峰市","呼伦贝尔市","兴安盟","通辽市","锡林郭勒盟","乌兰察布市","鄂尔多斯市","巴彦淖尔市","阿拉善盟","沈阳市","大连市","鞍山市","抚顺市","本溪市","丹东市","锦州市","营口市","阜新市","辽阳市","盘锦市","铁岭市","朝阳市","葫芦岛市","长春市","吉林市","四平市","辽源市","通化市","白山市","白城市","延边州","松原市","哈尔滨市","齐齐哈尔市","牡丹江市","佳木斯市","大庆市","伊春市","鸡西市","鹤岗市","双鸭山市","七台河市","绥化市","黑河市","大兴安岭地区","南京市","无锡市","徐州市","常州市","苏州市","南通市","连云港市","淮安市","盐城市","扬州市","镇江市","泰州市","宿迁市","杭州市","宁波市","温州市","绍兴市","湖州市","嘉兴市","金华市","衢州市","台州市","丽水市","舟山市","合肥市","芜湖市","蚌埠市","淮南市","马鞍山市","淮北市","铜陵市","安庆市","黄山市","阜阳市","宿州市","滁州市","六安市","宣城市","池州市","亳州市","福州市","莆田市","泉州市","厦门市","漳州市","龙岩市","三明市","南平市","宁德市","南昌市","赣州市","宜春市","吉安市","上饶市","抚州市","九江市","景德镇市","萍乡市","新余市","鹰潭市","济南市","青岛市","淄博市","枣庄市","东营市","烟台市","潍坊市","济宁市","泰安市","威海市","日照市","滨州市","德州市","聊城市","临沂市","菏泽市","郑州市","开封市","洛阳市","平顶山市","安阳市","鹤壁市","新乡市","焦作市","濮阳市","许昌市","漯河市","三门峡市","商丘市","周口市","驻马店市","南阳市","信阳市","济源市","武汉市","黄石市","十堰市","荆州市","宜昌市","襄阳市","鄂州市","荆门市","黄冈市","孝感市","咸宁市","仙桃市","潜江市","神农架林区","恩施州","天门市","随州市","长沙市","株洲市","湘潭市","衡阳市","邵阳市","岳阳市","张家界市","益阳市","常德市","娄底市","郴州市","永州市","怀化市","湘西州","广州市","深圳市","珠海市","汕头市","佛山市","韶关市","湛江市","肇庆市","江门市","茂名市","惠州市","梅州市","汕尾市","河源市","阳江市","清远市","东莞市","中山市","潮州市","揭阳市","云浮市","南宁市","柳州市","桂林市","梧州市","北海市","崇左市","来宾市","贵港市","贺州市","玉林市","百色市","河池市","钦州市","防城港市","海口市","三亚市","三沙市","琼海市","文昌市","万宁市","定安县","屯昌县","澄迈县","临高县","五指山市","东方市","白沙县","昌江县","乐东县","陵水县","保亭县","琼中县","儋州市","成都市","绵阳市","自贡市","攀枝花市","泸州市","德阳市","广元市","遂宁市","内江市","乐山市","资阳市","宜宾市","南充市","达州市","雅安市","阿坝州","甘孜州","凉山州","广安市","巴中市","眉山市","贵阳市","六盘水市","遵义市","铜仁市","黔西南州","毕节市","安顺市","黔东南州","黔南州","昆明市","昭通市","曲靖市","楚雄州","玉溪市","红河州","文山州","普洱市","西双版纳州","大理州","保山市","德宏州","丽江市","怒江州","迪庆州","临沧市","拉萨市","昌都市","山南市","日喀则市","那曲市","阿里地区","林芝市","西安市","铜川市","宝鸡市","咸阳市","渭南市","汉中市","安康市","商洛市","延安市","榆林市","兰州市","嘉峪关市","金昌市","白银市","天水市","酒泉市","张掖市","武威市","定西市","陇南市","平凉市","庆阳市","临夏州","甘南州","西宁市","海东市","海北州","黄南州","海南州","果洛州","玉树州","海西州","银川市","石嘴山市","吴忠市","固原市","中卫市","乌鲁木齐市","昌吉州","石河子市","博尔塔拉州","伊犁州","塔城地区","阿勒泰地区","克拉玛依市","吐鲁番市","哈密市","巴音郭楞州","阿克苏地区","克孜勒苏州","喀什地区","和田地区","台北市","桃园市","嘉义市","新北市","基隆市","台南市","台中市","新竹市","高雄市","南投县","彰化县","新竹县","澎湖县","台东县","宜兰县","屏东县","嘉义县","云林县","花莲县","苗栗县"],"province":[0,0,0,0,0,0,1,1,1,1,1,1,1,1,1,1,1,1,2,2,2,2,2,2,2,2,2,2,2,3,3,3,3,3,3,3,3,3,3,3,3,4,4,4,4,4,4,4,4,4,4,4,4,4,4,5,5,5,5,5,5,5,5,5,6,6,6,6,6,6,6,6,6,6,6,6,6,7,7,7,7,7,7,7,7,7,7,7,7,7,8,8,8,8,8,8,8,8,8,8,8,9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,9,10,10,10,10,10,10,10,10,10,11,11,11,11,11,11,11,11,11,11,11,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,12,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,13,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,14,15,15,15,15,15,15,15,15,15,15,15,15,15,15,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,16,17,17,17,17,17,17,17,17,17,17,17,17,17,17,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,18,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,19,20,20,20,20,20,20,20,20,20,21,21,21,21,21,21,21,21,21,21,21,21,21,21,21,21,22,22,22,22,22,22,22,23,23,23,23,23,23,23,23,23,23,24,24,24,24,24,24,24,24,24,24,24,24,24,24,25,25,25,25,25,25,25,25,26,26,26,26,26,27,27,27,27,27,27,27,27,27,27,27,27,27,27,27,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28,28],"hp":[52073,56709,18540,33758,30520,3741,8652,10450,2200,4920,2801,5003,1971,2002,4931,4041,2012,527,5382,1815,871,2558,2410,1304,1330,2575,2463,2439,2248,4278,4712,541,2407,1750,850,1738,1290,1260,6122,1278,419,9100,10002,2180,1004,1006,1019,1365,1570,652,1001,1418,789,1157,1014,8006,1702,602,547,786,590,627,1018,1031,6189,1402,1095,1052,2693,381,649,392,571,249,1285,742,178,19429,16774,9957,11159,27695,12802,4831,5630,8045,8057,5737,7255,5027,23011,18716,10214,8932,4453,7851,7313,2402,7006,2301,2346,14210,5403,2421,1750,2921,1419,1415,3306,1205,3778,2538,4221,2407,2149,1225,2621,15112,3580,13778,8980,6154,3579,2512,2190,4252,8142,5221,3930,3106,3936,2298,4247,1190,1276,1216,1459,14210,17561,5089,2503,4503,11351,8587,6128,3804,3896,2690,3558,4215,3304,6862,4937,15245,2860,6165,2929,2766,1144,3687,2480,2106,3583,1954,1703,3475,3811,3502,5168,3197,808,22147,2430,2705,3712,6464,6114,1416,2602,3034,3399,2033,1191,1015,52,1742,785,1503,15738,4063,3077,4690,2883,5387,668,2381,4771,2237,3502,2830,2192,890,32039,38732,4573,3024,13157,1705,3953,2975,4294,4106,6364,1583,1546,1435,1671,2317,12760,4261,1452,2554,1345,6212,3097,2580,1720,1974,1359,1050,1628,1007,2437,2101,1454,1908,1201,2563,1034,8,387,376,353,140,116,560,268,52,285,72,166,234,288,89,89,1037,24764,4601,2003,1410,3004,3387,1349,2002,2051,2502,1151,4135,2902,2991,1132,601,613,2606,1701,917,2009,6038,1778,5206,1723,1535,2541,1232,1500,2008,8637,2103,3778,2040,2688,3155,1633,1252,941,2088,1347,648,744,289,317,1128,1091,425,332,510,268,114,292,13903,607,2649,3270,2232,2004,1190,824,2372,7501,3904,391,670,789,981,1104,734,802,794,716,755,1235,547,276,1915,616,123,124,246,73,92,917,3034,580,962,488,633,4658,2638,532,575,1807,1050,484,1304,640,1163,1724,2043,272,1752,598,7906,5954,643,10288,673,3885,7040,1481,6464,842,2296,1995,169,334,851,1458,789,1233,567,1260],"flags":[2,2,2,2,4,4,1,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,1,8,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,1,8,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,8,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,1,8,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,1,8,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,1,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,1,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0,0],"skill":[0,1,2,3,4,5,6,7,8,9,-1,-1,10,11,-1,12,13,14,15,16,-1,-1,-1,-1,17,-1,18,19,20,-1,21,-1,-1,22,-1,-1,23,-1,24,-1,25,26,27,28,29,30,31,32,33,34,35,36,37,-1,38,39,40,41,42,43,-1,44,45,46,47,48,49,50,51,52,53,-1,54,55,-1,56,57,58,59,60,61,62,63,64,65,66,67,68,69,70,71,72,73,74,75,76,77,78,79,80,81,82,83,-1,-1,-1,-1,84,85,86,-1,-1,87,88,89,90,91,92,93,94,95,96,97,98,99,100,101,102,103,104,105,-1,106,107,-1,-1,-1,108,109,110,111,112,113,114,115,116,117,118,-1,119,120,121,122,123,124,125,126,127,128,129,130,-1,131,-1,132,133,134,-1,135,136,137,138,-1,139,140,141,142,-1,-1,-1,-1,143,-1,144,145,146,-1,147,148,149,150,151,-1,152,153,-1,154,155,-1,156,157,158,159,160,161,162,163,164,165,166,167,168,169,170,171,172,173,174,175,176,177,178,179,180,181,182,183,184,185,186,187,188,-1,189,190,-1,191,192,193,194,195,196,197,-1,-1,-1,-1,198,-1,-1,-1,-1,-1,-1,-1,-1,199,200,201,-1,202,203,204,-1,205,206,207,208,209,-1,210,211,212,213,-1,-1,214,215,216,217,218,219,220,221,222,223,224,225,226,227,228,229,230,231,232,233,234,-1,235,236,237,238,239,-1,-1,240,-1,241,242,125,-1,243,244,245,246,-1,247,248,249,250,251,-1,-1,-1,252,253,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,254,-1,-1,255,-1,256,-1,-1,257,258,259,260,261,-1,262,-1,263,264,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1,-1]}}
+
+const INDEX = {"北京市":0,"上海市":1,"天津市":2,"重庆市":3,"香港特别行政区":4,"澳门特别行政区":5,"石家庄市":6,"唐山市":7,"秦皇岛市":8,"邯郸市":9,"邢台市":10,"保定市":11,"张家口市":12,"承德市":13,"沧州市":14,"廊坊市":15,"衡水市":16,"雄安新区":17,"太原市":18,"大同市":19,"阳泉市":20,"长治市":21,"晋城市":22,"朔州市":23,"忻州市":24,"吕梁市":25,"晋中市":26,"临汾市":27,"运城市":28,"呼和浩特市":29,"包头市":30,"乌海市":31,"赤峰市":32,"呼伦贝尔市":33,"兴安盟":34,"通辽市":35,"锡林郭勒盟":36,"乌兰察布市":37,"鄂尔多斯市":38,"巴彦淖尔市":39,"阿拉善盟":40,"沈阳市":41,"大连市":42,"鞍山市":43,"抚顺市":44,"本溪市":45,"丹东市":46,"锦州市":47,"营口市":48,"阜新市":49,"辽阳市":50,"盘锦市":51,"铁岭市":52,"朝阳市":53,"葫芦岛市":54,"长春市":55,"吉林市":56,"四平市":57,"辽源市":58,"通化市":59,"白山市":60,"白城市":61,"延边州":62,"松原市":63,"哈尔滨市":64,"齐齐哈尔市":65,"牡丹江市":66,"佳木斯市":67,"大庆市":68,"伊春市":69,"鸡西市":70,"鹤岗市":71,"双鸭山市":72,"七台河市":73,"绥化市":74,"黑河市":75,"大兴安岭地区":76,"南京市":77,"无锡市":78,"徐州市":79,"常州市":80,"苏州市":81,"南通市":82,"连云港市":83,"淮安市":84,"盐城市":85,"扬州市":86,"镇江市":87,"泰州市":88,"宿迁市":89,"杭州市":90,"宁波市":91,"温州市":92,"绍兴市":93,"湖州市":94,"嘉兴市":95,"金华市":96,"衢州市":97,"台州市":98,"丽水市":99,"舟山市":100,"合肥市":101,"芜湖市":102,"蚌埠市":103,"淮南市":104,"马鞍山市":105,"淮北市":106,"铜陵市":107,"安庆市":108,"黄山市":109,"阜阳市":110,"宿州市":111,"滁州市":112,"六安市":113,"宣城市":114,"池州市":115,"亳州市":116,"福州市":117,"莆田市":118,"泉州市":119,"厦门市":120,"漳州市":121,"龙岩市":122,"三明市":123,"南平市":124,"宁德市":125,"南昌市":126,"赣州市":127,"宜春市":128,"吉安市":129,"上饶市":130,"抚州市":131,"九江市":132,"景德镇市":133,"萍乡市":134,"新余市":135,"鹰潭市":136,"济南市":137,"青岛市":138,"淄博市":139,"枣庄市":140,"东营市":141,"烟台市":142,"潍坊市":143,"济宁市":144,"泰安市":145,"威海市":146,"日照市":147,"滨州市":148,"德州市":149,"聊城市":150,"临沂市":151,"菏泽市":152,"郑州市":153,"开封市":154,"洛阳市":155,"平顶山市":156,"安阳市":157,"鹤壁市":158,"新乡市":159,"焦作市":160,"濮阳市":161,"许昌市":162,"漯河市":163,"三门峡市":164,"商丘市":165,"周口市":166,"驻马店市":167,"南阳市":168,"信阳市":169,"济源市":170,"武汉市":171,"黄石市":172,"十堰市":173,"荆州市":174,"宜昌市":175,"襄阳市":176,"鄂州市":177,"荆门市":178,"黄冈市":179,"孝感市":180,"咸宁市":181,"仙桃市":182,"潜江市":183,"神农架林区":184,"恩施州":185,"天门市":186,"随州市":187,"长沙市":188,"株洲市":189,"湘潭市":190,"衡阳市":191,"邵阳市":192,"岳阳市":193,"张家界市":194,"益阳市":195,"常德市":196,"娄底市":197,"郴州市":198,"永州市":199,"怀化市":200,"湘西州":201,"广州市":202,"深圳市":203,"珠海市":204,"汕头市":205,"佛山市":206,"韶关市":207,"湛江市":208,"肇庆市":209,"江门市":210,"茂名市":211,"惠州市":212,"梅州市":213,"汕尾市":214,"河源市":215,"阳江市":216,"清远市":217,"东莞市":218,"中山市":219,"潮州市":220,"揭阳市":221,"云浮市":222,"南宁市":223,"柳州市":224,"桂林市":225,"梧州市":226,"北海市":227,"崇左市":228,"来宾市":229,"贵港市":230,"贺州市":231,"玉林市":232,"百色市":233,"河池市":234,"钦州市":235,"防城港市":236,"海口市":237,"三亚市":238,"三沙市":239,"琼海市":240,"文昌市":241,"万宁市":242,"定安县":243,"屯昌县":244,"澄迈县":245,"临高县":246,"五指山市":247,"东方市":248,"白沙县":249,"昌江县":250,"乐东县":251,"陵水县":252,"保亭县":253,"琼中县":254,"儋州市":255,"成都市":256,"绵阳市":257,"自贡市":258,"攀枝花市":259,"泸州市":260,"德阳市":261,"广元市":262,"遂宁市":263,"内江市":264,"乐山市":265,"资阳市":266,"宜宾市":267,"南充市":268,"达州市":269,"雅安市":270,"阿坝州":271,"甘孜州":272,"凉山州":273,"广安市":274,"巴中市":275,"眉山市":276,"贵阳市":277,"六盘水市":278,"遵义市":279,"铜仁市":280,"黔西南州":281,"毕节市":282,"安顺市":283,"黔东南州":284,"黔南州":285,"昆明市":286,"昭通市":287,"曲靖市":288,"楚雄州":289,"玉溪市":290,"红河州":291,"文山州":292,"普洱市":293,"西双版纳州":294,"大理州":295,"保山市":296,"德宏州":297,"丽江市":298,"怒江州":299,"迪庆州":300,"临沧市":301,"拉萨市":302,"昌都市":303,"山南市":304,"日喀则市":305,"那曲市":306,"阿里地区":307,"林芝市":308,"西安市":309,"铜川市":310,"宝鸡市":311,"咸阳市":312,"渭南市":313,"汉中市":314,"安康市":315,"商洛市":316,"延安市":317,"榆林市":318,"兰州市":319,"嘉峪关市":320,"金昌市":321,"白银市":322,"天水市":323,"酒泉市":324,"张掖市":325,"武威市":326,"定西市":327,"陇南市":328,"平凉市":329,"庆阳市":330,"临夏州":331,"甘南州":332,"西宁市":333,"海东市":334,"海北州":335,"黄南州":336,"海南州":337,"果洛州":338,"玉树州":339,"海西州":340,"银川市":341,"石嘴山市":342,"吴忠市":343,"固原市":344,"中卫市":345,"乌鲁木齐市":346,"昌吉州":347,"石河子市":348,"博尔塔拉州":349,"伊犁州":350,"塔城地区":351,"阿勒泰地区":352,"克拉玛依市":353,"吐鲁番市":354,"哈密市":355,"巴音郭楞州":356,"阿克苏地区":357,"克孜勒苏州":358,"喀什地区":359,"和田地区":360,"台北市":361,"桃园市":362,"嘉义市":363,"新北市":364,"基隆市":365,"台南市":366,"台中市":367,"新竹市":368,"高雄市":369,"南投县":370,"彰化县":371,"新竹县":372,"澎湖县":373,"台东县":374,"宜兰县":375,"屏东县":376,"嘉义县":377,"云林县":378,"花莲县":379,"苗栗县":380}
+
+/**
+ * 城市名 -> 行号，不存在返回 -1
+ */
+export function cityIndex(name) {
+  const i = INDEX[name]
+  return i === undefined ? -1 : i
+}
+
+/**
+ * 取一行城市数据：{ name, province, hp, flags, skill }，不存在返回 null
+ */
+export function cityRow(name) {
+  const i = cityIndex(name)
+  if (i < 0) return null
+  const c = CITY_TABLE.columns
+  return {
+    name: c.name[i],
+    province: CITY_TABLE.provinces[c.province[i]],
+    hp: c.hp[i],
+    flags: c.flags[i],
+    skill: c.skill[i] < 0 ? null : CITY_TABLE.skills[c.skill[i]][0]
+  }
+}
+
+/**
+ * 城市所属省份名称，不存在返回 null
+ */
+export function provinceOf(name) {
+  const i = cityIndex(name)
+  return i < 0 ? null : CITY_TABLE.provinces[CITY_TABLE.columns.province[i]]
+}
+
+/**
+ * 城市是否带有某个标记，如 hasCityFlag('大连市', CITY_FLAGS.plan)
+ */
+export function hasCityFlag(name, flag) {
+  const i = cityIndex(name)
+  return i >= 0 && (CITY_TABLE.columns.flags[i] & flag) !== 0
+}
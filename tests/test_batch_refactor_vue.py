@@ -0,0 +1,45 @@
+"""batch_refactor_vue 规则 3（去掉 forEach 的索引参数）只在回调不再使用索引时生效"""
+
+import re
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'src' / 'components'))
+
+import batch_refactor_vue  # noqa: E402
+
+ANIMATION_DATA = ROOT / 'src' / 'composables' / 'game' / 'battleAnimationData.js'
+
+
+def test_keeps_index_used_in_battle_animation_data():
+    content = ANIMATION_DATA.read_text(encoding='utf-8')
+    assert content.count('.cities.forEach((city, idx)') == 4
+    assert batch_refactor_vue.refactor_content(content) == content
+
+
+def test_drops_unused_index():
+    content = 'p.cities.forEach((city, idx) => {\n  use(city)\n})\n'
+    assert batch_refactor_vue.refactor_content(content) == 'p.cities.forEach((city) => {\n  use(city)\n})\n'
+
+
+def test_index_used_in_template_or_after_string_paren():
+    content = ('a.cities.forEach((city, index) => log(`${index}`))\n'
+               'b.cities.forEach((city, idx) => { s = ")"; use(idx) })\n'
+               'c.cities.forEach((city, idx) => use(city))\n'
+               'use(idx)\n')
+    result = batch_refactor_vue.refactor_content(content)
+    assert 'a.cities.forEach((city, index)' in result
+    assert 'b.cities.forEach((city, idx)' in result
+    assert 'c.cities.forEach((city) =>' in result
+
+
+def test_every_removed_index_is_unused():
+    """对整个 src/ 跑规则，被去掉的索引在原回调体里都没有出现"""
+    for path in batch_refactor_vue.discover([ROOT / 'src']):
+        content = path.read_text(encoding='utf-8')
+        for match in batch_refactor_vue._FOREACH_INDEX.finditer(content):
+            replaced = batch_refactor_vue._drop_unused_index(match)
+            if replaced != match.group(0):
+                end = batch_refactor_vue._call_end(content, match.start() + len('.cities.forEach('))
+                assert not re.search(r'\b' + match.group(1) + r'\b', content[match.end():end]), path